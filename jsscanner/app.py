@@ -4,48 +4,181 @@ import os
 # Import OCR blueprints
 from blueprints.ocr.pytesseract_bp import pytesseract_bp
 from blueprints.ocr.opencv_bp import opencv_bp
+from blueprints.ocr.jobs_bp import jobs_bp
+from blueprints.ocr.artifacts_bp import artifacts_bp
+from blueprints.ocr.metrics_bp import metrics_bp
+from blueprints.ocr.stream_bp import stream_bp
+from blueprints.ocr.health_bp import health_bp
 
-# Samsung Electronics India Barcode Scanner Application
-app = Flask(__name__)
+# Import barcode blueprints
+from blueprints.barcode.barcode_bp import barcode_bp
 
-# Configure upload folder
-app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Import scan blueprints
+from blueprints.scan.scan_bp import scan_bp
 
-# Register OCR blueprints
-app.register_blueprint(pytesseract_bp)
-app.register_blueprint(opencv_bp)
+# Import catalogue blueprints
+from blueprints.catalogue.catalogue_bp import catalogue_bp
 
-@app.route('/interface',methods=['GET'])
 def interface():
     return render_template('file.html')
 
-@app.route('/priority',methods=['GET'])
 def priority():# renders the html file with optimization for barcode priority
     try:
         return render_template('order.html')
     except Exception as e:
         return f"Template error: {str(e)}", 500
 
-@app.route('/code128',methods=['GET'])
 def code128():
     return render_template('code128_test.html')
 
-@app.route('/zxing',methods=['GET'])
 def zxing():
     return render_template('zxing/samsung_scanner.html')
 
-@app.route('/zxing/mobile',methods=['GET'])
 def zxing_mobile():
     return render_template('zxing/mobile_scanner.html')
 
-@app.route('/static/quagga',methods=['GET'])
 def static_quagga():
     return render_template('static/quagga_static.html')
 
-@app.route('/static/zxing',methods=['GET'])
 def static_zxing():
     return render_template('static/zxing_static.html')
 
+def create_app(config=None):
+    """
+    Samsung Electronics India Barcode Scanner Application
+
+    Settings come from the environment; ``config`` overrides them (tests,
+    benchmarks). Used by the development server below and by Gunicorn
+    (``gunicorn.conf.py``), which preloads it once and forks the workers.
+    """
+    app = Flask(__name__)
+
+    # Configure upload folder
+    app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+
+    # OCR engine pool - one long-lived Tesseract engine per core
+    app.config['OCR_ENGINE_POOL_SIZE'] = int(os.environ.get('OCR_ENGINE_POOL_SIZE', os.cpu_count() or 1))
+    # Text region crops of one mode=regions request recognised in parallel; Gunicorn splits the cores between its workers
+    app.config['OCR_REGION_WORKERS'] = int(os.environ.get('OCR_REGION_WORKERS', os.cpu_count() or 1))
+
+    # Decode stage - large photos are decoded at reduced scale and normalised before preprocessing
+    app.config['OCR_MAX_DIMENSION'] = int(os.environ.get('OCR_MAX_DIMENSION', 2000))
+    app.config['OCR_TARGET_TEXT_HEIGHT'] = int(os.environ.get('OCR_TARGET_TEXT_HEIGHT', 0))  # 0 disables
+
+    # Deskew stage - skew and 90/180/270 degree rotation are corrected from text-line geometry before OCR
+    app.config['OCR_DESKEW'] = os.environ.get('OCR_DESKEW', '1') != '0'
+
+    # OCR result cache - in-memory LRU in front of a shared SQLite file
+    app.config['OCR_CACHE_ENABLED'] = os.environ.get('OCR_CACHE_ENABLED', '1') != '0'
+    app.config['OCR_CACHE_PATH'] = os.environ.get(
+        'OCR_CACHE_PATH', os.path.join(app.config['UPLOAD_FOLDER'], 'ocr_cache.sqlite3'))
+    app.config['OCR_CACHE_MEMORY_ENTRIES'] = int(os.environ.get('OCR_CACHE_MEMORY_ENTRIES', 256))
+    app.config['OCR_CACHE_MEMORY_BYTES'] = int(os.environ.get('OCR_CACHE_MEMORY_BYTES', 64 * 1024 * 1024))
+    app.config['OCR_CACHE_DISK_BYTES'] = int(os.environ.get('OCR_CACHE_DISK_BYTES', 512 * 1024 * 1024))
+    app.config['OCR_CACHE_TTL_SECONDS'] = int(os.environ.get('OCR_CACHE_TTL_SECONDS', 24 * 3600))
+
+    # Batch OCR - bounded number of images held in memory while streaming results
+    app.config['OCR_BATCH_MAX_IN_FLIGHT'] = int(os.environ.get('OCR_BATCH_MAX_IN_FLIGHT', 2 * app.config['OCR_ENGINE_POOL_SIZE']))
+    app.config['OCR_BATCH_MAX_CONTENT_LENGTH'] = int(os.environ.get('OCR_BATCH_MAX_CONTENT_LENGTH', 512 * 1024 * 1024))
+    # JSON batches are parsed whole, so base64 bodies get a smaller limit
+    app.config['OCR_BATCH_MAX_JSON_LENGTH'] = int(os.environ.get('OCR_BATCH_MAX_JSON_LENGTH', 64 * 1024 * 1024))
+
+    # Document OCR - multi-page TIFF/PDF uploads are spooled to disk and OCR'd page by page
+    app.config['OCR_DOCUMENT_MAX_CONTENT_LENGTH'] = int(os.environ.get('OCR_DOCUMENT_MAX_CONTENT_LENGTH', 1024 * 1024 * 1024))
+    app.config['OCR_DOCUMENT_MAX_PAGES'] = int(os.environ.get('OCR_DOCUMENT_MAX_PAGES', 2000))
+    app.config['OCR_DOCUMENT_DPI'] = int(os.environ.get('OCR_DOCUMENT_DPI', 300))  # PDF render resolution
+    app.config['OCR_DOCUMENT_SPOOL_DIR'] = os.environ.get('OCR_DOCUMENT_SPOOL_DIR') or None  # system temp dir by default
+
+    # Live camera streams - frames are coalesced to the newest and near-duplicates skipped
+    app.config['OCR_STREAM_MAX_DIMENSION'] = int(os.environ.get('OCR_STREAM_MAX_DIMENSION', 1280))
+    app.config['OCR_STREAM_DEDUP_DISTANCE'] = int(os.environ.get('OCR_STREAM_DEDUP_DISTANCE', 4))  # bits of a 256-bit hash
+    app.config['OCR_STREAM_MAX_FRAME_BYTES'] = int(os.environ.get('OCR_STREAM_MAX_FRAME_BYTES', 4 * 1024 * 1024))
+    app.config['OCR_STREAM_MAX_CONTENT_LENGTH'] = int(os.environ.get('OCR_STREAM_MAX_CONTENT_LENGTH', 1024 * 1024 * 1024))
+    app.config['OCR_STREAM_IDLE_TIMEOUT'] = float(os.environ.get('OCR_STREAM_IDLE_TIMEOUT', 30))
+    app.config['OCR_STREAM_SESSION_PATH'] = os.environ.get(
+        'OCR_STREAM_SESSION_PATH', os.path.join(app.config['UPLOAD_FOLDER'], 'ocr_stream_sessions.sqlite3'))
+
+    # Asynchronous OCR jobs - bounded queue in front of a fixed worker pool
+    app.config['OCR_JOB_WORKERS'] = int(os.environ.get('OCR_JOB_WORKERS', app.config['OCR_ENGINE_POOL_SIZE']))
+    app.config['OCR_JOB_QUEUE_DEPTH'] = int(os.environ.get('OCR_JOB_QUEUE_DEPTH', 64))
+    app.config['OCR_JOB_RESULT_TTL'] = int(os.environ.get('OCR_JOB_RESULT_TTL', 600))
+    # Job status and results shared by every worker process, so any of them can answer a poll
+    app.config['OCR_JOB_STORE_PATH'] = os.environ.get(
+        'OCR_JOB_STORE_PATH', os.path.join(app.config['UPLOAD_FOLDER'], 'ocr_jobs.sqlite3'))
+
+    # Preprocessing images are written once to a local artifact store and served by URL
+    app.config['OCR_ARTIFACT_DIR'] = os.environ.get(
+        'OCR_ARTIFACT_DIR', os.path.join(app.config['UPLOAD_FOLDER'], 'artifacts'))
+    app.config['OCR_ARTIFACT_TTL_SECONDS'] = int(os.environ.get('OCR_ARTIFACT_TTL_SECONDS', 3600))
+    app.config['OCR_ARTIFACT_FORMAT'] = os.environ.get('OCR_ARTIFACT_FORMAT', 'jpeg')
+    app.config['OCR_ARTIFACT_QUALITY'] = int(os.environ.get('OCR_ARTIFACT_QUALITY', 80))
+
+    # OCR cascade - stop escalating once average word confidence clears the threshold
+    app.config['OCR_CASCADE_CONFIDENCE'] = float(os.environ.get('OCR_CASCADE_CONFIDENCE', 75))
+    app.config['OCR_CASCADE_BUDGET_MS'] = float(os.environ.get('OCR_CASCADE_BUDGET_MS', 3000))
+
+    # Image quality check - blurred, badly exposed or tiny-text photos are rejected before OCR
+    app.config['OCR_QUALITY_CHECK'] = os.environ.get('OCR_QUALITY_CHECK', '1') != '0'
+    app.config['OCR_QUALITY_MIN_SHARPNESS'] = float(os.environ.get('OCR_QUALITY_MIN_SHARPNESS', 8.0))  # variance of the Laplacian
+    app.config['OCR_QUALITY_MIN_CONTRAST'] = int(os.environ.get('OCR_QUALITY_MIN_CONTRAST', 24))  # 1st-99th percentile range
+    app.config['OCR_QUALITY_MAX_CLIPPED'] = float(os.environ.get('OCR_QUALITY_MAX_CLIPPED', 0.9))
+    app.config['OCR_QUALITY_MIN_TEXT_HEIGHT'] = int(os.environ.get('OCR_QUALITY_MIN_TEXT_HEIGHT', 6))
+
+    # Server-side barcode decoding - barcodes need more pixels per module than text per glyph
+    app.config['BARCODE_MAX_DIMENSION'] = int(os.environ.get('BARCODE_MAX_DIMENSION', 2500))
+
+    # Health checks - Tesseract/OpenCV capabilities are probed once and re-probed after this many seconds
+    app.config['OCR_CAPABILITY_TTL_SECONDS'] = int(os.environ.get('OCR_CAPABILITY_TTL_SECONDS', 300))
+
+    # Worker processes - native thread pools per worker and engine warm-up before serving
+    app.config['OCR_OPENCV_THREADS'] = int(os.environ.get('OCR_OPENCV_THREADS', 0))  # 0 keeps the OpenCV default
+    app.config['OCR_WARMUP'] = os.environ.get('OCR_WARMUP', '1') != '0'
+    # Metrics of every worker process are summed through this directory (set by gunicorn.conf.py)
+    app.config['OCR_METRICS_DIR'] = os.environ.get('OCR_METRICS_DIR', '')
+
+    # Execution backend - 'process' runs preprocessing and OCR in worker processes fed through shared memory
+    app.config['OCR_EXECUTION_BACKEND'] = os.environ.get('OCR_EXECUTION_BACKEND', 'thread')
+    app.config['OCR_PROCESS_WORKERS'] = int(os.environ.get('OCR_PROCESS_WORKERS', 0))  # 0 uses one per CPU core; Gunicorn splits the cores between its workers
+    app.config['OCR_PROCESS_SLOT_MB'] = int(os.environ.get('OCR_PROCESS_SLOT_MB', 64))  # shared buffer per worker
+    app.config['OCR_PROCESS_TASK_TIMEOUT'] = int(os.environ.get('OCR_PROCESS_TASK_TIMEOUT', 120))
+
+    # Catalogue matcher - memory-mapped index built with `python -m blueprints.catalogue.index`
+    app.config['CATALOGUE_INDEX_PATH'] = os.environ.get(
+        'CATALOGUE_INDEX_PATH', os.path.join(app.config['UPLOAD_FOLDER'], 'catalogue.idx'))
+    app.config['CATALOGUE_MAX_DISTANCE'] = int(os.environ.get('CATALOGUE_MAX_DISTANCE', 1))  # edits tolerated by fuzzy model lookups
+
+    if config:
+        app.config.update(config)
+
+    # Register OCR blueprints
+    app.register_blueprint(pytesseract_bp)
+    app.register_blueprint(opencv_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(artifacts_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(stream_bp)
+    app.register_blueprint(health_bp)
+
+    # Register barcode blueprints
+    app.register_blueprint(barcode_bp)
+
+    # Register scan blueprints
+    app.register_blueprint(scan_bp)
+
+    # Register catalogue blueprints
+    app.register_blueprint(catalogue_bp)
+
+    # Register scanner pages
+    app.add_url_rule('/interface', view_func=interface)
+    app.add_url_rule('/priority', view_func=priority)
+    app.add_url_rule('/code128', view_func=code128)
+    app.add_url_rule('/zxing', view_func=zxing)
+    app.add_url_rule('/zxing/mobile', view_func=zxing_mobile)
+    app.add_url_rule('/static/quagga', view_func=static_quagga)
+    app.add_url_rule('/static/zxing', view_func=static_zxing)
+
+    return app
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", debug=True, port=5005)
\ No newline at end of file
+    create_app().run(host="0.0.0.0", debug=True, port=5005)
\ No newline at end of file
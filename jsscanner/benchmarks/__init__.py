@@ -0,0 +1 @@
+# OCR Benchmarks
\ No newline at end of file
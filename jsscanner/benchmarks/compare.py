@@ -0,0 +1,116 @@
+"""
+OCR Benchmark Comparison
+Samsung Electronics India - Flag regressions between two benchmark reports
+
+    python -m benchmarks.compare benchmarks/results/baseline.json benchmarks/results/new.json
+
+Exits with status 1 when any stage got slower than ``--threshold`` (and by
+more than ``--min-delta-ms``), peak memory grew by more than
+``--threshold``, or accuracy dropped by more than ``--accuracy-tolerance``.
+"""
+
+import argparse
+import json
+import sys
+
+# Environment fields that make timings incomparable when they differ
+ENVIRONMENT_KEYS = ('platform', 'cpu_count', 'python', 'numpy', 'opencv', 'pillow', 'tesseract',
+                    'engine_pool', 'decode')
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def environment_differences(base, new):
+    base_env = base.get('environment', {})
+    new_env = new.get('environment', {})
+    return [
+        f"{key}: {base_env.get(key)} -> {new_env.get(key)}"
+        for key in ENVIRONMENT_KEYS
+        if base_env.get(key) != new_env.get(key)
+    ]
+
+
+def compare_reports(base, new, threshold=0.1, min_delta_ms=1.0, accuracy_tolerance=0.02):
+    """
+    Compare two reports. Returns a list of rows ``(case, pipeline, metric,
+    base, new, change, regression)`` for every metric present in both.
+    """
+    rows = []
+    for case_id, new_case in new['cases'].items():
+        base_case = base['cases'].get(case_id)
+        if base_case is None:
+            continue
+        for pipeline, new_result in new_case['pipelines'].items():
+            base_result = base_case['pipelines'].get(pipeline)
+            if base_result is None:
+                continue
+
+            for stage, new_stage in new_result['stages'].items():
+                base_stage = base_result['stages'].get(stage)
+                if base_stage is None:
+                    continue
+                before, after = base_stage['median_ms'], new_stage['median_ms']
+                change = (after - before) / before if before else 0.0
+                regression = change > threshold and after - before > min_delta_ms
+                rows.append((case_id, pipeline, f'{stage} ms', before, after, change, regression))
+
+            if 'peak_memory_bytes' in base_result and 'peak_memory_bytes' in new_result:
+                before, after = base_result['peak_memory_bytes'], new_result['peak_memory_bytes']
+                change = (after - before) / before if before else 0.0
+                rows.append((case_id, pipeline, 'peak_memory_bytes', before, after, change, change > threshold))
+
+            if 'accuracy' in base_result and 'accuracy' in new_result:
+                for metric, higher_is_better in (('cer', False), ('word_recall', True)):
+                    before, after = base_result['accuracy'][metric], new_result['accuracy'][metric]
+                    loss = before - after if higher_is_better else after - before
+                    rows.append((case_id, pipeline, metric, before, after, after - before,
+                                 loss > accuracy_tolerance))
+    return rows
+
+
+def format_row(row):
+    case_id, pipeline, metric, before, after, change, regression = row
+    if metric.endswith(' ms') or metric == 'peak_memory_bytes':
+        change_text = f"{change * 100:+7.1f}%"
+    else:
+        change_text = f"{change:+8.4f}"
+    flag = 'REGRESSION' if regression else ''
+    return f"{case_id:28} {pipeline:15} {metric:42} {before:>12.3f} {after:>12.3f} {change_text} {flag}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two OCR benchmark reports')
+    parser.add_argument('base', help='baseline report')
+    parser.add_argument('new', help='report to check')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown / memory growth flagged as a regression (default 0.1)')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                        help='ignore slowdowns smaller than this many milliseconds (default 1.0)')
+    parser.add_argument('--accuracy-tolerance', type=float, default=0.02,
+                        help='absolute CER / word recall loss flagged as a regression (default 0.02)')
+    parser.add_argument('--all', action='store_true', help='print every metric, not only regressions')
+    args = parser.parse_args(argv)
+
+    base = load_report(args.base)
+    new = load_report(args.new)
+
+    differences = environment_differences(base, new)
+    if differences:
+        print('Warning: reports come from different environments:')
+        for difference in differences:
+            print(f"  {difference}")
+
+    rows = compare_reports(base, new, args.threshold, args.min_delta_ms, args.accuracy_tolerance)
+    regressions = [row for row in rows if row[-1]]
+    for row in rows if args.all else regressions:
+        print(format_row(row))
+
+    print(f"{len(rows)} metrics compared, {len(regressions)} regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Benchmark Corpus
+Samsung Electronics India - Sample sticker photos plus rendered synthetic stickers
+
+Photos come from ``jsscanner/images`` with ground truth text from
+``ground_truth.json`` (photos without an entry are timed but not scored).
+Synthetic stickers are rendered deterministically at several resolutions,
+so their ground truth is exact.
+"""
+
+import io
+import json
+import os
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGES_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), 'images')
+GROUND_TRUTH_PATH = os.path.join(BENCHMARK_DIR, 'ground_truth.json')
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp')
+
+# Text printed on the synthetic stickers
+SYNTHETIC_LINES = (
+    'SM-A525F/DS',
+    'S/N R58M12ABCDE',
+    'IMEI 356938035643809',
+    'EAN 8801643993984',
+    'MADE IN INDIA'
+)
+
+# Synthetic photo sizes (width x height) - the sticker covers about a third of the frame
+SYNTHETIC_SIZES = {
+    'small': (800, 600),
+    'medium': (1600, 1200),
+    'large': (4000, 3000)
+}
+
+
+class Case:
+    """One benchmark input: encoded image bytes and optional ground truth"""
+
+    def __init__(self, case_id, image_bytes, ground_truth=None, source='photo'):
+        self.case_id = case_id
+        self.image_bytes = image_bytes
+        self.ground_truth = ground_truth
+        self.source = source
+
+
+def load_ground_truth(path=GROUND_TRUTH_PATH):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def photo_cases(images_dir=IMAGES_DIR, ground_truth=None):
+    """Cases for every image in ``images_dir``, sorted by name"""
+    if ground_truth is None:
+        ground_truth = load_ground_truth()
+    cases = []
+    for name in sorted(os.listdir(images_dir)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        with open(os.path.join(images_dir, name), 'rb') as f:
+            cases.append(Case(name, f.read(), ground_truth.get(name), source='photo'))
+    return cases
+
+
+def render_sticker(size, lines=SYNTHETIC_LINES, seed=0):
+    """
+    Render a white sticker with black text onto a grey, noisy background and
+    return it as JPEG bytes
+    """
+    width, height = size
+    rng = np.random.default_rng(seed)
+
+    # Textured background, like a box photographed under uneven light
+    background = rng.normal(150, 12, (height, width)).clip(0, 255).astype(np.uint8)
+    gradient = np.linspace(-25, 25, width, dtype=np.float32)[None, :]
+    background = (background + gradient).clip(0, 255).astype(np.uint8)
+    image = Image.fromarray(background).convert('RGB')
+
+    sticker_w, sticker_h = int(width * 0.55), int(height * 0.45)
+    left, top = int(width * 0.2), int(height * 0.28)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([left, top, left + sticker_w, top + sticker_h], fill=(245, 245, 240))
+
+    line_height = sticker_h // (len(lines) + 1)
+    font = ImageFont.load_default(size=max(8, int(line_height * 0.6)))
+    for i, line in enumerate(lines):
+        draw.text((left + line_height // 2, top + line_height // 2 + i * line_height), line,
+                  fill=(20, 20, 20), font=font)
+
+    # Slight defocus, as from a phone camera
+    image = image.filter(ImageFilter.GaussianBlur(radius=max(0.5, width / 2000)))
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def synthetic_cases(sizes=None):
+    """One rendered sticker per configured size"""
+    sizes = sizes or SYNTHETIC_SIZES
+    truth = '\n'.join(SYNTHETIC_LINES)
+    return [
+        Case(f'synthetic-{name}', render_sticker(size), truth, source='synthetic')
+        for name, size in sizes.items()
+    ]
+
+
+def load_corpus(include_photos=True, include_synthetic=True, only=None):
+    """Every benchmark case, optionally restricted to the ids in ``only``"""
+    cases = []
+    if include_photos:
+        cases.extend(photo_cases())
+    if include_synthetic:
+        cases.extend(synthetic_cases())
+    if only:
+        cases = [case for case in cases if case.case_id in only]
+    return cases
@@ -0,0 +1,701 @@
+"""
+OCR Load Test
+Samsung Electronics India - End-to-end throughput, tail latency and server memory under concurrent load
+
+Run from the ``jsscanner`` directory, without network access:
+
+    python -m benchmarks.load --server gunicorn --model open --rate 4 --duration 120
+
+A server is started on a free local port (Gunicorn with ``gunicorn.conf.py``,
+or the threaded Flask development server), or an already running one is
+used with ``--url``. Requests replay a weighted mix of endpoints and corpus
+images, either from ``--concurrency`` users sending back to back (closed
+loop) or at a target ``--rate`` of arrivals whatever the server's speed
+(open loop). Open-loop latency is measured from each request's scheduled
+start, so time spent waiting for a free client thread counts against the
+server instead of hiding behind it.
+
+The report has p50/p95/p99 latency, throughput and error rate per endpoint,
+and a once-per-second timeline of completions, errors and the resident
+memory of the server's process tree.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import queue
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.corpus import BENCHMARK_DIR, load_corpus
+from benchmarks.run import RESULTS_DIR, git_revision
+
+APP_DIR = os.path.dirname(BENCHMARK_DIR)
+
+SERVERS = ('gunicorn', 'flask')
+MODELS = ('closed', 'open')
+ARRIVALS = ('poisson', 'uniform')
+
+DEFAULT_MIX = '/ocr/opencv/upload:1,/ocr/pytesseract/upload:1'
+
+PERCENTILES = (50, 95, 99)
+
+# Development server entry point; threaded so requests overlap as under Gunicorn
+FLASK_SERVER = ('from app import create_app; '
+                'create_app().run(host="127.0.0.1", port={port}, threaded=True)')
+
+
+# ----------------------------------------------------------------------
+# Request mix
+# ----------------------------------------------------------------------
+class Endpoint:
+    """
+    One entry of the request mix. ``/upload`` endpoints get a multipart
+    ``file``; any other path gets the raw image body, with ``fields`` as
+    query parameters.
+    """
+
+    def __init__(self, path, weight=1.0):
+        self.path = path
+        self.weight = weight
+        self.multipart = path.rstrip('/').endswith('/upload')
+
+    def request(self, case, fields):
+        """``(url, body, headers)`` for sending ``case`` to this endpoint"""
+        if not self.multipart:
+            url = f'{self.path}?{urlencode(fields)}' if fields else self.path
+            return url, case.image_bytes, {'Content-Type': 'application/octet-stream'}
+
+        boundary = uuid.uuid4().hex
+        filename = case.case_id if '.' in case.case_id else f'{case.case_id}.jpg'
+        parts = []
+        for name, value in fields.items():
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+                     f'Content-Type: application/octet-stream\r\n\r\n'.encode())
+        parts.append(case.image_bytes)
+        parts.append(f'\r\n--{boundary}--\r\n'.encode())
+        return self.path, b''.join(parts), {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+
+def parse_mix(value):
+    """``PATH[:WEIGHT],...`` into endpoints"""
+    endpoints = []
+    for entry in value.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        path, _, weight = entry.partition(':')
+        if not path.startswith('/'):
+            path = f'/ocr/{path}'
+        weight = float(weight) if weight else 1.0
+        if weight <= 0:
+            raise ValueError(f"weight of '{path}' must be positive")
+        endpoints.append(Endpoint(path, weight))
+    if not endpoints:
+        raise ValueError('the request mix is empty')
+    return endpoints
+
+
+def parse_pairs(values):
+    """Repeated ``KEY=VALUE`` arguments into a dict"""
+    pairs = {}
+    for value in values or ():
+        key, separator, item = value.partition('=')
+        if not separator or not key:
+            raise ValueError(f"expected KEY=VALUE, got '{value}'")
+        pairs[key] = item
+    return pairs
+
+
+# ----------------------------------------------------------------------
+# Server
+# ----------------------------------------------------------------------
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def process_tree(pid):
+    """``pid`` and all of its descendants, from ``/proc``"""
+    children = defaultdict(list)
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat') as f:
+                # The command name may contain spaces; the fields after it do not
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children[ppid].append(int(name))
+
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending.extend(children.get(current, ()))
+    return tree
+
+
+def read_kb(path, field):
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def tree_memory(pid):
+    """
+    Resident memory of a process tree. ``rss_bytes`` counts pages shared
+    between forked workers once per worker; ``pss_bytes`` splits them.
+    """
+    rss = pss = 0
+    pids = process_tree(pid)
+    for member in pids:
+        rss += read_kb(f'/proc/{member}/status', 'VmRSS:') or 0
+        pss += read_kb(f'/proc/{member}/smaps_rollup', 'Pss:') or 0
+    return {'processes': len(pids), 'rss_bytes': rss, 'pss_bytes': pss or None}
+
+
+class Server:
+    """A locally started OCR server, stopped when the run ends"""
+
+    def __init__(self, kind, port, env, startup_timeout=120):
+        self.kind = kind
+        self.url = f'http://127.0.0.1:{port}'
+        self.log = tempfile.TemporaryFile(mode='w+')
+
+        server_env = dict(os.environ, **env)
+        if kind == 'gunicorn':
+            server_env['GUNICORN_BIND'] = f'127.0.0.1:{port}'
+            command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py']
+        else:
+            command = [sys.executable, '-c', FLASK_SERVER.format(port=port)]
+        self.process = subprocess.Popen(command, cwd=APP_DIR, env=server_env,
+                                        stdout=self.log, stderr=subprocess.STDOUT)
+        try:
+            self.wait_until_live(startup_timeout)
+        except Exception:
+            self.stop()
+            raise
+
+    def wait_until_live(self, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'{self.kind} exited with code {self.process.returncode}:\n{self.log_tail()}')
+            try:
+                if get_json(self.url, '/health/live')[0] == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f'{self.kind} did not answer /health/live within {timeout} s:\n{self.log_tail()}')
+
+    def log_tail(self, lines=20):
+        self.log.seek(0)
+        return ''.join(self.log.readlines()[-lines:])
+
+    def memory(self):
+        return tree_memory(self.process.pid)
+
+    def stop(self, timeout=30):
+        if self.process.poll() is None:
+            self.process.send_signal(signal.SIGTERM)
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.log.close()
+
+
+def get_json(url, path, timeout=5):
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        body = response.read()
+        try:
+            return response.status, json.loads(body)
+        except ValueError:
+            return response.status, None
+    finally:
+        connection.close()
+
+
+# ----------------------------------------------------------------------
+# Load generation
+# ----------------------------------------------------------------------
+class Recorder:
+    """Per-request samples of the measured window, and a per-second timeline"""
+
+    def __init__(self):
+        self.samples = []
+        self.timeline = defaultdict(lambda: {'completed': 0, 'errors': 0})
+        self.started = None
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, status, failed, latency, service, finished):
+        if self.started is None or finished < self.started:
+            # Warm-up request
+            return
+        error = failed or status is None or status >= 400
+        with self._lock:
+            self.samples.append((endpoint.path, status, failed, latency, service))
+            second = self.timeline[int(finished - self.started)]
+            second['completed'] += 1
+            second['errors'] += error
+
+
+def response_failed(content):
+    """
+    Whether a response body reports a failure despite its status:
+    ``success: false``, or an ``error`` field at the top level or in
+    ``ocr_results`` (the pipelines return 200 when Tesseract fails)
+    """
+    try:
+        payload = json.loads(content)
+    except ValueError:
+        return False
+    if not isinstance(payload, dict):
+        return False
+    if payload.get('success') is False or payload.get('error'):
+        return True
+    results = payload.get('ocr_results')
+    return isinstance(results, dict) and bool(results.get('error'))
+
+
+class Client:
+    """One keep-alive connection, reopened after a failed request"""
+
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port
+        self.timeout = timeout
+        self.connection = None
+
+    def send(self, url, body, headers):
+        """
+        ``(status, failed)``: the response status, or None when the request
+        failed without one, and whether the body reports a failure
+        """
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            self.connection.request('POST', url, body=body, headers=headers)
+            response = self.connection.getresponse()
+            content = response.read()
+            if response.will_close:
+                self.close()
+            return response.status, response_failed(content)
+        except (OSError, http.client.HTTPException):
+            self.close()
+            return None, True
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class LoadGenerator:
+    """Sends the request mix with a closed- or open-loop arrival model"""
+
+    def __init__(self, url, endpoints, cases, fields, recorder, seed=0, timeout=120):
+        self.url = url
+        self.endpoints = endpoints
+        self.cases = cases
+        self.fields = fields
+        self.recorder = recorder
+        self.timeout = timeout
+        self._random = random.Random(seed)
+        self._arrivals = random.Random(seed + 1)
+        self._random_lock = threading.Lock()
+        self._weights = [endpoint.weight for endpoint in endpoints]
+
+    def next_request(self):
+        with self._random_lock:
+            endpoint = self._random.choices(self.endpoints, self._weights)[0]
+            case = self._random.choice(self.cases)
+        return endpoint, endpoint.request(case, self.fields)
+
+    def send(self, client, scheduled=None):
+        endpoint, request = self.next_request()
+        started = time.perf_counter()
+        status, failed = client.send(*request)
+        finished = time.perf_counter()
+        latency = finished - (started if scheduled is None else scheduled)
+        self.recorder.add(endpoint, status, failed, latency, finished - started, finished)
+
+    def run_closed(self, users, until, think_time=0.0):
+        """``users`` threads, each sending its next request as soon as the last one returns"""
+        def user():
+            client = Client(self.url, self.timeout)
+            while time.perf_counter() < until:
+                self.send(client)
+                if think_time:
+                    time.sleep(think_time)
+            client.close()
+
+        threads = [threading.Thread(target=user, name='load-user', daemon=True) for _ in range(users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run_open(self, rate, until, concurrency, arrivals='poisson'):
+        """
+        Arrivals at ``rate`` per second, sent by up to ``concurrency`` client
+        threads. Returns how many arrivals found every thread busy, and how
+        many were still waiting at the deadline and never sent.
+        """
+        scheduled = queue.Queue()
+        counts = {'backlogged_arrivals': 0, 'dropped_arrivals': 0}
+
+        def sender():
+            client = Client(self.url, self.timeout)
+            while True:
+                at = scheduled.get()
+                if at is None:
+                    break
+                self.send(client, scheduled=at)
+            client.close()
+
+        threads = [threading.Thread(target=sender, name='load-sender', daemon=True) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+
+        at = time.perf_counter()
+        while True:
+            at += self._arrivals.expovariate(rate) if arrivals == 'poisson' else 1 / rate
+            if at >= until:
+                break
+            delay = at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            # Idle senders wait in get(), so a non-empty queue means every sender is busy
+            if scheduled.qsize():
+                counts['backlogged_arrivals'] += 1
+            scheduled.put(at)
+
+        # An overloaded server would otherwise keep the run going until the backlog drains
+        while True:
+            try:
+                scheduled.get_nowait()
+            except queue.Empty:
+                break
+            counts['dropped_arrivals'] += 1
+        for _ in threads:
+            scheduled.put(None)
+        for thread in threads:
+            thread.join()
+        return counts
+
+
+class MemorySampler:
+    """Samples the server's process tree memory once per interval in the background"""
+
+    def __init__(self, server, recorder, interval=1.0):
+        self.server = server
+        self.recorder = recorder
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='load-memory', daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            elapsed = time.perf_counter() - self.recorder.started
+            if elapsed >= 0:
+                self.samples.append(dict(self.server.memory(), t=round(elapsed, 1)))
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+# ----------------------------------------------------------------------
+# Report
+# ----------------------------------------------------------------------
+def percentile(ordered, p):
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, -(-p * len(ordered) // 100) - 1))]
+
+
+def latency_summary(values):
+    ordered = sorted(value * 1000 for value in values)
+    if not ordered:
+        return None
+    summary = {f'p{p}_ms': round(percentile(ordered, p), 1) for p in PERCENTILES}
+    summary['mean_ms'] = round(sum(ordered) / len(ordered), 1)
+    summary['max_ms'] = round(ordered[-1], 1)
+    return summary
+
+
+def summarise(samples, duration):
+    """
+    Throughput, error rate and latency percentiles of a set of samples.
+    Responses under 400 whose body reports a failure count as errors
+    (``body_errors``).
+    """
+    statuses = defaultdict(int)
+    succeeded = []
+    body_errors = 0
+    for sample in samples:
+        _, status, failed, _, _ = sample
+        statuses[str(status) if status is not None else 'failed'] += 1
+        if status is not None and status < 400:
+            if failed:
+                body_errors += 1
+            else:
+                succeeded.append(sample)
+    errors = len(samples) - len(succeeded)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'body_errors': body_errors,
+        'error_rate': round(errors / len(samples), 4) if samples else None,
+        'throughput_rps': round(len(succeeded) / duration, 3),
+        'statuses': dict(sorted(statuses.items())),
+        # Successful requests only; failures return early and would flatter the tail
+        'latency': latency_summary([sample[3] for sample in succeeded]),
+        'service': latency_summary([sample[4] for sample in succeeded])
+    }
+
+
+def memory_summary(samples):
+    if not samples:
+        return None
+    rss = [sample['rss_bytes'] for sample in samples]
+    return {
+        'start_rss_bytes': rss[0],
+        'end_rss_bytes': rss[-1],
+        'peak_rss_bytes': max(rss),
+        'growth_bytes': rss[-1] - rss[0]
+    }
+
+
+def build_timeline(recorder, memory_samples, duration):
+    memory_by_second = {}
+    for sample in memory_samples:
+        memory_by_second.setdefault(int(sample['t']), sample)
+    timeline = []
+    for second in range(int(duration + 0.999)):
+        entry = dict(t=second, **recorder.timeline.get(second, {'completed': 0, 'errors': 0}))
+        memory = memory_by_second.get(second)
+        if memory:
+            entry.update(rss_bytes=memory['rss_bytes'], pss_bytes=memory['pss_bytes'], processes=memory['processes'])
+        timeline.append(entry)
+    return timeline
+
+
+def check_limits(report, max_error_rate=None, max_p99_ms=None, min_throughput=None):
+    """Capacity targets the overall result misses"""
+    overall = report['overall']
+    failures = []
+    # Arrivals dropped at the deadline were never served
+    dropped = overall.get('dropped_arrivals', 0)
+    error_rate = (overall['errors'] + dropped) / max(overall['requests'] + dropped, 1)
+    if max_error_rate is not None and error_rate > max_error_rate:
+        failures.append(f"error rate {error_rate:.2%} (dropped arrivals included) above {max_error_rate:.2%}")
+    p99 = (overall['latency'] or {}).get('p99_ms')
+    if max_p99_ms is not None and (p99 is None or p99 > max_p99_ms):
+        failures.append(f'p99 latency {p99} ms above {max_p99_ms} ms')
+    if min_throughput is not None and overall['throughput_rps'] < min_throughput:
+        failures.append(f"throughput {overall['throughput_rps']} req/s below {min_throughput} req/s")
+    return failures
+
+
+def print_summary(report):
+    rows = [('overall', report['overall'])] + list(report['endpoints'].items())
+    for name, result in rows:
+        latency = result['latency'] or {}
+        print(f"{name:36} {result['requests']:6d} req  {result['throughput_rps']:7.2f} req/s  "
+              f"errors {result['error_rate'] or 0:6.2%}  "
+              f"p50 {latency.get('p50_ms', 0):8.1f}  p95 {latency.get('p95_ms', 0):8.1f}  "
+              f"p99 {latency.get('p99_ms', 0):8.1f} ms")
+    if report['overall'].get('dropped_arrivals'):
+        print(f"{report['overall']['dropped_arrivals']} arrivals were still waiting at the deadline and were not sent")
+    memory = report['server_memory']
+    if memory:
+        print(f"server RSS {memory['start_rss_bytes'] / 1e6:.1f} -> {memory['end_rss_bytes'] / 1e6:.1f} MB "
+              f"(peak {memory['peak_rss_bytes'] / 1e6:.1f} MB)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the OCR service with a mix of endpoints and images')
+    parser.add_argument('--server', choices=SERVERS, default='gunicorn',
+                        help='server to start locally (default: gunicorn)')
+    parser.add_argument('--url', help='test an already running server instead of starting one')
+    parser.add_argument('--env', action='append', metavar='KEY=VALUE',
+                        help='environment of the started server, e.g. OCR_EXECUTION_BACKEND=process (repeatable)')
+    parser.add_argument('--cache', action='store_true',
+                        help='keep the OCR result cache on (repeated images would otherwise be served from it)')
+    parser.add_argument('--mix', default=DEFAULT_MIX,
+                        help=f'weighted endpoints, PATH[:WEIGHT],... (default: {DEFAULT_MIX})')
+    parser.add_argument('--field', action='append', metavar='NAME=VALUE',
+                        help='form field (query parameter for raw bodies) sent with every request (repeatable)')
+    parser.add_argument('--model', choices=MODELS, default='closed', help='arrival model (default: closed)')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='closed loop: concurrent users; open loop: client threads (default: 4)')
+    parser.add_argument('--rate', type=float, default=2.0, help='open loop: arrivals per second (default: 2)')
+    parser.add_argument('--arrivals', choices=ARRIVALS, default='poisson', help='open loop arrival process')
+    parser.add_argument('--think-time', type=float, default=0.0, help='closed loop: seconds between requests')
+    parser.add_argument('--duration', type=float, default=60.0, help='measured seconds (default: 60)')
+    parser.add_argument('--warmup', type=float, default=10.0, help='unmeasured seconds of load first (default: 10)')
+    parser.add_argument('--timeout', type=float, default=120.0, help='per-request timeout in seconds')
+    parser.add_argument('--startup-timeout', type=float, default=120.0, help='seconds to wait for the server')
+    parser.add_argument('--only', action='append', help='use only this corpus image (repeatable)')
+    parser.add_argument('--no-photos', action='store_true', help='skip the sample photos')
+    parser.add_argument('--no-synthetic', action='store_true', help='skip the rendered stickers')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the request mix and arrivals')
+    parser.add_argument('--ignore-readiness', action='store_true',
+                        help='run even when /health/ready does not answer 200')
+    parser.add_argument('--output', help='JSON report path (default: benchmarks/results/load-<timestamp>.json)')
+    parser.add_argument('--max-error-rate', type=float, help='exit 1 when the error rate is above this (0-1)')
+    parser.add_argument('--max-p99-ms', type=float, help='exit 1 when p99 latency is above this')
+    parser.add_argument('--min-throughput', type=float, help='exit 1 when throughput (req/s) is below this')
+    args = parser.parse_args(argv)
+
+    try:
+        endpoints = parse_mix(args.mix)
+        fields = parse_pairs(args.field)
+        server_env = parse_pairs(args.env)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.concurrency < 1 or args.duration <= 0 or (args.model == 'open' and args.rate <= 0):
+        parser.error('--concurrency, --duration and --rate must be positive')
+
+    cases = load_corpus(not args.no_photos, not args.no_synthetic, args.only)
+    if not cases:
+        parser.error('no images selected')
+
+    server = None
+    if args.url:
+        url = args.url.rstrip('/')
+    else:
+        if not args.cache:
+            server_env.setdefault('OCR_CACHE_ENABLED', '0')
+        print(f'Starting {args.server} ...', file=sys.stderr)
+        try:
+            server = Server(args.server, free_port(), server_env, args.startup_timeout)
+        except RuntimeError as e:
+            parser.error(str(e))
+        url = server.url
+
+    try:
+        readiness = get_json(url, '/health/ready')
+    except OSError as e:
+        if server is not None:
+            server.stop()
+        parser.error(f'{url} is not reachable: {e}')
+    if readiness[0] != 200:
+        # A server that is not ready fails every request and measures nothing
+        if not args.ignore_readiness:
+            if server is not None:
+                server.stop()
+            parser.error(f'{url}/health/ready answered {readiness[0]} (use --ignore-readiness to run anyway)')
+        print(f'Warning: {url}/health/ready answered {readiness[0]}', file=sys.stderr)
+
+    recorder = Recorder()
+    generator = LoadGenerator(url, endpoints, cases, fields, recorder, args.seed, args.timeout)
+    sampler = MemorySampler(server, recorder) if server is not None else None
+
+    recorder.started = time.perf_counter() + args.warmup
+    if sampler is not None:
+        sampler.start()
+    until = recorder.started + args.duration
+    print(f'Load: {args.model} loop, {args.warmup:g} s warm-up + {args.duration:g} s measured against {url}',
+          file=sys.stderr)
+    arrival_counts = {}
+    try:
+        if args.model == 'closed':
+            generator.run_closed(args.concurrency, until, args.think_time)
+        else:
+            arrival_counts = generator.run_open(args.rate, until, args.concurrency, args.arrivals)
+    finally:
+        # Requests still in flight at the deadline are measured, so the window ends when they finish
+        measured = max(time.perf_counter() - recorder.started, 1e-6)
+        if sampler is not None:
+            sampler.stop()
+        if server is not None:
+            server.stop()
+
+    by_endpoint = defaultdict(list)
+    for sample in recorder.samples:
+        by_endpoint[sample[0]].append(sample)
+    memory_samples = sampler.samples if sampler is not None else []
+
+    report = {
+        'environment': {
+            'timestamp': datetime.now().isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'server': args.server if server is not None else 'external',
+            'server_env': server_env,
+            'url': url
+        },
+        'settings': {
+            'model': args.model,
+            'concurrency': args.concurrency,
+            'rate': args.rate if args.model == 'open' else None,
+            'arrivals': args.arrivals if args.model == 'open' else None,
+            'think_time': args.think_time if args.model == 'closed' else None,
+            'warmup_seconds': args.warmup,
+            'duration_seconds': round(measured, 3),
+            'mix': {endpoint.path: endpoint.weight for endpoint in endpoints},
+            'fields': fields,
+            'images': [case.case_id for case in cases],
+            'seed': args.seed
+        },
+        'overall': summarise(recorder.samples, measured),
+        'endpoints': {path: summarise(samples, measured) for path, samples in sorted(by_endpoint.items())},
+        'server_memory': memory_summary(memory_samples),
+        'timeline': build_timeline(recorder, memory_samples, measured)
+    }
+    report['overall'].update(arrival_counts)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print_summary(report)
+    print(f"Report written to {output}")
+
+    failures = check_limits(report, args.max_error_rate, args.max_p99_ms, args.min_throughput)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,341 @@
+"""
+OCR Benchmark Runner
+Samsung Electronics India - Per-stage latency, peak memory and accuracy of the OCR pipelines
+
+Run from the ``jsscanner`` directory, without network access:
+
+    python -m benchmarks.run --repeat 5 --output benchmarks/results/baseline.json
+
+Every case is run once to warm up, then ``--repeat`` times with per-stage
+timers, then once more under ``tracemalloc`` for peak memory (Python and NumPy
+heap, which includes OpenCV output arrays; Pillow's own image buffers are
+not traced, so the process peak RSS is reported as well). Stage timings
+nest: ``*.extract`` covers the whole pipeline after decode and includes
+its ``*.tesseract.psmN`` calls.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+import cv2
+import numpy as np
+import PIL
+
+from benchmarks.corpus import BENCHMARK_DIR, load_corpus
+
+PIPELINES = ('pytesseract', 'opencv', 'opencv_regions')
+
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, 'results')
+
+
+class StageRecorder:
+    """Accumulates wall time per named stage, one sample per run"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.calls = defaultdict(list)
+        self.pipeline = None
+        self._run = defaultdict(float)
+        self._run_calls = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name, seconds):
+        # Region OCR calls Tesseract from several threads at once
+        with self._lock:
+            self._run[name] += seconds
+            self._run_calls[name] += 1
+
+    def end_run(self):
+        for name, seconds in self._run.items():
+            self.samples[name].append(seconds * 1000)
+            self.calls[name].append(self._run_calls[name])
+        self._run.clear()
+        self._run_calls.clear()
+
+    def discard_run(self):
+        self._run.clear()
+        self._run_calls.clear()
+
+    def summary(self):
+        return {
+            name: {
+                'median_ms': round(statistics.median(samples), 3),
+                'min_ms': round(min(samples), 3),
+                'max_ms': round(max(samples), 3),
+                'calls_per_run': max(self.calls[name]),
+                'runs': len(samples)
+            }
+            for name, samples in sorted(self.samples.items())
+        }
+
+
+class TesseractTimer:
+    """
+    Times every Tesseract call made through an engine pool as
+    ``<pipeline>.tesseract.psm<N>`` on the current ``recorder``
+    """
+
+    def __init__(self, engine_pool):
+        from blueprints.ocr.engine_pool import parse_tesseract_config
+
+        self.engine_pool = engine_pool
+        self.recorder = None
+        for method in ('image_to_string', 'image_to_data'):
+            original = getattr(engine_pool, method)
+
+            def timed(image, config=None, _original=original):
+                started = time.perf_counter()
+                try:
+                    return _original(image, config)
+                finally:
+                    if self.recorder is not None:
+                        psm = parse_tesseract_config(config)['psm']
+                        self.recorder.add(f"{self.recorder.pipeline}.tesseract.psm{psm}",
+                                          time.perf_counter() - started)
+
+            # Instance attributes shadow the methods, so recognize() is timed too
+            setattr(engine_pool, method, timed)
+
+
+# ----------------------------------------------------------------------
+# Accuracy
+# ----------------------------------------------------------------------
+def normalise_text(text):
+    """Collapse whitespace so layout differences are not scored"""
+    return ' '.join((text or '').split())
+
+
+def levenshtein(a, b):
+    """Edit distance between two strings"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def accuracy(ground_truth, text):
+    """Character error rate and word recall of ``text`` against ``ground_truth``"""
+    truth = normalise_text(ground_truth)
+    found = normalise_text(text)
+    truth_words = truth.split()
+    found_words = defaultdict(int)
+    for word in found.split():
+        found_words[word] += 1
+    recalled = 0
+    for word in truth_words:
+        if found_words[word] > 0:
+            found_words[word] -= 1
+            recalled += 1
+    return {
+        'cer': round(levenshtein(truth, found) / max(len(truth), 1), 4),
+        'word_recall': round(recalled / max(len(truth_words), 1), 4)
+    }
+
+
+# ----------------------------------------------------------------------
+# Pipelines
+# ----------------------------------------------------------------------
+def run_pipeline(app, pipeline, image_bytes, recorder):
+    """Run one pipeline on ``image_bytes`` and return its extracted text"""
+    from blueprints.ocr import opencv_bp as opencv_ocr
+    from blueprints.ocr import pytesseract_bp as pytesseract_ocr
+    from blueprints.ocr.deskew import deskew_image
+    from blueprints.ocr.image_decode import decode_image_bytes
+    from blueprints.ocr.region_ocr import plan_regions
+
+    recorder.pipeline = pipeline
+    with recorder.stage(f'{pipeline}.decode'):
+        image = decode_image_bytes(image_bytes)
+
+    if pipeline == 'pytesseract':
+        with recorder.stage('pytesseract.extract'):
+            with recorder.stage('pytesseract.preprocess'):
+                processed = pytesseract_ocr.preprocess_image_for_ocr(image)
+            if app.config.get('OCR_DESKEW', True):
+                with recorder.stage('pytesseract.deskew'):
+                    processed = deskew_image(processed)[0]
+            results = pytesseract_ocr.extract_text_pytesseract(processed)
+        text = results.get('basic_text', '')
+    else:
+        if pipeline == 'opencv':
+            # Each preprocessing stage on its own; stages are listed after their inputs
+            with recorder.stage('opencv.grayscale'):
+                graph = opencv_ocr.StageGraph(opencv_ocr.to_grayscale_array(image))
+            for stage in opencv_ocr.PREPROCESSING_STAGES:
+                with recorder.stage(f'opencv.{stage}'):
+                    graph.get(stage)
+            best = graph.get('best_processed')
+            with recorder.stage('opencv.detect_text_regions'):
+                opencv_ocr.detect_text_regions(best)
+            with recorder.stage('opencv.plan_regions'):
+                plan_regions(best)
+
+        mode = 'regions' if pipeline == 'opencv_regions' else 'full'
+        with recorder.stage(f'{pipeline}.extract'):
+            results = opencv_ocr.extract_text_opencv(image, mode=mode)
+        text = results.get('extracted_text', '')
+
+    with recorder.stage(f'{pipeline}.encode'):
+        app.json.dumps(results)
+    return text
+
+
+def peak_memory(app, pipeline, image_bytes):
+    """Peak Python/NumPy heap allocation in bytes for one pipeline run"""
+    recorder = StageRecorder()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        run_pipeline(app, pipeline, image_bytes, recorder)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(app, timer, case, pipelines, repeat, measure_memory=True):
+    result = {'source': case.source, 'bytes': len(case.image_bytes), 'pipelines': {}}
+    for pipeline in pipelines:
+        recorder = StageRecorder()
+        timer.recorder = recorder
+
+        # Warm-up run: engines, lazy imports and allocator pools
+        run_pipeline(app, pipeline, case.image_bytes, recorder)
+        recorder.discard_run()
+
+        text = ''
+        for _ in range(repeat):
+            text = run_pipeline(app, pipeline, case.image_bytes, recorder)
+            recorder.end_run()
+
+        pipeline_result = {'stages': recorder.summary()}
+        if measure_memory:
+            timer.recorder = None
+            pipeline_result['peak_memory_bytes'] = peak_memory(app, pipeline, case.image_bytes)
+        if case.ground_truth is not None:
+            pipeline_result['accuracy'] = accuracy(case.ground_truth, text)
+        result['pipelines'][pipeline] = pipeline_result
+    return result
+
+
+# ----------------------------------------------------------------------
+# Report
+# ----------------------------------------------------------------------
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=BENCHMARK_DIR, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment(app, engine_pool, repeat):
+    from blueprints.ocr.image_decode import decode_settings
+
+    try:
+        import pytesseract
+        tesseract_version = str(pytesseract.get_tesseract_version())
+    except Exception:
+        tesseract_version = None
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'pillow': PIL.__version__,
+        'tesseract': tesseract_version,
+        'engine_pool': engine_pool.stats()['backend'],
+        'decode': decode_settings(app.config),
+        'repeat': repeat
+    }
+
+
+def print_summary(report):
+    for case_id, case in report['cases'].items():
+        for pipeline, result in case['pipelines'].items():
+            total = result['stages'].get(f'{pipeline}.extract', {}).get('median_ms')
+            decode = result['stages'].get(f'{pipeline}.decode', {}).get('median_ms')
+            line = f"{case_id:28} {pipeline:15} decode {decode:8.1f} ms  extract {total:9.1f} ms"
+            if 'peak_memory_bytes' in result:
+                line += f"  peak {result['peak_memory_bytes'] / 1e6:7.1f} MB"
+            if 'accuracy' in result:
+                line += f"  cer {result['accuracy']['cer']:.3f}  recall {result['accuracy']['word_recall']:.3f}"
+            print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the OCR pipelines over the images corpus')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per case and pipeline')
+    parser.add_argument('--output', help='JSON report path (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--pipelines', default=','.join(PIPELINES),
+                        help=f"comma separated subset of {', '.join(PIPELINES)}")
+    parser.add_argument('--only', action='append', help='run only this case id (repeatable)')
+    parser.add_argument('--no-photos', action='store_true', help='skip the sample photos')
+    parser.add_argument('--no-synthetic', action='store_true', help='skip the rendered stickers')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    args = parser.parse_args(argv)
+
+    pipelines = [p.strip() for p in args.pipelines.split(',') if p.strip()]
+    unknown = [p for p in pipelines if p not in PIPELINES]
+    if unknown:
+        parser.error(f"unknown pipelines: {', '.join(unknown)}")
+
+    from app import create_app
+    from blueprints.ocr.engine_pool import get_engine_pool
+
+    cases = load_corpus(not args.no_photos, not args.no_synthetic, args.only)
+    if not cases:
+        parser.error('no benchmark cases selected')
+
+    # Results must reflect the pipeline, not the result cache
+    app = create_app({'OCR_CACHE_ENABLED': False})
+    report = {'cases': {}}
+    with app.app_context():
+        engine_pool = get_engine_pool(app.config.get('OCR_ENGINE_POOL_SIZE'))
+        timer = TesseractTimer(engine_pool)
+        report['environment'] = environment(app, engine_pool, args.repeat)
+        for case in cases:
+            report['cases'][case.case_id] = run_case(app, timer, case, pipelines, args.repeat, not args.no_memory)
+        # ru_maxrss is in kilobytes on Linux
+        report['environment']['max_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print_summary(report)
+    print(f"Report written to {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+# Barcode Blueprints
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+Flask Blueprint for Server-side Barcode Decoding
+Samsung Electronics India - Decode sticker barcodes without the browser scanners
+
+Uploads are decoded once at up to ``BARCODE_MAX_DIMENSION`` (barcodes need
+more pixels per module than text needs per glyph) and scanned tier by tier,
+stopping early on an Indian EAN-13 unless ``exhaustive`` is set.
+"""
+
+import base64
+from datetime import datetime
+from flask import Blueprint, request, jsonify, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+
+from blueprints.barcode.decoder import DECODABLE_FORMATS, FORMATS, decode_barcodes, parse_formats
+from blueprints.ocr import metrics
+from blueprints.ocr.batch import batch_content_length, batch_options, iter_batch_inputs, iter_batch_results, ndjson_response
+from blueprints.ocr.image_decode import decode_image
+from blueprints.ocr.lazy import lazy_import
+from blueprints.ocr.result_cache import cached_ocr
+
+np = lazy_import('numpy')
+cv2 = lazy_import('cv2')
+
+# Create blueprint
+barcode_bp = Blueprint('barcode', __name__, url_prefix='/barcode')
+metrics.instrument_blueprint(barcode_bp)
+
+# Configure allowed file extensions
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'webp'}
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def parse_flag(value):
+    return str(value).lower() in ('1', 'true', 'yes')
+
+def parse_options(options):
+    """``(formats, exhaustive)`` from request options"""
+    return parse_formats(options.get('formats')), parse_flag(options.get('exhaustive', False))
+
+def decode_upload(image_bytes):
+    """Decode an upload at the barcode resolution (no text height scaling)"""
+    return decode_image(image_bytes, current_app.config.get('BARCODE_MAX_DIMENSION') or None)
+
+def process_image_bytes(image_bytes, options=None):
+    """
+    Decode barcodes in an encoded image through the result cache.
+    Returns ``(entry, cache_status)``.
+    """
+    formats, exhaustive = parse_options(options or {})
+
+    def process(image):
+        try:
+            barcode_results = decode_barcodes(np.asarray(image.convert('L')), formats, exhaustive)
+        except Exception as e:
+            current_app.logger.error(f"Barcode decode error: {str(e)}")
+            barcode_results = {'error': str(e)}
+        return {'barcode_results': barcode_results}
+
+    fingerprint = (f"max={current_app.config.get('BARCODE_MAX_DIMENSION')}|formats={','.join(formats)}"
+                   f"|exhaustive={exhaustive}")
+    return cached_ocr(
+        current_app.config, image_bytes, 'barcode', fingerprint,
+        decode_upload, process, results_key='barcode_results'
+    )
+
+@barcode_bp.route('/decode', methods=['POST'])
+def decode():
+    """Decode barcodes from an uploaded file or a base64 encoded image"""
+    try:
+        filename = None
+        if request.is_json:
+            data = request.get_json(silent=True) or {}
+            if 'image' not in data:
+                return jsonify({'error': 'No image data provided'}), 400
+
+            image_data = data['image']
+            if image_data.startswith('data:image'):
+                image_data = image_data.split(',')[1]
+            image_bytes = base64.b64decode(image_data)
+            options = data
+        else:
+            if 'file' not in request.files:
+                return jsonify({'error': 'No file uploaded'}), 400
+
+            file = request.files['file']
+            if file.filename == '':
+                return jsonify({'error': 'No file selected'}), 400
+
+            if not allowed_file(file.filename):
+                return jsonify({'error': 'Invalid file type. Allowed: PNG, JPG, JPEG, GIF, BMP, TIFF, WEBP'}), 400
+
+            filename = secure_filename(file.filename)
+            image_bytes = file.read()
+            options = request.form.to_dict()
+
+        entry, cache_status = process_image_bytes(image_bytes, options)
+
+        response_data = {
+            'success': 'error' not in entry['barcode_results'],
+            'timestamp': datetime.now().isoformat(),
+            'barcode_results': entry['barcode_results'],
+            'cache': cache_status
+        }
+        if filename:
+            response_data['filename'] = filename
+
+        with metrics.stage('barcode', 'encode'):
+            return jsonify(response_data)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Barcode decode error: {str(e)}")
+        return jsonify({'error': f'Processing failed: {str(e)}'}), 500
+
+@barcode_bp.route('/batch', methods=['POST'])
+def batch_decode():
+    """Decode barcodes in many images, streaming one NDJSON line per image"""
+    try:
+        request.max_content_length = batch_content_length(request, current_app.config)
+        if not request.is_json and not request.files:
+            return jsonify({'error': 'No files uploaded'}), 400
+
+        options = batch_options(request)
+        parse_options(options)
+
+        results = iter_batch_results(
+            iter_batch_inputs(request, allowed_file),
+            lambda image_bytes: process_image_bytes(image_bytes, options),
+            results_key='barcode_results'
+        )
+        return ndjson_response(results)
+
+    except RequestEntityTooLarge:
+        limit = request.max_content_length
+        return jsonify({'error': f'Batch larger than {limit // (1024 * 1024)}MB'}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Barcode batch error: {str(e)}")
+        return jsonify({'error': f'Processing failed: {str(e)}'}), 500
+
+@barcode_bp.route('/formats')
+def get_formats():
+    """Format priorities and which formats the server decodes"""
+    return jsonify({
+        'formats': {
+            name: dict(priority, decodable=name in DECODABLE_FORMATS)
+            for name, priority in FORMATS.items()
+        },
+        'default_formats': list(DECODABLE_FORMATS),
+        'early_exit': 'EAN-13 with the Indian 890 prefix (disable with exhaustive=1)',
+        'opencv_version': cv2.__version__,
+        'max_dimension': current_app.config.get('BARCODE_MAX_DIMENSION'),
+        'timestamp': datetime.now().isoformat()
+    })
@@ -0,0 +1,226 @@
+"""
+Code-128 Scanline Decoder
+Samsung Electronics India - Decode Code-128 from barcode regions found by OpenCV
+
+OpenCV's barcode module localises every 1D barcode but only decodes the
+EAN/UPC family. This decoder reads Code-128 from those regions: the region
+is rectified, a few scanlines are binarised and run-length encoded, and
+each group of six runs is matched against the Code-128 symbol table.
+Symbols are compared by their edge-to-similar-edge distances (bar plus
+following space), which do not change when ink spread or blur makes every
+bar wider than its space. Start, stop and checksum are verified before a
+value is returned.
+"""
+
+from functools import lru_cache
+
+from blueprints.ocr.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# Bar/space widths in modules for symbol values 0-105 (106 is STOP, 7 elements)
+PATTERNS = (
+    '212222', '222122', '222221', '121223', '121322', '131222', '122213', '122312', '132212', '221213',
+    '221312', '231212', '112232', '122132', '122231', '113222', '123122', '123221', '223211', '221132',
+    '221231', '213212', '223112', '312131', '311222', '321122', '321221', '312212', '322112', '322211',
+    '212123', '212321', '232121', '111323', '131123', '131321', '112313', '132113', '132311', '211313',
+    '231113', '231311', '112133', '112331', '132131', '113123', '113321', '133121', '313121', '211331',
+    '231131', '213113', '213311', '213131', '311123', '311321', '331121', '312113', '312311', '332111',
+    '314111', '221411', '431111', '111224', '111422', '121124', '121421', '141122', '141221', '112214',
+    '112412', '122114', '122411', '142112', '142211', '241211', '221114', '413111', '241112', '134111',
+    '111242', '121142', '121241', '114212', '124112', '124211', '411212', '421112', '421211', '212141',
+    '214121', '412121', '111143', '111341', '131141', '114113', '114311', '411113', '411311', '113141',
+    '114131', '311141', '411131', '211412', '211214', '211232'
+)
+STOP_PATTERN = (2, 3, 3, 1, 1, 1, 2)
+
+
+def edge_distances(widths):
+    """Distances between the leading (and trailing) edges of neighbouring runs"""
+    return widths[..., :-2] + widths[..., 1:-1]
+
+
+@lru_cache(maxsize=None)
+def edge_tables():
+    """
+    Edge vectors of every symbol and of the stop pattern, built on first
+    use. Every symbol has a distinct edge vector, so edges alone identify it.
+    """
+    symbols = np.array([[int(c) for c in pattern] for pattern in PATTERNS], dtype=np.float32)
+    return edge_distances(symbols), edge_distances(np.array(STOP_PATTERN, dtype=np.float32))
+
+START_A, START_B, START_C = 103, 104, 105
+CODE_C, CODE_B, CODE_A = 99, 100, 101
+SHIFT, FNC1 = 98, 102
+
+# Largest summed module error accepted when matching a symbol
+MATCH_TOLERANCE = 1.6
+
+# Scanlines per orientation, as fractions of the strip height
+SCANLINE_ROWS = (0.5, 0.35, 0.65, 0.2, 0.8)
+
+# Scale regions to at least this width so one module spans a couple of pixels
+MIN_STRIP_WIDTH = 480
+
+# Extend regions along the bars' long axis by this fraction of their length, per side
+REGION_EXTEND = 0.75
+
+
+def match_symbol(widths):
+    """Closest symbol value for six run widths, or None"""
+    edges = edge_distances(widths) * (11.0 / widths.sum())
+    symbol_edges, _ = edge_tables()
+    distances = np.abs(symbol_edges - edges).sum(axis=1)
+    value = int(np.argmin(distances))
+    return value if distances[value] <= MATCH_TOLERANCE else None
+
+
+def is_stop(widths):
+    edges = edge_distances(widths) * (13.0 / widths.sum())
+    _, stop_edges = edge_tables()
+    return np.abs(stop_edges - edges).sum() <= MATCH_TOLERANCE
+
+
+def decode_values(values):
+    """
+    Text for a list of symbol values (start code first, checksum and stop
+    removed). Returns ``(text, gs1)``.
+    """
+    code_set = {START_A: 'A', START_B: 'B', START_C: 'C'}[values[0]]
+    text = []
+    gs1 = False
+    shift = False
+    for position, value in enumerate(values[1:]):
+        current = code_set
+        if shift:
+            current = 'B' if code_set == 'A' else 'A'
+            shift = False
+
+        if value == FNC1:
+            if position == 0:
+                gs1 = True
+            else:
+                text.append('\x1d')  # GS1 group separator
+        elif current == 'C':
+            if value < 100:
+                text.append(f'{value:02d}')
+            elif value == CODE_B:
+                code_set = 'B'
+            elif value == CODE_A:
+                code_set = 'A'
+        elif value < 96:
+            if current == 'A':
+                text.append(chr(value + 32) if value < 64 else chr(value - 64))
+            else:
+                text.append(chr(value + 32))
+        elif value == SHIFT:
+            shift = True
+        elif value == CODE_C:
+            code_set = 'C'
+        elif value == CODE_B and current == 'A':
+            code_set = 'B'
+        elif value == CODE_A and current == 'B':
+            code_set = 'A'
+        # FNC2/FNC3/FNC4 carry no text
+    return ''.join(text), gs1
+
+
+def decode_runs(runs):
+    """
+    Find a Code-128 symbol in ``runs`` (widths of alternating dark/light
+    runs, starting with dark). Returns ``(text, gs1)`` or None.
+    """
+    runs = np.asarray(runs, dtype=np.float32)
+    # Shortest symbol: start, one data symbol, checksum, stop
+    for start in range(0, len(runs) - 25 + 1, 2):
+        value = match_symbol(runs[start:start + 6])
+        if value not in (START_A, START_B, START_C):
+            continue
+        # A start code needs a light quiet zone before it
+        module = runs[start:start + 6].sum() / 11.0
+        if start > 0 and runs[start - 1] < 3 * module:
+            continue
+
+        values = [value]
+        position = start + 6
+        while position + 7 <= len(runs):
+            if is_stop(runs[position:position + 7]):
+                break
+            symbol = match_symbol(runs[position:position + 6])
+            if symbol is None:
+                values = None
+                break
+            values.append(symbol)
+            position += 6
+        else:
+            values = None
+
+        if not values or len(values) < 3:
+            continue
+        checksum = (values[0] + sum(i * v for i, v in enumerate(values[1:-1], 1))) % 103
+        if checksum != values[-1]:
+            continue
+        return decode_values(values[:-1])
+    return None
+
+
+def scanline_runs(row):
+    """Run widths of a binarised scanline (True is dark), starting at the first dark run"""
+    changes = np.flatnonzero(np.diff(row.astype(np.int8))) + 1
+    bounds = np.concatenate(([0], changes, [len(row)]))
+    widths = np.diff(bounds)
+    if len(widths) and not row[0]:
+        widths = widths[1:]
+    return widths
+
+
+def rectify_region(gray, points, extend=REGION_EXTEND, margin=0.15):
+    """
+    Upright strip of ``gray`` for a barcode region (four corner points).
+    The long side of the region is horizontal and is extended by ``extend``
+    times its length on both sides, because OpenCV often localises only part
+    of a long Code-128 symbol; the decoder finds the start code and quiet
+    zone itself. The short side is widened by ``margin``.
+    """
+    (cx, cy), (w, h), angle = cv2.minAreaRect(np.asarray(points, dtype=np.float32))
+    if w < h:
+        w, h = h, w
+        angle += 90
+    scale = max(1.0, MIN_STRIP_WIDTH / max(w, 1.0))
+    w, h = w * (1 + 2 * extend), h * (1 + margin)
+    out_w, out_h = int(round(w * scale)), max(8, int(round(h * scale)))
+
+    rotation = cv2.getRotationMatrix2D((cx, cy), angle, scale)
+    rotation[0, 2] += out_w / 2 - cx
+    rotation[1, 2] += out_h / 2 - cy
+    return cv2.warpAffine(gray, rotation, (out_w, out_h), flags=cv2.INTER_CUBIC,
+                          borderMode=cv2.BORDER_REPLICATE)
+
+
+def decode_strip(strip):
+    """Try a few scanlines of an upright strip in both directions"""
+    threshold, _ = cv2.threshold(strip, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    height = strip.shape[0]
+    for fraction in SCANLINE_ROWS:
+        y = min(height - 2, max(1, int(height * fraction)))
+        # Average three rows to smooth sensor noise
+        row = strip[y - 1:y + 2].mean(axis=0) < threshold
+        for candidate in (row, row[::-1]):
+            decoded = decode_runs(scanline_runs(candidate))
+            if decoded is not None:
+                return decoded
+    return None
+
+
+def decode_region(gray, points):
+    """
+    Decode a Code-128 barcode in the region ``points`` of ``gray``.
+    Returns ``(text, gs1)`` or None.
+    """
+    strip = rectify_region(gray, points)
+    decoded = decode_strip(strip)
+    if decoded is None:
+        # Short codes can be taller than they are wide
+        decoded = decode_strip(cv2.rotate(strip, cv2.ROTATE_90_CLOCKWISE))
+    return decoded
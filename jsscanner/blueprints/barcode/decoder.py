@@ -0,0 +1,200 @@
+"""
+Tiered Barcode Decoder
+Samsung Electronics India - Server-side decoding with the scanner templates' format priorities
+
+Formats are tried tier by tier, in the same order the browser scanners
+rank them (``PRIORITY_FORMATS`` in ``order.html``). OpenCV localises every
+1D barcode in one pass and decodes the EAN/UPC family; Code-128 is read
+from the remaining regions by the scanline decoder in ``code128``; QR codes
+are Tier 2. Once an Indian EAN-13 (890 prefix) has been found the lower
+tiers are skipped unless the caller asks for an exhaustive scan.
+"""
+
+import re
+import threading
+
+from blueprints.barcode import code128
+from blueprints.ocr import metrics
+from blueprints.ocr.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# Priority table shared with the browser scanners (order.html PRIORITY_FORMATS)
+FORMATS = {
+    'CODE_128': {'tier': 1, 'name': 'Code-128', 'priority': 'HIGHEST', 'order': 1},
+    'EAN_13': {'tier': 1, 'name': 'EAN-13', 'priority': 'HIGH', 'order': 2},
+    'QR_CODE': {'tier': 2, 'name': 'QR Code', 'priority': 'MEDIUM', 'order': 3},
+    'CODE_39': {'tier': 2, 'name': 'Code 39', 'priority': 'MEDIUM', 'order': 4},
+    'ITF': {'tier': 2, 'name': 'ITF-14', 'priority': 'MEDIUM', 'order': 5},
+    'UPC_A': {'tier': 3, 'name': 'UPC-A', 'priority': 'LOW', 'order': 6},
+    'UPC_E': {'tier': 3, 'name': 'UPC-E', 'priority': 'LOW', 'order': 7},
+    'EAN_8': {'tier': 3, 'name': 'EAN-8', 'priority': 'LOW', 'order': 8},
+    'CODABAR': {'tier': 3, 'name': 'Codabar', 'priority': 'LOW', 'order': 9}
+}
+
+# Formats the server can decode; the others are only reported as localised regions
+LINEAR_FORMATS = ('EAN_13', 'UPC_A', 'UPC_E', 'EAN_8')
+DECODABLE_FORMATS = ('CODE_128',) + LINEAR_FORMATS + ('QR_CODE',)
+
+# Samsung-specific validation patterns (order.html VALIDATION_PATTERNS)
+EAN13_INDIA = re.compile(r'^890\d{10}$')
+SAMSUNG_PREFIX = re.compile(r'^(880902|880903|880904)')
+
+_local = threading.local()
+
+
+def get_detectors():
+    """Per-thread OpenCV detectors; detector objects are not thread safe"""
+    detectors = getattr(_local, 'detectors', None)
+    if detectors is None:
+        detectors = _local.detectors = (cv2.barcode.BarcodeDetector(), cv2.QRCodeDetector())
+    return detectors
+
+
+def parse_formats(value):
+    """Parse the ``formats`` request parameter (list or comma separated string)"""
+    if not value:
+        return DECODABLE_FORMATS
+    names = value if isinstance(value, (list, tuple)) else str(value).split(',')
+    formats = tuple(name.strip().upper() for name in names if name.strip())
+    unknown = [name for name in formats if name not in DECODABLE_FORMATS]
+    if unknown:
+        raise ValueError(f"Unsupported formats: {', '.join(unknown)}. Allowed: {', '.join(DECODABLE_FORMATS)}")
+    return formats
+
+
+def ean_checksum_valid(code):
+    """GTIN check digit for EAN-8, UPC-A and EAN-13 codes"""
+    if not code.isdigit() or len(code) not in (8, 12, 13):
+        return False
+    digits = [int(d) for d in code]
+    total = sum(d * (3 if i % 2 else 1) for i, d in enumerate(reversed(digits[:-1]), 1))
+    return (10 - total % 10) % 10 == digits[-1]
+
+
+def validate_code(code, barcode_format):
+    """India / Samsung checks for a decoded value, mirroring the browser validators"""
+    validation = {'is_india_product': False, 'is_samsung': False, 'messages': []}
+
+    if barcode_format == 'EAN_13':
+        if EAN13_INDIA.match(code):
+            validation['is_india_product'] = True
+            validation['messages'].append('Valid Indian EAN-13 (890 prefix)')
+        else:
+            validation['messages'].append('Non-Indian EAN-13 detected')
+        if SAMSUNG_PREFIX.match(code):
+            validation['is_samsung'] = True
+            validation['messages'].append('Samsung Electronics product detected')
+
+    elif barcode_format == 'CODE_128':
+        if 'SAMSUNG' in code or 'SM-' in code or 'Galaxy' in code:
+            validation['is_samsung'] = True
+            validation['messages'].append('Samsung product identifier')
+        if 'BIS' in code or 'ISI' in code or 'INDIA' in code:
+            validation['is_india_product'] = True
+            validation['messages'].append('India certification mark')
+        if 'http://' in code or 'https://' in code:
+            validation['messages'].append('URL data in Code-128')
+
+    if barcode_format in ('EAN_13', 'EAN_8', 'UPC_A') and not ean_checksum_valid(code):
+        validation['messages'].append('Check digit mismatch')
+    return validation
+
+
+def make_result(code, barcode_format, points, **extra):
+    priority = FORMATS[barcode_format]
+    result = {
+        'code': code,
+        'format': barcode_format,
+        'name': priority['name'],
+        'tier': priority['tier'],
+        'priority': priority['priority'],
+        'order': priority['order'],
+        'points': np.asarray(points, dtype=np.float64).round(1).tolist(),
+        'validation': validate_code(code, barcode_format)
+    }
+    result.update(extra)
+    return result
+
+
+def is_early_exit(results):
+    """A Tier 1 Indian EAN-13 ends the scan"""
+    return any(r['format'] == 'EAN_13' and r['validation']['is_india_product'] for r in results)
+
+
+def detect_linear(gray):
+    """
+    One OpenCV pass over ``gray``: decoded EAN/UPC codes as
+    ``(code, format, points)`` plus the points of regions it localised but
+    could not decode
+    """
+    detector, _ = get_detectors()
+    ok, infos, types, points = detector.detectAndDecodeWithType(gray)
+    if not ok or points is None:
+        return [], []
+    decoded, undecoded = [], []
+    for info, barcode_type, corners in zip(infos, types, points):
+        if info:
+            decoded.append((info, barcode_type, corners))
+        else:
+            undecoded.append(corners)
+    return decoded, undecoded
+
+
+def decode_barcodes(gray, formats=DECODABLE_FORMATS, exhaustive=False):
+    """
+    Decode barcodes in a grayscale array, highest tier first.
+
+    Returns a dict with the ``barcodes`` found (sorted by tier and order),
+    the number of localised regions nobody could decode, the stages that
+    ran and whether the scan stopped early on an Indian EAN-13.
+    """
+    results = []
+    stages_run = []
+    undecoded = []
+    early_exit = False
+
+    # Tier 1 (and the free Tier 3 EAN/UPC decodes): one localisation pass
+    if any(f in formats for f in ('CODE_128',) + LINEAR_FORMATS):
+        with metrics.stage('barcode', 'linear_detection'):
+            decoded, undecoded = detect_linear(gray)
+        stages_run.append('linear_detection')
+        for code, barcode_format, corners in decoded:
+            if barcode_format in formats:
+                results.append(make_result(code, barcode_format, corners))
+        early_exit = not exhaustive and is_early_exit(results)
+
+    if 'CODE_128' in formats and undecoded and not early_exit:
+        with metrics.stage('barcode', 'code128'):
+            remaining = []
+            for corners in undecoded:
+                decoded = code128.decode_region(gray, corners)
+                if decoded is None:
+                    remaining.append(corners)
+                    continue
+                text, gs1 = decoded
+                results.append(make_result(text, 'CODE_128', corners, gs1=gs1))
+            undecoded = remaining
+        stages_run.append('code128')
+
+    # Tier 2
+    if 'QR_CODE' in formats and not early_exit:
+        _, qr_detector = get_detectors()
+        with metrics.stage('barcode', 'qr'):
+            ok, texts, points, _ = qr_detector.detectAndDecodeMulti(gray)
+        stages_run.append('qr')
+        if ok:
+            for text, corners in zip(texts, points):
+                if text:
+                    results.append(make_result(text, 'QR_CODE', corners))
+
+    results.sort(key=lambda r: (r['tier'], r['order']))
+    return {
+        'barcodes': results,
+        'count': len(results),
+        'undecoded_regions': len(undecoded),
+        'early_exit': early_exit,
+        'stages_run': stages_run,
+        'image_size': [int(gray.shape[1]), int(gray.shape[0])]
+    }
@@ -0,0 +1 @@
+# Catalogue Blueprints
\ No newline at end of file
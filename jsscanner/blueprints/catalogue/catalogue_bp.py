@@ -0,0 +1,179 @@
+"""
+Flask Blueprint for Catalogue Matching
+Samsung Electronics India - Match sticker codes from OCR output against the SKU catalogue
+
+``/match`` takes the ``detailed_words`` of any OCR endpoint (or a whole
+OCR/scan response, or plain text), parses model, serial, IMEI and EAN
+fields from them and looks each one up in the memory-mapped catalogue
+index built by ``python -m blueprints.catalogue.index``.
+"""
+
+import time
+from datetime import datetime
+from flask import Blueprint, request, jsonify, current_app
+
+from blueprints.catalogue.fields import FIELDS, fold_digits, parse_fields
+from blueprints.catalogue.index import CatalogueError, get_catalogue
+from blueprints.ocr import metrics
+
+# Create blueprint
+catalogue_bp = Blueprint('catalogue', __name__, url_prefix='/catalogue')
+metrics.instrument_blueprint(catalogue_bp)
+
+# Index column each parsed field is looked up in; IMEIs match on their TAC
+FIELD_COLUMNS = {'model': 'model', 'serial': 'serial', 'imei': 'tac', 'ean': 'ean'}
+
+# Upper bound on the edit distance a request may ask for
+MAX_DISTANCE_LIMIT = 3
+
+def parse_bool(value, default=True):
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+def parse_max_distance(value):
+    """Requested fuzzy edit distance, defaulting to ``CATALOGUE_MAX_DISTANCE``"""
+    if value is None or value == '':
+        return current_app.config.get('CATALOGUE_MAX_DISTANCE', 1)
+    max_distance = int(value)
+    if not 0 <= max_distance <= MAX_DISTANCE_LIMIT:
+        raise ValueError(f'max_distance must be between 0 and {MAX_DISTANCE_LIMIT}')
+    return max_distance
+
+def words_from_request(data):
+    """
+    Words to parse from a ``/match`` body: ``detailed_words``, an OCR or scan
+    response carrying ``ocr_results.detailed_words``, or plain ``text``
+    """
+    if 'detailed_words' in data:
+        return data['detailed_words']
+    ocr_results = data.get('ocr_results')
+    if isinstance(ocr_results, dict) and 'detailed_words' in ocr_results:
+        return ocr_results['detailed_words']
+    if 'text' in data:
+        return str(data['text']).split()
+    raise ValueError("Provide 'detailed_words', 'ocr_results' or 'text'")
+
+def match_fields(catalogue, fields, fuzzy, max_distance):
+    """Look up each parsed field in the catalogue columns it maps to"""
+    columns = set(catalogue.meta['code_columns'])
+    matches = []
+    for field in fields:
+        column = FIELD_COLUMNS[field['field']]
+        if column not in columns:
+            continue
+        code = field['tac'] if field['field'] == 'imei' else field['normalised']
+        result = catalogue.lookup(column, code, fuzzy=fuzzy, max_distance=max_distance)
+        matches.append(dict(result, field=field['field'], column=column, code=code))
+    return matches
+
+def best_match(matches):
+    """The SKU most matched fields agree on, preferring exact matches"""
+    votes = {}
+    for match in matches:
+        for candidate in match['candidates'][:1]:
+            sku = candidate.get('sku')
+            if sku is None:
+                continue
+            exact, count = votes.get(sku, (0, 0))
+            votes[sku] = (exact + (match['match'] == 'exact'), count + 1)
+    if not votes:
+        return None
+    sku = max(votes, key=votes.get)
+    return {'sku': sku, 'exact_fields': votes[sku][0], 'matched_fields': votes[sku][1]}
+
+@catalogue_bp.route('/match', methods=['POST'])
+def match():
+    """Parse sticker fields from OCR output and match them against the catalogue"""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'JSON body required'}), 400
+
+        words = words_from_request(data)
+        fuzzy = parse_bool(data.get('fuzzy'))
+        max_distance = parse_max_distance(data.get('max_distance'))
+        catalogue = get_catalogue(current_app.config)
+
+        with metrics.stage('catalogue', 'parse'):
+            fields = parse_fields(words)
+
+        started = time.perf_counter()
+        with metrics.stage('catalogue', 'lookup'):
+            matches = match_fields(catalogue, fields, fuzzy, max_distance)
+        lookup_ms = (time.perf_counter() - started) * 1000
+
+        return jsonify({
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'fields': fields,
+            'matches': matches,
+            'best_match': best_match(matches),
+            'lookup_ms': round(lookup_ms, 3),
+            'catalogue': {'rows': catalogue.meta['rows'], 'built_at': catalogue.meta['built_at']}
+        })
+
+    except CatalogueError as e:
+        return jsonify({'error': str(e)}), 503
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Catalogue match error: {str(e)}")
+        return jsonify({'error': f'Matching failed: {str(e)}'}), 500
+
+@catalogue_bp.route('/lookup')
+def lookup():
+    """Look up one code: /catalogue/lookup?field=model&code=SM-R510"""
+    try:
+        field = request.args.get('field', 'model')
+        code = request.args.get('code', '')
+        if field not in FIELDS:
+            return jsonify({'error': f"Unknown field '{field}'. Use one of: {', '.join(FIELDS)}"}), 400
+        if not code:
+            return jsonify({'error': 'No code provided'}), 400
+
+        fuzzy = parse_bool(request.args.get('fuzzy'))
+        max_distance = parse_max_distance(request.args.get('max_distance'))
+        catalogue = get_catalogue(current_app.config)
+        column = FIELD_COLUMNS[field]
+        if column not in catalogue.meta['code_columns']:
+            return jsonify({'error': f"The catalogue has no '{column}' column"}), 400
+        if field == 'imei':
+            # Same folding as extracted IMEIs: O/I/S read for 0/1/5, separators dropped
+            digits = fold_digits(code)
+            if digits is None or len(digits) < 8:
+                return jsonify({'error': 'An IMEI code needs at least 8 digits'}), 400
+            code = digits[:8]
+
+        started = time.perf_counter()
+        with metrics.stage('catalogue', 'lookup'):
+            result = catalogue.lookup(column, code, fuzzy=fuzzy, max_distance=max_distance)
+        lookup_ms = (time.perf_counter() - started) * 1000
+
+        return jsonify(dict(
+            result,
+            field=field,
+            column=column,
+            code=code,
+            lookup_ms=round(lookup_ms, 3),
+            timestamp=datetime.now().isoformat()
+        ))
+
+    except CatalogueError as e:
+        return jsonify({'error': str(e)}), 503
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Catalogue lookup error: {str(e)}")
+        return jsonify({'error': f'Lookup failed: {str(e)}'}), 500
+
+@catalogue_bp.route('/info')
+def info():
+    """Loaded catalogue index: columns, row count, build time and size on disk"""
+    try:
+        catalogue = get_catalogue(current_app.config)
+        return jsonify({'catalogue': catalogue.info(), 'timestamp': datetime.now().isoformat()})
+    except CatalogueError as e:
+        return jsonify({'error': str(e)}), 503
@@ -0,0 +1,207 @@
+"""
+Structured Fields from Sticker OCR
+Samsung Electronics India - Model code, serial, IMEI and EAN from recognised words
+
+Words are scanned in reading order. A printed label ("Model", "S/N",
+"IMEI", "EAN") claims the value after it. Unlabelled values are picked up by
+their shape and check digits. Characters that OCR commonly confuses (0/O,
+1/I/L, 2/Z, 5/S, 6/G, 8/B) are folded before digits are validated, so an
+IMEI read as ``35O7...`` still passes the Luhn check.
+"""
+
+import re
+
+from blueprints.barcode.decoder import ean_checksum_valid
+
+FIELDS = ('model', 'serial', 'imei', 'ean')
+
+# OCR confusions folded to digits in numeric fields
+DIGIT_FOLD = str.maketrans({'O': '0', 'o': '0', 'Q': '0', 'D': '0', 'I': '1', 'i': '1', 'l': '1', 'L': '1',
+                            '|': '1', '!': '1', 'Z': '2', 'z': '2', 'S': '5', 's': '5', 'G': '6', 'B': '8'})
+
+# The same confusions folded in codes, so both sides of a lookup agree
+CODE_FOLD = str.maketrans({'O': '0', 'Q': '0', 'D': '0', 'I': '1', 'L': '1', 'Z': '2', 'S': '5', 'G': '6', 'B': '8'})
+
+LABELS = {
+    'model': re.compile(r'^(MOD[E3]L(NO|NUMBER)?|M/N|MN)$'),
+    'serial': re.compile(r'^(S/N|SN|SERIAL|SERIALNO|SERIALNUMBER|SERNO)$'),
+    'imei': re.compile(r'^IME[I1][12]?$'),
+    'ean': re.compile(r'^(EAN|EAN13|GTIN)$')
+}
+
+# Words between a label and its value ("Model No. :", "Serial #")
+FILLER = re.compile(r'^(NO|NUMBER|#|:|-)$')
+
+# Unlabelled shapes: Samsung model codes always carry the two-letter prefix
+# and hyphen (SM-R510, EP-TA800), phone serials start with R
+MODEL_SHAPE = re.compile(r'^[A-Z0-9]{2}-[A-Z0-9]{3,14}(/[A-Z0-9]{2,4})?$')
+SERIAL_SHAPE = re.compile(r'^R[A-Z0-9]{10}$')
+LABELLED_CODE = re.compile(r'^[A-Z0-9][A-Z0-9/-]{3,19}$')
+
+# IMEI/EAN digit groups are often split over several words
+MAX_DIGIT_WORDS = 5
+
+
+def fold_code(text):
+    """Upper-case, drop separators and fold confusable characters"""
+    return re.sub(r'[^0-9A-Z]', '', str(text).upper()).translate(CODE_FOLD)
+
+
+def fold_digits(text):
+    """Digits of ``text`` with confusable letters folded, or None if it is not numeric"""
+    digits = re.sub(r'[\s./:-]', '', str(text)).translate(DIGIT_FOLD)
+    return digits if digits.isdigit() else None
+
+
+def luhn_valid(digits):
+    """Luhn check used by IMEIs"""
+    total = 0
+    for i, digit in enumerate(int(d) for d in reversed(digits)):
+        if i % 2:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+
+def clean(text):
+    return str(text).strip().strip('.,;:()[]').upper()
+
+
+def label_of(text):
+    text = clean(text).replace(' ', '')
+    for field, pattern in LABELS.items():
+        if pattern.match(text):
+            return field
+    return None
+
+
+def split_words(words):
+    """
+    ``detailed_words`` dicts (or plain strings) as a list of dicts, with
+    glued labels such as ``IMEI:3571...`` split into label and value
+    """
+    tokens = []
+    for word in words:
+        if isinstance(word, str):
+            word = {'text': word}
+        text = str(word.get('text', '')).strip()
+        if not text:
+            continue
+        label, sep, value = text.partition(':')
+        if sep and value and label_of(label):
+            tokens.append(dict(word, text=label))
+            tokens.append(dict(word, text=value))
+        else:
+            tokens.append(dict(word, text=text))
+    return tokens
+
+
+def make_field(field, tokens, normalised, source, **extra):
+    confidences = [t['confidence'] for t in tokens if t.get('confidence') is not None]
+    result = {
+        'field': field,
+        'value': ' '.join(t['text'] for t in tokens),
+        'normalised': normalised,
+        'source': source,
+        'confidence': round(sum(confidences) / len(confidences), 2) if confidences else None
+    }
+    boxes = [t for t in tokens if 'left' in t]
+    if boxes:
+        left = min(t['left'] for t in boxes)
+        top = min(t['top'] for t in boxes)
+        right = max(t['left'] + t['width'] for t in boxes)
+        bottom = max(t['top'] + t['height'] for t in boxes)
+        result['bbox'] = [left, top, right - left, bottom - top]
+    result.update(extra)
+    return result
+
+
+def digit_field(tokens, start, field=None):
+    """
+    Longest valid IMEI (15 digits, Luhn) or EAN (8/12/13 digits, GTIN check)
+    starting at ``tokens[start]``. Returns ``(field, end, digits)`` or None.
+    """
+    digits = ''
+    found = None
+    for end in range(start, min(start + MAX_DIGIT_WORDS, len(tokens))):
+        part = fold_digits(tokens[end]['text'])
+        if part is None:
+            break
+        digits += part
+        if len(digits) > 15:
+            break
+        if len(digits) == 15 and field in (None, 'imei') and luhn_valid(digits):
+            found = ('imei', end + 1, digits)
+        elif len(digits) in (8, 12, 13) and field in (None, 'ean') and ean_checksum_valid(digits):
+            found = ('ean', end + 1, digits)
+    return found
+
+
+def parse_fields(words):
+    """
+    Model, serial, IMEI and EAN fields found in ``words`` (``detailed_words``
+    dicts or plain strings, in reading order). Each field reports its raw
+    value, the normalised code, whether it came from a label or its shape,
+    the mean word confidence and the bounding box of its words. IMEIs and
+    EANs always passed their check digit; IMEIs also carry their TAC.
+    """
+    tokens = split_words(words)
+    fields = []
+    used = set()
+
+    # Labelled values first; they win over shape matches on the same words
+    for i, token in enumerate(tokens):
+        field = label_of(token['text'])
+        if field is None:
+            continue
+        j = i + 1
+        while j < len(tokens) and FILLER.match(clean(tokens[j]['text'])):
+            j += 1
+        if j >= len(tokens) or j in used:
+            continue
+
+        if field in ('imei', 'ean'):
+            found = digit_field(tokens, j, field)
+            if found:
+                _, end, digits = found
+                extra = {'tac': digits[:8]} if field == 'imei' else {}
+                fields.append(make_field(field, tokens[j:end], digits, 'label', **extra))
+                used.update(range(i, end))
+            continue
+
+        value = clean(tokens[j]['text'])
+        if LABELLED_CODE.match(value):
+            fields.append(make_field(field, [tokens[j]], value, 'label'))
+            used.update((i, j))
+
+    # Then values recognised by their shape and check digits
+    i = 0
+    while i < len(tokens):
+        if i in used:
+            i += 1
+            continue
+        found = digit_field(tokens, i)
+        if found and not used.intersection(range(i, found[1])):
+            field, end, digits = found
+            extra = {'tac': digits[:8]} if field == 'imei' else {}
+            fields.append(make_field(field, tokens[i:end], digits, 'shape', **extra))
+            used.update(range(i, end))
+            i = end
+            continue
+
+        value = clean(tokens[i]['text'])
+        if MODEL_SHAPE.match(value) and re.search(r'\d', value):
+            fields.append(make_field('model', [tokens[i]], value, 'shape'))
+            used.add(i)
+        elif SERIAL_SHAPE.match(value) and re.search(r'\d', value[1:]):
+            fields.append(make_field('serial', [tokens[i]], value, 'shape'))
+            used.add(i)
+        i += 1
+
+    # The same code printed twice (text and barcode digits) is reported once
+    unique = {}
+    for field in fields:
+        unique.setdefault((field['field'], field['normalised']), field)
+    return sorted(unique.values(), key=lambda f: FIELDS.index(f['field']))
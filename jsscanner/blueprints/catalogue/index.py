@@ -0,0 +1,353 @@
+"""
+Product Catalogue Index
+Samsung Electronics India - Sub-millisecond SKU lookups for codes read off stickers
+
+``build_index`` turns a catalogue CSV (one row per SKU: ``sku`` plus any of
+``model``, ``ean``, ``tac`` and ``serial``, and free-text columns such as
+``description``) into a directory of flat arrays that ``CatalogueIndex``
+memory-maps, so loading a million-row index takes milliseconds:
+
+- ``keys.npy`` / ``key_rows.npy``: sorted 64-bit hashes of every folded
+  code, tagged with its column, and the catalogue row of each
+- ``gram_ids.npy`` / ``gram_offsets.npy`` / ``gram_rows.npy``: trigram
+  postings over the folded model codes, and ``model_lengths.npy``
+- ``records.bin`` / ``record_offsets.npy``: the rows, one JSON array each
+- ``meta.json``: columns, row count and build details
+
+Exact lookups are a binary search over ``keys.npy``. Fuzzy model lookups
+collect candidates from the postings of the query's rarest trigrams and rank
+them by edit distance, which covers dropped or extra characters that
+folding does not.
+
+    python -m blueprints.catalogue.index catalogue.csv --output uploads/catalogue.idx
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime
+
+from blueprints.catalogue.fields import fold_code
+from blueprints.ocr.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+INDEX_VERSION = 1
+
+# Catalogue columns that hold codes; the rest are returned as-is
+CODE_COLUMNS = ('model', 'ean', 'tac', 'serial')
+
+# Trigram alphabet: folded codes plus the start/end padding
+GRAM_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ^$'
+GRAM_CODES = {c: i for i, c in enumerate(GRAM_ALPHABET)}
+GRAM_BASE = len(GRAM_ALPHABET)
+
+# Fuzzy candidates verified by edit distance per lookup, best scores first
+MAX_FUZZY_CANDIDATES = 256
+
+
+class CatalogueError(Exception):
+    """Missing or unreadable catalogue index"""
+
+
+def code_hash(column, folded):
+    """64-bit key of a folded code in ``column``"""
+    digest = hashlib.blake2b(f"{column}:{folded}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def trigrams(folded):
+    """Trigram ids of a folded code, padded so short codes still have some"""
+    padded = f"^{folded}$"
+    codes = [GRAM_CODES[c] for c in padded]
+    return {(a * GRAM_BASE + b) * GRAM_BASE + c for a, b, c in zip(codes, codes[1:], codes[2:])}
+
+
+def edit_distance(a, b, limit):
+    """
+    Levenshtein distance, or ``limit + 1`` once it is certain to exceed
+    ``limit``. Only the diagonal band of width ``2 * limit + 1`` is computed.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i, char_a in enumerate(a, 1):
+        lo, hi = max(1, i - limit), min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= limit else over
+        best = current[0]
+        for j in range(lo, hi + 1):
+            value = previous[j - 1] + (char_a != b[j - 1])
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            current[j] = value if value <= limit else over
+            if value < best:
+                best = value
+        if best > limit:
+            return over
+        previous = current
+    return previous[-1]
+
+
+def build_index(csv_path, output, log=None):
+    """
+    Build the index directory ``output`` from a catalogue CSV. The index is
+    written next to ``output`` and renamed into place, so running servers
+    never load a half-written index.
+    """
+    started = time.perf_counter()
+    tmp = f"{output}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    keys, key_rows = array('Q'), array('I')
+    gram_ids, gram_rows = array('I'), array('I')
+    model_lengths = array('B')
+    record_offsets = array('Q', [0])
+    rows = 0
+
+    with open(csv_path, newline='', encoding='utf-8') as source, \
+            open(os.path.join(tmp, 'records.bin'), 'wb') as records:
+        reader = csv.reader(source)
+        columns = [c.strip().lower() for c in next(reader, ())]
+        if 'sku' not in columns:
+            raise CatalogueError(f"{csv_path} has no 'sku' column")
+        code_columns = [c for c in CODE_COLUMNS if c in columns]
+        if not code_columns:
+            raise CatalogueError(f"{csv_path} has none of the code columns: {', '.join(CODE_COLUMNS)}")
+
+        for values in reader:
+            record = {c: v.strip() for c, v in zip(columns, values) if v.strip()}
+            model_lengths.append(min(len(fold_code(record.get('model', ''))), 255))
+            for column in code_columns:
+                folded = fold_code(record.get(column, ''))
+                if not folded:
+                    continue
+                keys.append(code_hash(column, folded))
+                key_rows.append(rows)
+                if column == 'model':
+                    for gram in trigrams(folded):
+                        gram_ids.append(gram)
+                        gram_rows.append(rows)
+            # Rows are stored as JSON arrays in column order; the names live in meta.json
+            encoded = json.dumps([record.get(c, '') for c in columns], ensure_ascii=False,
+                                 separators=(',', ':')).encode()
+            records.write(encoded)
+            record_offsets.append(record_offsets[-1] + len(encoded))
+            rows += 1
+            if log and rows % 250000 == 0:
+                log(f"{rows} rows")
+
+    keys = np.frombuffer(keys, dtype=np.uint64)
+    order = np.argsort(keys, kind='stable')
+    np.save(os.path.join(tmp, 'keys.npy'), keys[order])
+    np.save(os.path.join(tmp, 'key_rows.npy'), np.frombuffer(key_rows, dtype=np.uint32)[order])
+
+    gram_ids = np.frombuffer(gram_ids, dtype=np.uint32)
+    order = np.argsort(gram_ids, kind='stable')
+    unique_ids, counts = np.unique(gram_ids[order], return_counts=True)
+    np.save(os.path.join(tmp, 'gram_ids.npy'), unique_ids)
+    np.save(os.path.join(tmp, 'gram_offsets.npy'), np.concatenate(([0], np.cumsum(counts))).astype(np.uint64))
+    np.save(os.path.join(tmp, 'gram_rows.npy'), np.frombuffer(gram_rows, dtype=np.uint32)[order])
+    np.save(os.path.join(tmp, 'model_lengths.npy'), np.frombuffer(model_lengths, dtype=np.uint8))
+    np.save(os.path.join(tmp, 'record_offsets.npy'), np.frombuffer(record_offsets, dtype=np.uint64))
+
+    meta = {
+        'version': INDEX_VERSION,
+        'rows': rows,
+        'keys': int(len(keys)),
+        'columns': columns,
+        'code_columns': code_columns,
+        'source': os.path.abspath(csv_path),
+        'built_at': datetime.now().isoformat(),
+        'build_seconds': round(time.perf_counter() - started, 2)
+    }
+    with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+    # Swap directories: move the old index aside, rename the new one into place
+    previous = f"{output}.old-{os.getpid()}"
+    if os.path.exists(output):
+        os.rename(output, previous)
+    os.rename(tmp, output)
+    shutil.rmtree(previous, ignore_errors=True)
+    return meta
+
+
+class CatalogueIndex:
+    """Read-only, memory-mapped catalogue index"""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+                self.meta = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CatalogueError(f"No catalogue index at {path}: {str(e)}")
+        if self.meta.get('version') != INDEX_VERSION:
+            raise CatalogueError(f"Catalogue index version {self.meta.get('version')} is not supported; rebuild it")
+
+        self.columns = self.meta['columns']
+
+        def load(name):
+            return np.load(os.path.join(path, name), mmap_mode='r')
+
+        self.keys = load('keys.npy')
+        self.key_rows = load('key_rows.npy')
+        self.gram_ids = load('gram_ids.npy')
+        self.gram_offsets = load('gram_offsets.npy')
+        self.gram_rows = load('gram_rows.npy')
+        self.model_lengths = load('model_lengths.npy')
+        self.record_offsets = load('record_offsets.npy')
+        with open(os.path.join(path, 'records.bin'), 'rb') as f:
+            # An empty file cannot be mapped
+            self._records = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b''
+
+    def record(self, row):
+        start, end = int(self.record_offsets[row]), int(self.record_offsets[row + 1])
+        values = json.loads(self._records[start:end])
+        return {column: value for column, value in zip(self.columns, values) if value}
+
+    def exact(self, column, code):
+        """Catalogue rows whose ``column`` folds to the same code"""
+        folded = fold_code(code)
+        if not folded or not len(self.keys):
+            return []
+        key = np.uint64(code_hash(column, folded))
+        lo = int(np.searchsorted(self.keys, key, side='left'))
+        hi = int(np.searchsorted(self.keys, key, side='right'))
+        records = (self.record(int(row)) for row in self.key_rows[lo:hi])
+        # Hash collisions are checked against the stored code
+        return [r for r in records if fold_code(r.get(column, '')) == folded]
+
+    def fuzzy(self, code, max_distance=1, limit=5):
+        """
+        Catalogue rows whose folded model code is within ``max_distance``
+        edits of ``code``, closest first, as ``(distance, record)`` pairs
+        """
+        folded = fold_code(code)
+        grams = np.unique(np.fromiter(trigrams(folded), dtype=np.uint32)) if folded else None
+        if grams is None or not len(self.gram_ids):
+            return []
+
+        positions = np.searchsorted(self.gram_ids, grams)
+        found = positions < len(self.gram_ids)
+        found[found] = self.gram_ids[positions[found]] == grams[found]
+        positions = positions[found]
+        if not len(positions):
+            return []
+        starts = self.gram_offsets[positions].astype(np.int64)
+        lengths = (self.gram_offsets[positions + 1] - self.gram_offsets[positions]).astype(np.int64)
+        by_rarity = np.argsort(lengths, kind='stable')
+        starts, lengths = starts[by_rarity], lengths[by_rarity]
+
+        # Each edit changes at most three trigrams, so any row within
+        # max_distance shares one of the 3 * max_distance + 1 rarest ones
+        seeds = 3 * max_distance + 1
+        rows = np.sort(np.concatenate([self.gram_rows[start:start + length]
+                                       for start, length in zip(starts[:seeds], lengths[:seeds])]))
+        rows = rows[np.concatenate(([True], rows[1:] != rows[:-1]))]
+
+        # Codes whose length alone rules them out are dropped before any record is read
+        rows = rows[np.abs(self.model_lengths[rows].astype(np.int16) - len(folded)) <= max_distance]
+
+        # Rows are then checked against every query trigram, rarest first (postings
+        # are sorted by row). A row may miss at most 3 * max_distance of them, so rows
+        # that can no longer reach that are dropped as the scan goes. Survivors are
+        # ranked by the shared grams weighted by rarity (IDF): grams common to a
+        # whole product line (SM-, 5M after folding) say little about the model.
+        needed = len(grams) - 3 * max_distance
+        shared = np.zeros(len(rows), dtype=np.int64)
+        scores = np.zeros(len(rows))
+        for i, (start, length) in enumerate(zip(starts, lengths)):
+            posting = self.gram_rows[start:start + length]
+            present = posting[np.minimum(np.searchsorted(posting, rows), length - 1)] == rows
+            shared += present
+            scores += present * np.log(len(self.model_lengths) / length)
+            alive = shared + (len(starts) - i - 1) >= needed
+            if not alive.all():
+                rows, shared, scores = rows[alive], shared[alive], scores[alive]
+        candidates = rows[np.argsort(-scores, kind='stable')[:MAX_FUZZY_CANDIDATES]]
+
+        matches = []
+        for row in candidates:
+            record = self.record(int(row))
+            distance = edit_distance(folded, fold_code(record.get('model', '')), max_distance)
+            if distance <= max_distance:
+                matches.append((distance, record))
+        matches.sort(key=lambda match: match[0])
+        return matches[:limit]
+
+    def lookup(self, column, code, fuzzy=True, max_distance=1, limit=5):
+        """
+        Exact lookup, falling back to a fuzzy model lookup. Returns
+        ``{'match': 'exact'|'fuzzy'|None, 'candidates': [...]}`` with the
+        edit distance of each fuzzy candidate.
+        """
+        records = self.exact(column, code)
+        if records:
+            return {'match': 'exact', 'candidates': [dict(record, distance=0) for record in records[:limit]]}
+        if fuzzy and column == 'model' and max_distance > 0:
+            matches = self.fuzzy(code, max_distance, limit)
+            if matches:
+                return {'match': 'fuzzy', 'candidates': [dict(record, distance=d) for d, record in matches]}
+        return {'match': None, 'candidates': []}
+
+    def info(self):
+        size = sum(entry.stat().st_size for entry in os.scandir(self.path) if entry.is_file())
+        return dict(self.meta, path=self.path, size_bytes=size)
+
+
+_index = None
+_index_mtime = None
+_index_lock = threading.Lock()
+
+
+def get_catalogue(config):
+    """
+    Return the process wide catalogue index from ``CATALOGUE_INDEX_PATH``,
+    reloading it when the index has been rebuilt. Raises ``CatalogueError``
+    when no index has been built.
+    """
+    global _index, _index_mtime
+    path = config.get('CATALOGUE_INDEX_PATH')
+    try:
+        mtime = os.stat(os.path.join(path, 'meta.json')).st_mtime_ns
+    except (OSError, TypeError):
+        raise CatalogueError(f"No catalogue index at {path}; build one with "
+                             f"python -m blueprints.catalogue.index <catalogue.csv> --output {path}")
+    if _index is None or _index.path != path or _index_mtime != mtime:
+        with _index_lock:
+            if _index is None or _index.path != path or _index_mtime != mtime:
+                _index = CatalogueIndex(path)
+                _index_mtime = mtime
+    return _index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the product catalogue index from a CSV file')
+    parser.add_argument('catalogue', help="CSV with a 'sku' column and any of: " + ', '.join(CODE_COLUMNS))
+    parser.add_argument('--output', default=os.path.join('uploads', 'catalogue.idx'),
+                        help='index directory (default: uploads/catalogue.idx)')
+    args = parser.parse_args(argv)
+
+    try:
+        meta = build_index(args.catalogue, args.output, log=lambda message: print(message, file=sys.stderr))
+    except (OSError, CatalogueError) as e:
+        parser.error(str(e))
+    print(f"Indexed {meta['rows']} rows ({meta['keys']} codes) into {args.output} in {meta['build_seconds']} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""
+Artifact Store for OCR Debug Images
+Samsung Electronics India - Serve preprocessing images by URL instead of inline base64
+
+Images (PIL images or ndarray buffers) are encoded once (PNG, JPEG or WebP,
+optionally as thumbnails), written to a local directory and served from
+``/ocr/artifacts/<id>``. Files older than the TTL are removed
+opportunistically on write.
+"""
+
+import base64
+import io
+import os
+import re
+import threading
+import time
+import uuid
+
+from flask import url_for
+
+from blueprints.ocr.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+FORMATS = {
+    'png': ('PNG', 'image/png'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'webp': ('WEBP', 'image/webp')
+}
+
+# File extension OpenCV uses to pick the encoder for each format
+CV_EXTENSIONS = {'png': '.png', 'jpeg': '.jpg', 'webp': '.webp'}
+
+ARTIFACT_ID_PATTERN = re.compile(r'^[0-9a-f]{32}\.(png|jpeg|webp)$')
+
+
+def artifact_options(options, config):
+    """
+    Encoding options from request parameters, falling back to app config:
+    ``image_format``, ``image_quality``, ``thumbnail`` (max dimension in
+    pixels) and ``inline_images`` (return data URIs instead of URLs)
+    """
+    image_format = (options.get('image_format') or config.get('OCR_ARTIFACT_FORMAT', 'jpeg')).lower()
+    if image_format == 'jpg':
+        image_format = 'jpeg'
+    if image_format not in FORMATS:
+        raise ValueError(f"Unknown image_format. Allowed: {', '.join(FORMATS)}")
+
+    quality = int(options.get('image_quality') or config.get('OCR_ARTIFACT_QUALITY', 80))
+    if not 1 <= quality <= 100:
+        raise ValueError('image_quality must be between 1 and 100')
+
+    thumbnail = options.get('thumbnail')
+    thumbnail = int(thumbnail) if thumbnail else None
+
+    inline = str(options.get('inline_images', '')).lower() in ('1', 'true', 'yes')
+
+    return {'format': image_format, 'quality': quality, 'thumbnail': thumbnail, 'inline': inline}
+
+
+def encode_array(array, image_format='png', quality=80, thumbnail=None):
+    """
+    Encode a uint8 ndarray (grayscale or BGR) with OpenCV, without
+    converting to PIL or expanding grayscale to colour
+    """
+    _, mimetype = FORMATS[image_format]
+    height, width = array.shape[:2]
+    if thumbnail and max(height, width) > thumbnail:
+        scale = thumbnail / max(height, width)
+        array = cv2.resize(array, (max(1, int(width * scale)), max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+
+    if image_format == 'png':
+        params = [cv2.IMWRITE_PNG_COMPRESSION, 1]
+    elif image_format == 'jpeg':
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+    else:
+        params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+    ok, buffer = cv2.imencode(CV_EXTENSIONS[image_format], array, params)
+    if not ok:
+        raise ValueError(f'Could not encode image as {image_format}')
+    return buffer.tobytes(), mimetype
+
+
+def encode_image(image, image_format='png', quality=80, thumbnail=None):
+    """Encode a PIL image or ndarray and return ``(bytes, mimetype)``"""
+    if isinstance(image, np.ndarray):
+        return encode_array(image, image_format, quality, thumbnail)
+
+    pil_format, mimetype = FORMATS[image_format]
+    if thumbnail and max(image.size) > thumbnail:
+        image = image.copy()
+        image.thumbnail((thumbnail, thumbnail))
+    if pil_format == 'JPEG' and image.mode not in ('L', 'RGB'):
+        image = image.convert('RGB')
+
+    buffer = io.BytesIO()
+    if pil_format == 'PNG':
+        # Fast zlib level - debug images are written once and rarely fetched
+        image.save(buffer, format=pil_format, compress_level=1)
+    else:
+        image.save(buffer, format=pil_format, quality=quality)
+    return buffer.getvalue(), mimetype
+
+
+class ArtifactStore:
+    """Write-once image files with TTL based cleanup"""
+
+    def __init__(self, root, ttl_seconds=3600, cleanup_interval=60):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.cleanup_interval = cleanup_interval
+        self._last_cleanup = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def save(self, data, image_format):
+        """Write encoded bytes and return the artifact id"""
+        self._maybe_cleanup()
+        artifact_id = f"{uuid.uuid4().hex}.{image_format}"
+        path = os.path.join(self.root, artifact_id)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return artifact_id
+
+    def path(self, artifact_id):
+        """Filesystem path of a live artifact, or None"""
+        if not ARTIFACT_ID_PATTERN.match(artifact_id):
+            return None
+        path = os.path.join(self.root, artifact_id)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                return None
+        except OSError:
+            return None
+        return path
+
+    def exists(self, artifact_id):
+        return self.path(artifact_id) is not None
+
+    def _maybe_cleanup(self):
+        now = time.time()
+        with self._lock:
+            if now - self._last_cleanup < self.cleanup_interval:
+                return
+            self._last_cleanup = now
+        self.cleanup()
+
+    def cleanup(self):
+        """Delete artifacts older than the TTL; returns how many were removed"""
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        removed += 1
+                except OSError:
+                    continue
+        return removed
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store(config):
+    """Return the process wide artifact store configured from the Flask ``config``"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ArtifactStore(
+                    config['OCR_ARTIFACT_DIR'],
+                    ttl_seconds=config.get('OCR_ARTIFACT_TTL_SECONDS', 3600)
+                )
+    return _store
+
+
+def store_image(image, options, config):
+    """
+    Encode ``image`` (PIL image or ndarray) with ``options`` (see
+    ``artifact_options``) and return its URL, or a data URI when inline
+    images were requested
+    """
+    data, mimetype = encode_image(image, options['format'], options['quality'], options['thumbnail'])
+    if options['inline']:
+        return f"data:{mimetype};base64,{base64.b64encode(data).decode()}"
+    artifact_id = get_artifact_store(config).save(data, options['format'])
+    return url_for('ocr_artifacts.get_artifact', artifact_id=artifact_id)
+
+
+def artifacts_available(references, config):
+    """True when every artifact URL in ``references`` can still be served"""
+    store = get_artifact_store(config)
+    for reference in references:
+        if reference.startswith('data:'):
+            continue
+        if not store.exists(reference.rsplit('/', 1)[-1]):
+            return False
+    return True
@@ -0,0 +1,22 @@
+"""
+Flask Blueprint for OCR Artifacts
+Samsung Electronics India - Preprocessing images fetched on demand by the OCR interfaces
+"""
+
+from flask import Blueprint, jsonify, send_file, current_app
+
+from blueprints.ocr.artifact_store import FORMATS, get_artifact_store
+
+# Create blueprint
+artifacts_bp = Blueprint('ocr_artifacts', __name__, url_prefix='/ocr/artifacts')
+
+@artifacts_bp.route('/<artifact_id>')
+def get_artifact(artifact_id):
+    """Serve a stored preprocessing image"""
+    path = get_artifact_store(current_app.config).path(artifact_id)
+    if path is None:
+        return jsonify({'error': 'Unknown or expired artifact'}), 404
+
+    _, mimetype = FORMATS[artifact_id.rsplit('.', 1)[1]]
+    # Artifacts are immutable, so clients may cache them for their lifetime
+    return send_file(path, mimetype=mimetype, max_age=current_app.config.get('OCR_ARTIFACT_TTL_SECONDS', 3600))
@@ -0,0 +1,225 @@
+"""
+Batch OCR Helpers shared by the OCR Blueprints
+Samsung Electronics India - Process a pallet's worth of sticker photos per request
+
+Inputs (multipart files, zip archives or a JSON list of base64 images) are
+read lazily and fanned out to a thread pool. Results are streamed back as
+NDJSON, one line per image in completion order, while at most
+``max_in_flight`` images are held in memory at any time. A JSON body has to
+be parsed whole, so it has its own, smaller size limit; larger batches are
+sent as multipart files or a zip archive.
+"""
+
+import base64
+import io
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from flask import Response, current_app, stream_with_context
+
+from blueprints.ocr.quality import ImageRejected
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def _decode_base64_image(image_data):
+    """Bytes of a base64 (or data URL) image; ValueError if there are none"""
+    if image_data.startswith('data:image'):
+        image_data = image_data.partition(',')[2]
+    try:
+        image_bytes = base64.b64decode(image_data)
+    except ValueError as e:
+        raise ValueError(f'Invalid base64 image data: {str(e)}')
+    if not image_bytes:
+        raise ValueError('Empty image data')
+    return image_bytes
+
+
+def _json_images(req):
+    """The ``images`` list of a JSON batch body; ValueError for any other shape"""
+    data = req.get_json(silent=True)
+    if not isinstance(data, dict):
+        raise ValueError('JSON batch body must be an object with an "images" list')
+    images = data.get('images', [])
+    if not isinstance(images, list):
+        raise ValueError('"images" must be a list of base64 strings or {"name", "image"} objects')
+    return data, images
+
+
+def _detach_stream(stream):
+    """
+    Keep an uploaded file readable after Flask closes the request files,
+    which happens before a streamed response body is generated.
+    """
+    try:
+        # Disk spooled upload - duplicate the descriptor instead of copying data
+        return os.fdopen(os.dup(stream.fileno()), 'rb')
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        # Small uploads are already held in memory
+        return io.BytesIO(stream.read())
+
+
+def _iter_zip(stream, allowed_file):
+    with zipfile.ZipFile(stream) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not allowed_file(info.filename):
+                continue
+            yield info.filename, archive.read(info)
+
+
+def batch_content_length(req, config):
+    """
+    Upload limit for a batch request. JSON bodies are held in memory while
+    the batch runs, so they are limited by ``OCR_BATCH_MAX_JSON_LENGTH``
+    instead of ``OCR_BATCH_MAX_CONTENT_LENGTH``.
+    """
+    if req.is_json:
+        return config.get('OCR_BATCH_MAX_JSON_LENGTH')
+    return config.get('OCR_BATCH_MAX_CONTENT_LENGTH')
+
+
+def iter_batch_inputs(req, allowed_file):
+    """
+    Return an iterator of ``(name, image_bytes)`` for a batch request.
+
+    Accepts multipart ``files``/``file`` fields (zip archives are expanded
+    entry by entry) or a JSON body ``{"images": [...]}`` whose items are
+    base64 strings or ``{"name": ..., "image": ...}`` objects. Must be called
+    inside the view; images are only read as the iterator is consumed. JSON
+    items are yielded as their base64 string, which ``iter_batch_results``
+    decodes per item, so one bad item does not end the batch; each string is
+    released from the parsed body once it has been handed out.
+    """
+    if req.is_json:
+        _, images = _json_images(req)
+
+        def iter_json():
+            for index, item in enumerate(images):
+                images[index] = None
+                if isinstance(item, dict):
+                    name, image = str(item.get('name', f'image_{index}')), item.get('image')
+                else:
+                    name, image = f'image_{index}', item
+                yield name, image if isinstance(image, str) else ''
+        return iter_json()
+
+    uploads = [
+        (file.filename, _detach_stream(file.stream))
+        for file in req.files.getlist('files') + req.files.getlist('file')
+        if file.filename
+    ]
+
+    def iter_files():
+        for filename, stream in uploads:
+            with stream:
+                if filename.lower().endswith('.zip'):
+                    yield from _iter_zip(stream, allowed_file)
+                elif allowed_file(filename):
+                    yield filename, stream.read()
+                else:
+                    yield filename, None
+    return iter_files()
+
+
+def batch_options(req):
+    """
+    Per-batch options from the JSON body or the multipart form. Raises
+    ValueError for a JSON body that is not ``{"images": [...], ...}``, so
+    routes can reject it before streaming starts.
+    """
+    if req.is_json:
+        data, _ = _json_images(req)
+        return {k: v for k, v in data.items() if k != 'images'}
+    return req.form.to_dict()
+
+
+def iter_batch_results(items, process, max_workers=None, max_in_flight=None, results_key='ocr_results'):
+    """
+    Run ``process(image_bytes)`` over ``items`` on a thread pool.
+
+    ``process`` returns ``(entry, cache_status)`` like ``cached_ocr``;
+    ``entry[results_key]`` is streamed back. A ``None`` cache status (no
+    cache involved) is left out of the result. Items given as a base64 string
+    (JSON bodies) are decoded here, in the worker, so an invalid one fails
+    on its own line. Yields one result dict per item as soon as it completes, followed by a
+    summary.
+    """
+    app = current_app._get_current_object()
+    max_workers = max_workers or app.config.get('OCR_ENGINE_POOL_SIZE') or 1
+    max_in_flight = max_in_flight or app.config.get('OCR_BATCH_MAX_IN_FLIGHT') or max_workers * 2
+
+    def run(index, name, image_bytes):
+        started = time.perf_counter()
+        result = {'index': index, 'name': name}
+        if image_bytes is None:
+            result.update({'success': False, 'error': 'Invalid file type'})
+            return result
+        if isinstance(image_bytes, str):
+            try:
+                image_bytes = _decode_base64_image(image_bytes)
+            except ValueError as e:
+                result.update({'success': False, 'error': str(e)})
+                return result
+        with app.app_context():
+            try:
+                entry, cache_status = process(image_bytes)
+                result.update({
+                    'success': 'error' not in entry[results_key],
+                    results_key: entry[results_key]
+                })
+                if cache_status is not None:
+                    result['cache'] = cache_status
+            except ImageRejected as e:
+                result.update({'success': False, 'error': str(e), 'quality': e.to_dict()})
+            except Exception as e:
+                app.logger.error(f"Batch item {name} error: {str(e)}")
+                result.update({'success': False, 'error': f'Processing failed: {str(e)}'})
+        result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    started = time.perf_counter()
+    summary = {'total': 0, 'succeeded': 0, 'failed': 0}
+
+    def drain(futures):
+        for future in futures:
+            result = future.result()
+            summary['succeeded' if result['success'] else 'failed'] += 1
+            yield result
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ocr-batch') as executor:
+        pending = set()
+        try:
+            for index, (name, image_bytes) in enumerate(items):
+                summary['total'] += 1
+                pending.add(executor.submit(run, index, name, image_bytes))
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from drain(done)
+        except Exception as e:
+            # Unreadable input (e.g. a corrupt zip) ends the batch but keeps finished results
+            summary['input_error'] = str(e)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from drain(done)
+
+    summary['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    yield {'summary': summary}
+
+
+def ndjson_response(results):
+    """
+    Stream result dicts as newline delimited JSON. ``results`` is closed
+    when the response is, so generators clean up after a client disconnect.
+    """
+    def generate():
+        try:
+            for result in results:
+                yield json.dumps(result, separators=(',', ':')) + '\n'
+        finally:
+            close = getattr(results, 'close', None)
+            if close is not None:
+                close()
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,130 @@
+"""
+Capability Probes for the OCR Service
+Samsung Electronics India - Health checks answer from a cached probe
+
+Probing Tesseract starts a process (or loads a model), so it runs once, at
+worker warm-up or on the first health check, and again only when the result
+is older than ``OCR_CAPABILITY_TTL_SECONDS``. A stale result is refreshed on
+a background thread while health checks keep answering from the old one.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from blueprints.ocr.engine_pool import get_engine_pool
+from blueprints.ocr.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+pytesseract = lazy_import('pytesseract')
+
+
+def timed_probe(probe, *args):
+    """Run one probe; failures are reported instead of raised"""
+    started = time.perf_counter()
+    try:
+        result = dict(probe(*args), available=True)
+    except Exception as e:
+        result = {'available': False, 'error': str(e)}
+    result['probe_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def probe_tesseract(engine_pool):
+    """Tesseract version, installed languages and one real recognition through the pool"""
+    version = pytesseract.get_tesseract_version()
+    languages = pytesseract.get_languages()
+    engine_pool.image_to_string(Image.new('L', (200, 50), color=255))
+    return {'version': str(version), 'languages': languages, 'backend': engine_pool.backend}
+
+
+def probe_opencv():
+    """OpenCV version, a basic filter pass and barcode detector support"""
+    gray = cv2.cvtColor(np.full((100, 200, 3), 255, dtype=np.uint8), cv2.COLOR_BGR2GRAY)
+    cv2.GaussianBlur(gray, (5, 5), 0)
+    return {'version': cv2.__version__, 'barcode_detector': hasattr(cv2, 'barcode'), 'threads': cv2.getNumThreads()}
+
+
+class CapabilityCache:
+    """Last probe result with a refresh interval"""
+
+    def __init__(self, pool_size=None, ttl_seconds=300):
+        self.pool_size = pool_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._result = None
+        self._checked = 0.0
+        self._refreshing = False
+
+    def probe(self):
+        return {
+            'tesseract': timed_probe(probe_tesseract, get_engine_pool(self.pool_size)),
+            'opencv': timed_probe(probe_opencv),
+            'checked_at': datetime.now().isoformat()
+        }
+
+    def _store(self, result):
+        with self._lock:
+            self._result = result
+            self._checked = time.monotonic()
+        return result
+
+    def refresh(self):
+        """Probe now and cache the result"""
+        with self._probe_lock:
+            return self._store(self.probe())
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def get(self):
+        """
+        Cached capabilities with their age. Only the very first call waits
+        for a probe; later stale results are refreshed in the background.
+        """
+        with self._lock:
+            result = self._result
+            refresh = (result is not None and not self._refreshing
+                       and time.monotonic() - self._checked > self.ttl_seconds)
+            if refresh:
+                self._refreshing = True
+
+        if result is None:
+            with self._probe_lock:
+                # Another request may have finished the first probe while this one waited
+                result = self._result or self._store(self.probe())
+        elif refresh:
+            threading.Thread(target=self._refresh_in_background, name='ocr-capabilities', daemon=True).start()
+
+        with self._lock:
+            age = time.monotonic() - self._checked
+        return dict(result, age_seconds=round(age, 1))
+
+
+_capabilities = None
+_capabilities_lock = threading.Lock()
+
+
+def get_capabilities(config):
+    """Return the process wide capability cache configured from the Flask ``config``"""
+    global _capabilities
+    if _capabilities is None:
+        with _capabilities_lock:
+            if _capabilities is None:
+                _capabilities = CapabilityCache(
+                    pool_size=config.get('OCR_ENGINE_POOL_SIZE'),
+                    ttl_seconds=config.get('OCR_CAPABILITY_TTL_SECONDS', 300)
+                )
+    return _capabilities
+
+
+def is_ready(capabilities):
+    """Both OCR engines answered their probe"""
+    return capabilities['tesseract']['available'] and capabilities['opencv']['available']
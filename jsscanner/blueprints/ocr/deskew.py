@@ -0,0 +1,403 @@
+"""
+Deskew and Orientation Stage for the OCR Blueprints
+Samsung Electronics India - Straighten rotated sticker photos before recognition
+
+Skew and 90/180/270 degree orientation are estimated from text-line
+geometry on a downscaled, binarised copy of the image. The ink of
+character-sized connected components (barcode bars, borders and blobs are
+left out) is projected onto the normal of each candidate line direction;
+the direction with the most sharply peaked projection profile is the
+direction of the text lines. Upside-down lines are told apart by which
+edge of the block is aligned (labels are set flush left), else by where
+their densest band sits (capitals and ascenders put it below the centre
+of an upright line), else - for a single centred line of capitals and
+digits - by comparing OCR confidence on a small copy read both ways up in
+a single recognition.
+
+The image is rotated once, before OCR. Tesseract's ``--psm 1``
+orientation pass still runs when neither geometry nor a recognizer could
+tell upright from upside down. Word and region boxes are mapped back to
+the coordinates of the uncorrected image.
+"""
+
+import math
+
+from blueprints.ocr.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+
+# Orientation is estimated on a copy no larger than this
+DESKEW_MAX_DIMENSION = 800
+
+# Skew search: coarse steps over +-MAX_SKEW_DEGREES, then fine steps around the best
+MAX_SKEW_DEGREES = 15
+COARSE_STEP_DEGREES = 1.0
+FINE_STEP_DEGREES = 0.1
+
+# Smaller corrections are not worth resampling the image for
+MIN_SKEW_DEGREES = 0.3
+
+# Character-sized components: shortest side in pixels of the small copy,
+# longest side as a share of the image, and elongation (barcode bars are longer)
+MIN_CHARACTER_SIDE = 2
+MAX_CHARACTER_SHARE = 0.2
+MAX_CHARACTER_ELONGATION = 8
+
+# Fewer characters than this give no reliable line direction
+MIN_CHARACTERS = 6
+
+# Ink pixels projected per candidate angle
+MAX_POINTS = 20000
+
+# The best angle's profile must be this much sharper than the median angle's
+MIN_PEAK_RATIO = 1.15
+
+# Vertical lines must beat horizontal ones by this factor to turn the image 90 degrees
+RIGHT_ANGLE_MARGIN = 1.2
+
+# Line asymmetry below minus this turns the image upside down
+FLIP_MARGIN = 0.05
+
+# Line starts within this many line heights of each other count as aligned,
+# and the other edge must be at least ALIGNMENT_MARGIN line heights more ragged
+ALIGNED_EDGE_TOLERANCE = 0.5
+ALIGNMENT_MARGIN = 1.0
+
+# Without either cue, OCR confidence decides: a copy no larger than this and its
+# upside-down turn are read in one pass, and the turn must win by this many points
+FLIP_CHECK_MAX_DIMENSION = 1000
+FLIP_CHECK_CONFIG = '--oem 3 --psm 6'
+FLIP_CONFIDENCE_MARGIN = 5.0
+
+
+def deskew_fingerprint(config):
+    """Deskew setting as a cache fingerprint fragment"""
+    return f"deskew={'on' if config.get('OCR_DESKEW', True) else 'off'}"
+
+
+def character_components(ink):
+    """``(labels, keep)``: connected components of ``ink`` and which are character-sized"""
+    _, labels, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    widths = stats[:, cv2.CC_STAT_WIDTH]
+    heights = stats[:, cv2.CC_STAT_HEIGHT]
+    areas = stats[:, cv2.CC_STAT_AREA]
+    short_side = np.minimum(widths, heights)
+    long_side = np.maximum(widths, heights)
+    keep = ((short_side >= MIN_CHARACTER_SIDE) & (long_side <= max(ink.shape) * MAX_CHARACTER_SHARE)
+            & (long_side <= short_side * MAX_CHARACTER_ELONGATION) & (areas * 10 >= widths * heights))
+    keep[0] = False  # Label 0 is the background
+    return labels, keep
+
+
+def text_ink(gray):
+    """
+    ``(xs, ys, characters)``: coordinates of the ink pixels of character-sized
+    components on a downscaled, binarised copy of ``gray``, and how many
+    components were kept
+    """
+    # Whole-number factors take OpenCV's much faster block-averaging path
+    factor = -(-max(gray.shape[:2]) // DESKEW_MAX_DIMENSION)
+    if factor > 1:
+        gray = cv2.resize(gray, None, fx=1 / factor, fy=1 / factor, interpolation=cv2.INTER_AREA)
+
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    # Either polarity can be the text: dark on a light label, light on a dark
+    # one, or - when a label sits on a mid-grey background and the threshold
+    # falls between the two - the inverse of what the ink share suggests
+    labels, keep = character_components(ink)
+    inverse = cv2.bitwise_not(ink)
+    inverse_labels, inverse_keep = character_components(inverse)
+    if np.count_nonzero(inverse_keep) > np.count_nonzero(keep):
+        ink, labels, keep = inverse, inverse_labels, inverse_keep
+
+    ys, xs = np.nonzero(ink)
+    inside = keep[labels[ys, xs]]
+    xs, ys = xs[inside], ys[inside]
+    if len(xs) > MAX_POINTS:
+        step = -(-len(xs) // MAX_POINTS)
+        xs, ys = xs[::step], ys[::step]
+    xs = xs.astype(np.float32) - xs.mean() if len(xs) else xs.astype(np.float32)
+    ys = ys.astype(np.float32) - ys.mean() if len(ys) else ys.astype(np.float32)
+    return xs, ys, int(np.count_nonzero(keep))
+
+
+def line_profile(xs, ys, angle):
+    """
+    Projection profile of the points onto the normal of lines running at
+    ``angle`` degrees (image coordinates, y down), one bin per pixel
+    """
+    theta = math.radians(angle)
+    projection = ys * math.cos(theta) - xs * math.sin(theta)
+    return np.bincount((projection - projection.min()).astype(np.intp))
+
+
+def profile_scores(xs, ys, angles):
+    """Sum of squared bin counts per angle; higher means sharper text lines"""
+    scores = []
+    for angle in angles:
+        counts = line_profile(xs, ys, angle).astype(np.int64)
+        scores.append(float(np.dot(counts, counts)))
+    return np.asarray(scores)
+
+
+def line_runs(counts):
+    """``(start, stop)`` bins of each text line: runs of profile bins with ink"""
+    inked = np.concatenate(([False], counts > counts.max() * 0.02, [False]))
+    edges = np.flatnonzero(np.diff(inked.astype(np.int8)))
+    return [(start, stop) for start, stop in zip(edges[::2], edges[1::2]) if stop - start >= 4]
+
+
+def line_asymmetry(xs, ys, angle):
+    """
+    Where the densest band of each text line sits once the lines run at
+    ``angle`` are made horizontal: positive below the line centre (upright
+    text), negative above it (upside down), near zero for capitals and
+    digits only. Weighted by each line's ink.
+    """
+    counts = line_profile(xs, ys, angle).astype(np.float64)
+    if not counts.size:
+        return 0.0
+    weighted = total = 0.0
+    for start, stop in line_runs(counts):
+        line = counts[start:stop]
+        rows = np.arange(len(line))
+        extent = rows[line >= line.max() * 0.15]
+        core = rows[line >= line.max() * 0.5]
+        centre = (extent[0] + extent[-1]) / 2
+        height = extent[-1] - extent[0] + 1
+        weighted += (core.mean() - centre) / height * line.sum()
+        total += line.sum()
+    return weighted / total if total else 0.0
+
+
+def line_alignment(xs, ys, angle):
+    """
+    How much more ragged the line ends are than the line starts once the
+    lines run at ``angle`` are made horizontal, in median line heights:
+    positive for left-aligned text (upright), negative for text whose
+    aligned edge is on the right (upside down), near zero for centred
+    text, a single line or lines that are all alike. Works for capitals
+    and digits, which have no ascenders.
+    """
+    theta = math.radians(angle)
+    along = xs * math.cos(theta) + ys * math.sin(theta)
+    across = ys * math.cos(theta) - xs * math.sin(theta)
+    bins = (across - across.min()).astype(np.intp)
+    if not bins.size:
+        return 0.0
+    starts, ends, heights = [], [], []
+    for start, stop in line_runs(np.bincount(bins)):
+        line = along[(bins >= start) & (bins < stop)]
+        starts.append(np.percentile(line, 1))
+        ends.append(np.percentile(line, 99))
+        heights.append(stop - start)
+    if len(starts) < 2:
+        return 0.0
+    height = float(np.median(heights))
+    start_spread, end_spread = np.ptp(starts), np.ptp(ends)
+    # One edge has to be (nearly) straight for the lines to be aligned at all
+    if min(start_spread, end_spread) > height * ALIGNED_EDGE_TOLERANCE:
+        return 0.0
+    return float(end_spread - start_spread) / height
+
+
+def estimate_orientation(gray):
+    """
+    Orientation of the text in a grayscale or binarised array. Returns
+    ``{'rotation', 'skew', 'angle', 'characters', 'confidence', 'flip_cue'}``:
+    ``angle`` is the counter-clockwise rotation in degrees that makes the
+    text upright, split into a multiple of 90 (``rotation``) and the
+    remaining ``skew``. Both are 0 when no line direction stands out.
+    ``flip_cue`` names what told upright from upside down ('alignment' or
+    'ascenders'); it is None when neither did, and the text may then be
+    upside down.
+    """
+    xs, ys, characters = text_ink(gray)
+    orientation = {'rotation': 0, 'skew': 0.0, 'angle': 0.0, 'characters': characters, 'confidence': 0.0,
+                   'flip_cue': None}
+    if characters < MIN_CHARACTERS:
+        return orientation
+
+    coarse = np.arange(-MAX_SKEW_DEGREES, MAX_SKEW_DEGREES + COARSE_STEP_DEGREES / 2, COARSE_STEP_DEGREES)
+    horizontal = profile_scores(xs, ys, coarse)
+    vertical = profile_scores(xs, ys, coarse + 90)
+    base, scores = (90, vertical) if vertical.max() > horizontal.max() * RIGHT_ANGLE_MARGIN else (0, horizontal)
+
+    # A flat curve means no dominant line direction: a single glyph, a photo, noise
+    confidence = float(scores.max() / max(np.median(scores), 1.0))
+    orientation['confidence'] = round(confidence, 2)
+    if confidence < MIN_PEAK_RATIO:
+        return orientation
+
+    best = coarse[int(np.argmax(scores))]
+    fine = np.arange(best - COARSE_STEP_DEGREES, best + COARSE_STEP_DEGREES + FINE_STEP_DEGREES / 2,
+                     FINE_STEP_DEGREES)
+    skew = float(fine[int(np.argmax(profile_scores(xs, ys, fine + base)))])
+
+    angle = base + skew
+    alignment = line_alignment(xs, ys, angle)
+    asymmetry = line_asymmetry(xs, ys, angle)
+    if abs(alignment) >= ALIGNMENT_MARGIN:
+        flip, orientation['flip_cue'] = alignment < 0, 'alignment'
+    elif abs(asymmetry) >= FLIP_MARGIN:
+        flip, orientation['flip_cue'] = asymmetry < 0, 'ascenders'
+    else:
+        flip = False
+    if flip:
+        angle += 180
+    angle = angle % 360
+    if angle > 180:
+        angle -= 360
+    rotation = int(round(angle / 90)) % 4 * 90
+    orientation.update(rotation=rotation, skew=round(skew, 1), angle=round(angle, 1))
+    return orientation
+
+
+def rotation_matrix(size, rotation, skew):
+    """
+    2x3 affine matrix and output size that turn an image of ``size``
+    (width, height) counter-clockwise by ``rotation`` + ``skew`` degrees on
+    an enlarged canvas
+    """
+    width, height = size
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), rotation + skew, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    new_width = int(round(height * sin + width * cos))
+    new_height = int(round(height * cos + width * sin))
+    matrix[0, 2] += new_width / 2 - width / 2
+    matrix[1, 2] += new_height / 2 - height / 2
+    return matrix, (new_width, new_height)
+
+
+def rotate_array(array, rotation, skew, binary=False):
+    """
+    ``array`` turned upright, and the affine matrix from its coordinates to
+    the result's. Right angles are exact transposes; only the skew is
+    interpolated, and a binarised ``array`` is thresholded again after it.
+    """
+    height, width = array.shape[:2]
+    turns = rotation // 90 % 4
+    # np.rot90 turns counter-clockwise; the matrix maps pixel edges (box coordinates)
+    right_angle = {
+        0: [[1, 0, 0], [0, 1, 0]],
+        1: [[0, 1, 0], [-1, 0, width]],
+        2: [[-1, 0, width], [0, -1, height]],
+        3: [[0, -1, height], [1, 0, 0]]
+    }[turns]
+    matrix = np.vstack([np.asarray(right_angle, dtype=np.float64), [0, 0, 1]])
+    array = np.ascontiguousarray(np.rot90(array, turns)) if turns else array
+
+    if abs(skew) >= MIN_SKEW_DEGREES:
+        height, width = array.shape[:2]
+        skew_matrix, size = rotation_matrix((width, height), 0, skew)
+        background = 255 if cv2.mean(array)[0] > 127 else 0
+        array = cv2.warpAffine(array, skew_matrix, size, flags=cv2.INTER_LINEAR,
+                               borderMode=cv2.BORDER_CONSTANT, borderValue=background)
+        if binary:
+            cv2.threshold(array, 127, 255, cv2.THRESH_BINARY, dst=array)
+        matrix = np.vstack([skew_matrix, [0, 0, 1]]) @ matrix
+    return array, matrix[:2]
+
+
+def flip_by_confidence(array, recognizer):
+    """
+    Whether ``array`` (already straightened) reads better upside down. A
+    downscaled copy is stacked above its 180 degree turn, so one recognition
+    scores both: ``recognizer`` returns ``(centre_y, confidence)`` per word,
+    and the lower, turned half has to win by FLIP_CONFIDENCE_MARGIN.
+    """
+    factor = -(-max(array.shape[:2]) // FLIP_CHECK_MAX_DIMENSION)
+    if factor > 1:
+        array = cv2.resize(array, None, fx=1 / factor, fy=1 / factor, interpolation=cv2.INTER_AREA)
+    height = array.shape[0]
+    # A blank band keeps the two copies in separate text lines
+    gap = max(height // 4, 8)
+    canvas = np.full((2 * height + gap,) + array.shape[1:], np.median(array), dtype=array.dtype)
+    canvas[:height] = array
+    canvas[height + gap:] = array[::-1, ::-1]
+
+    halves = ([], [])
+    for centre, confidence in recognizer(canvas):
+        halves[centre >= height + gap / 2].append(confidence)
+    upright, turned = (sum(half) / len(half) if half else 0.0 for half in halves)
+    return turned > upright + FLIP_CONFIDENCE_MARGIN
+
+
+def confidence_recognizer(engine_pool, config=FLIP_CHECK_CONFIG):
+    """``recognizer`` for ``deskew_array``: word centres and confidences from an OCR engine pool"""
+    def recognizer(array):
+        data = engine_pool.recognize(array, config)['data']
+        return [(top + height / 2, float(conf))
+                for top, height, conf, text in zip(data['top'], data['height'], data['conf'], data['text'])
+                if float(conf) > 0 and str(text).strip()]
+    return recognizer
+
+
+def deskew_array(array, binary=False, recognizer=None):
+    """
+    Estimate and correct the orientation of a grayscale or binarised
+    array. Returns ``(array, orientation, matrix)``; ``matrix`` is None and
+    ``array`` is returned unchanged when no correction is needed. When the
+    text lines give no upright/upside-down cue, ``recognizer`` (a callable
+    scoring an array, see ``confidence_recognizer``) settles it, and
+    ``flip_cue`` becomes 'ocr'.
+    """
+    orientation = estimate_orientation(array)
+    rotation, skew = orientation['rotation'], orientation['skew']
+    turned = rotation or abs(skew) >= MIN_SKEW_DEGREES
+    undecided = orientation['flip_cue'] is None and orientation['confidence'] >= MIN_PEAK_RATIO
+    if undecided and recognizer is not None:
+        candidate = rotate_array(array, rotation, skew, binary)[0] if turned else array
+        try:
+            flip = flip_by_confidence(candidate, recognizer)
+        except (ImportError, OSError, RuntimeError):
+            # No OCR engine installed, or it failed; the orientation stays undecided
+            flip = None
+        if flip:
+            rotation = (rotation + 180) % 360
+            angle = (orientation['angle'] + 180) % 360
+            orientation.update(rotation=rotation, angle=round(angle - 360 if angle > 180 else angle, 1))
+            turned = True
+        if flip is not None:
+            orientation['flip_cue'] = 'ocr'
+
+    orientation['corrected'] = bool(turned)
+    if not turned:
+        return array, orientation, None
+    array, matrix = rotate_array(array, rotation, skew, binary)
+    return array, orientation, matrix
+
+
+def deskew_image(image, recognizer=None):
+    """``deskew_array`` for a PIL image; the image is converted to grayscale"""
+    gray = np.asarray(image if image.mode == 'L' else image.convert('L'))
+    corrected, orientation, matrix = deskew_array(gray, recognizer=recognizer)
+    if matrix is None:
+        return image, orientation, None
+    return Image.fromarray(corrected), orientation, matrix
+
+
+def restore_boxes(items, matrix, size):
+    """
+    Map box coordinates measured on a corrected image back to the image
+    before correction (``size`` is its width and height): each box becomes
+    the bounding box of its rotated corners
+    """
+    if matrix is None or not items:
+        return items
+    inverse = cv2.invertAffineTransform(np.asarray(matrix, dtype=np.float64))
+    width, height = size
+    for item in items:
+        x_key, y_key = ('x', 'y') if 'x' in item else ('left', 'top')
+        if x_key not in item or 'width' not in item:
+            continue
+        x, y, w, h = item[x_key], item[y_key], item['width'], item['height']
+        corners = np.array([[x, y, 1], [x + w, y, 1], [x, y + h, 1], [x + w, y + h, 1]], dtype=np.float64)
+        mapped = corners @ inverse.T
+        x1, y1 = np.clip(mapped.min(axis=0), 0, (width, height))
+        x2, y2 = np.clip(mapped.max(axis=0), 0, (width, height))
+        item[x_key], item[y_key] = int(round(x1)), int(round(y1))
+        item['width'], item['height'] = int(round(x2 - x1)), int(round(y2 - y1))
+    return items
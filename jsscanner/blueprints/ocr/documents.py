@@ -0,0 +1,184 @@
+"""
+Multi-page Document OCR Helpers shared by the OCR Blueprints
+Samsung Electronics India - Scanned shipping documents, one page at a time
+
+A document upload (multi-page TIFF, PDF, or any single image) is spooled to
+a temporary file instead of being held in memory, and memory-mapped. Pages
+are decoded one at a time by a generator and OCR'd on the batch thread pool,
+and each page's result is streamed back as an NDJSON line as soon as it
+completes. Only ``OCR_BATCH_MAX_IN_FLIGHT`` decoded pages exist at any time,
+so peak memory does not grow with the page count.
+
+PDF pages are rendered with the optional ``pypdfium2`` package.
+"""
+
+import mmap
+import os
+import shutil
+import tempfile
+import time
+
+from flask import current_app
+
+from blueprints.ocr.batch import iter_batch_results
+from blueprints.ocr.image_decode import decode_settings, fit_image
+from blueprints.ocr.lazy import lazy_import
+from blueprints.ocr.wire import binary_options
+
+Image = lazy_import('PIL.Image')
+ImageOps = lazy_import('PIL.ImageOps')
+
+# Optional dependency - PDF documents are rejected without it
+pdfium = lazy_import('pypdfium2')
+
+# Spooling chunk size for raw request bodies
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+# PDF pages are measured in points
+POINTS_PER_INCH = 72
+
+
+def spool_upload(stream, spool_dir=None):
+    """
+    A readable file holding ``stream``. Werkzeug already spools large
+    multipart files to disk; those are reused through a duplicated
+    descriptor (Flask closes request files before a streamed response
+    runs). Raw bodies and small in-memory uploads are copied to a
+    temporary file in chunks.
+    """
+    try:
+        return os.fdopen(os.dup(stream.fileno()), 'rb')
+    except (AttributeError, OSError, ValueError):
+        pass
+    spool = tempfile.TemporaryFile(dir=spool_dir)
+    shutil.copyfileobj(stream, spool, SPOOL_CHUNK_BYTES)
+    spool.flush()
+    return spool
+
+
+class SpooledDocument:
+    """
+    A spooled, memory-mapped document whose pages are decoded on demand.
+    Raises ``ValueError`` for empty or unreadable documents.
+    """
+
+    def __init__(self, file, max_pages=None):
+        self.file = file
+        self.size = os.fstat(file.fileno()).st_size
+        if not self.size:
+            file.close()
+            raise ValueError('No document provided')
+
+        self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._pdf = None
+        self._image = None
+        try:
+            if self.buffer[:5] == b'%PDF-':
+                if not pdfium.available():
+                    raise ValueError('PDF documents need the optional pypdfium2 package')
+                self.format = 'PDF'
+                # pdfium reads the objects of each page it renders through the spool file
+                self._pdf = pdfium.PdfDocument(file)
+                self.page_count = len(self._pdf)
+            else:
+                try:
+                    self._image = Image.open(self.buffer)
+                except Exception:
+                    raise ValueError('Unsupported document type. Send a TIFF, PDF or image file')
+                self.format = self._image.format
+                self.page_count = getattr(self._image, 'n_frames', 1)
+        except Exception:
+            self.close()
+            raise
+
+        if max_pages and self.page_count > max_pages:
+            self.close()
+            raise ValueError(f'Document has {self.page_count} pages; at most {max_pages} are allowed')
+
+    def info(self):
+        return {'format': self.format, 'pages': self.page_count, 'bytes': self.size}
+
+    def _render_pdf_page(self, index, dpi, max_dimension):
+        page = self._pdf[index]
+        try:
+            # Render straight at the decode size instead of downscaling a full-resolution bitmap
+            scale = dpi / POINTS_PER_INCH
+            if max_dimension:
+                scale = min(scale, max_dimension / max(page.get_size()))
+            return page.render(scale=scale).to_pil()
+        finally:
+            page.close()
+
+    def _decode_frame(self, index):
+        self._image.seek(index)
+        # Bilevel and palette scans are widened to 8 bits; convert() also loads the frame
+        frame = self._image.convert('L' if self._image.mode in ('1', 'L', 'I;16', 'I', 'F') else 'RGB')
+        return ImageOps.exif_transpose(frame)
+
+    def pages(self, config):
+        """
+        Yield ``(name, image)`` for each page, decoded only when the
+        consumer asks for it and fitted to the app's decode settings
+        """
+        settings = decode_settings(config)
+        dpi = config.get('OCR_DOCUMENT_DPI', 300)
+        for index in range(self.page_count):
+            if self._pdf is not None:
+                page = self._render_pdf_page(index, dpi, settings['max_dimension'])
+            else:
+                page = self._decode_frame(index)
+            yield f'page_{index + 1}', fit_image(page, **settings)
+
+    def close(self):
+        if self._image is not None:
+            self._image.close()
+        if self._pdf is not None:
+            self._pdf.close()
+        self.buffer.close()
+        self.file.close()
+
+
+def document_options(req):
+    """
+    Options from the multipart form, or from the query string and
+    ``X-OCR-*`` headers of a raw body. The quality check is off unless
+    requested: bilevel scans are fully clipped by design.
+    """
+    options = req.form.to_dict() if req.files else binary_options(req)
+    options.setdefault('quality', '0')
+    return options
+
+
+def open_document(req):
+    """
+    Spool and open the document of a request: a multipart ``file`` or the
+    raw request body. Must be called inside the view.
+    """
+    spool_dir = current_app.config.get('OCR_DOCUMENT_SPOOL_DIR')
+    if req.files:
+        upload = req.files.get('file')
+        if upload is None or not upload.filename:
+            raise ValueError('No file uploaded')
+        file = spool_upload(upload.stream, spool_dir)
+    else:
+        file = spool_upload(req.stream, spool_dir)
+    return SpooledDocument(file, current_app.config.get('OCR_DOCUMENT_MAX_PAGES'))
+
+
+def iter_document_results(document, process, results_key='ocr_results'):
+    """
+    Stream a document: a ``document`` line, one line per page in completion
+    order (``index`` is the zero-based page number), then a summary. The
+    spool file is closed when the stream ends or the client goes away.
+    """
+    app = current_app._get_current_object()
+    started = time.perf_counter()
+    try:
+        yield {'document': document.info()}
+        for result in iter_batch_results(document.pages(app.config), process, results_key=results_key):
+            if 'summary' in result:
+                result['summary']['pages_per_second'] = round(
+                    result['summary']['total'] / max(time.perf_counter() - started, 1e-6), 2)
+            yield result
+    finally:
+        document.close()
@@ -0,0 +1,385 @@
+"""
+Tesseract Engine Pool for the OCR Blueprints
+Samsung Electronics India - Long-lived OCR engines shared by every endpoint
+
+Each engine is created once per language/OEM combination and reused across
+requests, so the trained model is loaded a single time instead of on every
+call. The engines run in-process through ``tesserocr``. If the binding or
+its language data is missing the pool falls back to ``pytesseract``, which
+starts a tesseract process (and loads the model) for every call, and limits
+how many of them may run at once so bursts do not oversubscribe the machine.
+"""
+
+import logging
+import os
+import queue
+import shlex
+import sys
+import threading
+from contextlib import contextmanager
+
+from blueprints.ocr.lazy import lazy_import
+
+np = lazy_import('numpy')
+pytesseract = lazy_import('pytesseract')
+
+# The pool falls back to pytesseract subprocesses when the binding is missing
+tesserocr = lazy_import('tesserocr')
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGE = 'eng'
+DEFAULT_OEM = 3
+DEFAULT_PSM = 6
+
+# Where the tesseract packages (Debian/Ubuntu, Alpine, Homebrew) and the
+# tessdata.* wheels install the models, searched when TESSDATA_PREFIX is unset
+TESSDATA_DIRS = (
+    '/usr/share/tesseract-ocr/5/tessdata',
+    '/usr/share/tesseract-ocr/4.00/tessdata',
+    '/usr/share/tessdata',
+    '/usr/local/share/tessdata',
+    '/opt/homebrew/share/tessdata',
+    os.path.join(sys.prefix, 'share', 'tessdata')
+)
+
+# Columns returned by pytesseract.image_to_data(output_type=Output.DICT)
+DATA_COLUMNS = ('level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+                'left', 'top', 'width', 'height', 'conf', 'text')
+
+
+def default_pool_size():
+    """One engine per CPU core"""
+    return os.cpu_count() or 1
+
+
+def tessdata_path():
+    """
+    Directory holding the ``.traineddata`` models. The tesserocr wheels bundle
+    libtesseract but not its language data, and their built-in search path
+    does not point at where the tesseract packages put it.
+    """
+    prefix = os.environ.get('TESSDATA_PREFIX')
+    if prefix:
+        return prefix
+    for directory in TESSDATA_DIRS:
+        if os.path.exists(os.path.join(directory, f'{DEFAULT_LANGUAGE}.traineddata')):
+            return directory
+    return None
+
+
+def default_backend(path):
+    """``tesserocr`` when the binding can load the default language, else ``pytesseract``"""
+    if not tesserocr.available():
+        logger.warning('tesserocr is not installed; every OCR call starts a tesseract process')
+        return 'pytesseract'
+    _, languages = tesserocr.get_languages(path) if path else tesserocr.get_languages()
+    if DEFAULT_LANGUAGE not in languages:
+        logger.warning(f"tesserocr found no '{DEFAULT_LANGUAGE}' model (set TESSDATA_PREFIX); "
+                       'every OCR call starts a tesseract process')
+        return 'pytesseract'
+    return 'tesserocr'
+
+
+def parse_tesseract_config(config):
+    """
+    Split a tesseract command line config into its parts.
+
+    Returns a dict with ``lang``, ``oem``, ``psm``, ``variables`` (``-c``
+    options) and ``extra`` (anything the in-process engine cannot apply).
+    """
+    parsed = {
+        'lang': DEFAULT_LANGUAGE,
+        'oem': DEFAULT_OEM,
+        'psm': DEFAULT_PSM,
+        'variables': {},
+        'extra': []
+    }
+    tokens = shlex.split(config or '')
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        value = tokens[i + 1] if i + 1 < len(tokens) else None
+        if token == '-l' and value is not None:
+            parsed['lang'] = value
+            i += 2
+        elif token == '--oem' and value is not None and value.isdigit():
+            parsed['oem'] = int(value)
+            i += 2
+        elif token == '--psm' and value is not None and value.isdigit():
+            parsed['psm'] = int(value)
+            i += 2
+        elif token == '-c' and value is not None and '=' in value:
+            name, var_value = value.split('=', 1)
+            parsed['variables'][name] = var_value
+            i += 2
+        else:
+            parsed['extra'].append(token)
+            i += 1
+    return parsed
+
+
+def text_from_data(data):
+    """
+    Rebuild the plain text layout from image_to_data output.
+
+    Words are joined by spaces, lines by newlines and blocks/paragraphs by a
+    blank line, matching what image_to_string returns for the same pass.
+    """
+    lines = []
+    current_key = None
+    current_words = []
+    last_par = None
+
+    for i in range(len(data['text'])):
+        word = data['text'][i]
+        if not word or not str(word).strip():
+            continue
+        key = (data['page_num'][i], data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        if key != current_key:
+            if current_words:
+                lines.append(' '.join(current_words))
+            par = key[:3]
+            if last_par is not None and par != last_par:
+                lines.append('')
+            last_par = par
+            current_key = key
+            current_words = []
+        current_words.append(str(word))
+
+    if current_words:
+        lines.append(' '.join(current_words))
+    return '\n'.join(lines)
+
+
+def run_tesseract_once(image, config):
+    """
+    One tesseract process writing both the plain text and the TSV word data,
+    so ``text`` is exactly what image_to_string returns for the same pass
+    """
+    module = pytesseract.pytesseract
+    config = f"-c tessedit_create_txt=1 -c tessedit_create_tsv=1 {config or ''}".strip()
+    with module.save(image) as (temp_name, input_filename):
+        module.run_tesseract(input_filename, temp_name, 'txt tsv', None, config)
+        text = module._read_output(f'{temp_name}.txt')
+        tsv = module._read_output(f'{temp_name}.tsv')
+    return {'text': text, 'data': module.file_to_dict(tsv, '\t', -1)}
+
+
+class InProcessEngine:
+    """A single tesserocr API handle with its model loaded"""
+
+    def __init__(self, lang, oem, path=None):
+        self.lang = lang
+        self.oem = oem
+        options = {'path': path} if path else {}
+        self.api = tesserocr.PyTessBaseAPI(lang=lang, oem=oem, **options)
+
+    @contextmanager
+    def _configured(self, image, psm, variables):
+        previous = {}
+        for name, value in variables.items():
+            previous[name] = self.api.GetVariableAsString(name)
+            self.api.SetVariable(name, value)
+        self.api.SetPageSegMode(psm)
+        if isinstance(image, np.ndarray) and image.ndim == 2:
+            # Hand grayscale buffers over directly, one byte per pixel
+            height, width = image.shape
+            self.api.SetImageBytes(np.ascontiguousarray(image).tobytes(), width, height, 1, width)
+        else:
+            self.api.SetImage(image)
+        try:
+            yield self.api
+        finally:
+            self.api.Clear()
+            for name, value in previous.items():
+                if value is not None:
+                    self.api.SetVariable(name, value)
+
+    def image_to_string(self, image, psm, variables):
+        with self._configured(image, psm, variables) as api:
+            return api.GetUTF8Text()
+
+    def image_to_data(self, image, psm, variables):
+        with self._configured(image, psm, variables) as api:
+            api.Recognize()
+            return self._word_data(api)
+
+    def recognize(self, image, psm, variables):
+        with self._configured(image, psm, variables) as api:
+            api.Recognize()
+            # GetUTF8Text reuses the finished recognition
+            return {'text': api.GetUTF8Text(), 'data': self._word_data(api)}
+
+    @staticmethod
+    def _word_data(api):
+        data = {column: [] for column in DATA_COLUMNS}
+        iterator = api.GetIterator()
+        if iterator is None:
+            return data
+
+        block_num = par_num = line_num = word_num = 0
+        level = tesserocr.RIL.WORD
+        for word in tesserocr.iterate_level(iterator, level):
+            if word.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+                block_num += 1
+                par_num = line_num = 0
+            if word.IsAtBeginningOf(tesserocr.RIL.PARA):
+                par_num += 1
+                line_num = 0
+            if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                line_num += 1
+                word_num = 0
+            word_num += 1
+
+            bbox = word.BoundingBox(level)
+            if bbox is None:
+                continue
+            x1, y1, x2, y2 = bbox
+            data['level'].append(5)
+            data['page_num'].append(1)
+            data['block_num'].append(block_num)
+            data['par_num'].append(par_num)
+            data['line_num'].append(line_num)
+            data['word_num'].append(word_num)
+            data['left'].append(x1)
+            data['top'].append(y1)
+            data['width'].append(x2 - x1)
+            data['height'].append(y2 - y1)
+            data['conf'].append(round(word.Confidence(level), 2))
+            data['text'].append(word.GetUTF8Text(level) or '')
+        return data
+
+    def close(self):
+        self.api.End()
+
+
+class TesseractEnginePool:
+    """
+    Pool of long-lived Tesseract engines keyed by (language, OEM).
+
+    At most ``size`` recognitions run concurrently for each key. Engines are
+    created lazily on first use and handed back to the pool afterwards.
+    """
+
+    def __init__(self, size=None, backend=None):
+        self.size = size or default_pool_size()
+        self.tessdata = tessdata_path()
+        if backend is None:
+            backend = default_backend(self.tessdata)
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._created = {}
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._calls = 0
+
+    # ------------------------------------------------------------------
+    # Engine checkout
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _engine(self, lang, oem):
+        key = (lang, oem)
+        with self._lock:
+            idle = self._idle.setdefault(key, queue.LifoQueue())
+            self._calls += 1
+            create = idle.empty() and self._created.get(key, 0) < self.size
+            if create:
+                self._created[key] = self._created.get(key, 0) + 1
+
+        if create:
+            try:
+                engine = InProcessEngine(lang, oem, self.tessdata)
+            except Exception:
+                with self._lock:
+                    self._created[key] -= 1
+                raise
+        else:
+            engine = idle.get()
+
+        try:
+            yield engine
+        finally:
+            idle.put(engine)
+
+    def _use_in_process(self, parsed):
+        return self.backend == 'tesserocr' and not parsed['extra']
+
+    # ------------------------------------------------------------------
+    # Recognition API
+    # ------------------------------------------------------------------
+    def image_to_string(self, image, config=None):
+        """Recognise ``image`` (PIL image or grayscale ndarray) and return the plain text"""
+        parsed = parse_tesseract_config(config)
+        if self._use_in_process(parsed):
+            with self._engine(parsed['lang'], parsed['oem']) as engine:
+                return engine.image_to_string(image, parsed['psm'], parsed['variables'])
+
+        with self._slots:
+            with self._lock:
+                self._calls += 1
+            return pytesseract.image_to_string(image, config=config or '')
+
+    def image_to_data(self, image, config=None):
+        """Recognise ``image`` and return word level data (pytesseract DICT layout)"""
+        parsed = parse_tesseract_config(config)
+        if self._use_in_process(parsed):
+            with self._engine(parsed['lang'], parsed['oem']) as engine:
+                return engine.image_to_data(image, parsed['psm'], parsed['variables'])
+
+        with self._slots:
+            with self._lock:
+                self._calls += 1
+            return pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT,
+                                             config=config or '')
+
+    def recognize(self, image, config=None):
+        """
+        Run a single recognition pass and return both text and word data.
+
+        Replaces the image_to_string + image_to_data pair, which recognised
+        the same image twice; ``text`` is still image_to_string's output.
+        """
+        parsed = parse_tesseract_config(config)
+        if self._use_in_process(parsed):
+            with self._engine(parsed['lang'], parsed['oem']) as engine:
+                return engine.recognize(image, parsed['psm'], parsed['variables'])
+
+        with self._slots:
+            with self._lock:
+                self._calls += 1
+            return run_tesseract_once(image, config or '')
+
+    def stats(self):
+        """Pool state for health endpoints"""
+        with self._lock:
+            engines = {f"{lang}/oem{oem}": count for (lang, oem), count in self._created.items()}
+            return {
+                'backend': self.backend,
+                'tessdata': self.tessdata,
+                'size': self.size,
+                'engines': engines,
+                'calls': self._calls
+            }
+
+    def close(self):
+        """Release every idle in-process engine"""
+        with self._lock:
+            for key, idle in self._idle.items():
+                while not idle.empty():
+                    idle.get_nowait().close()
+                    self._created[key] -= 1
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_engine_pool(size=None):
+    """Return the process wide engine pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = TesseractEnginePool(size=size)
+    return _pool
@@ -0,0 +1,240 @@
+"""
+Live Camera Frame Streams
+Samsung Electronics India - Real-time sticker OCR without re-running the pipeline on every frame
+
+Frames arrive on one long request body, each prefixed with its length as a
+4-byte big-endian unsigned integer (a zero length ends the stream). A reader
+thread keeps only the newest unprocessed frame, so a slow pipeline skips
+stale frames instead of queueing them. Every frame the worker picks up is
+reduced to a 256-bit difference hash from a tiny draft decode; frames within
+a few bits of the last processed frame are dropped before the full decode.
+"""
+
+import io
+import struct
+import threading
+import time
+
+from blueprints.ocr.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+
+FRAME_HEADER = struct.Struct('>I')
+
+# Side of the difference hash grid (HASH_SIZE x HASH_SIZE bits)
+HASH_SIZE = 16
+
+
+class FrameStreamError(ValueError):
+    """Malformed or oversized frame stream"""
+
+
+def read_exact(stream, size):
+    """Read exactly ``size`` bytes, or None if the stream ends first"""
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = stream.read(remaining)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def iter_frames(stream, max_frame_bytes):
+    """Yield length-prefixed frames from ``stream`` until a zero length or EOF"""
+    while True:
+        header = read_exact(stream, FRAME_HEADER.size)
+        if header is None:
+            return
+        (size,) = FRAME_HEADER.unpack(header)
+        if size == 0:
+            return
+        if size > max_frame_bytes:
+            raise FrameStreamError(f"Frame of {size} bytes exceeds the {max_frame_bytes} byte limit")
+        frame = read_exact(stream, size)
+        if frame is None:
+            raise FrameStreamError('Stream ended inside a frame')
+        yield frame
+
+
+def frame_hash(frame_bytes):
+    """
+    256-bit difference hash of an encoded frame. JPEGs are decoded in draft
+    mode at 1/8 scale, so hashing costs a fraction of a full decode.
+    """
+    image = Image.open(io.BytesIO(frame_bytes))
+    image.draft('L', (HASH_SIZE * 4, HASH_SIZE * 4))
+    gray = np.asarray(image.convert('L'))
+    small = cv2.resize(gray, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = np.packbits(small[:, 1:] > small[:, :-1])
+    return int.from_bytes(bits.tobytes(), 'big')
+
+
+def hash_distance(a, b):
+    """Number of differing bits between two frame hashes"""
+    return bin(a ^ b).count('1')
+
+
+class LatestFrame:
+    """
+    Single-slot handoff from the reader thread to the worker. Putting a
+    frame replaces any frame the worker has not taken yet.
+    """
+
+    def __init__(self, source=None):
+        self._condition = threading.Condition()
+        self._frame = None
+        self.source = source
+        self.stopped = threading.Event()
+        self.closed = False
+        self.error = None
+        self.received = 0
+        self.coalesced = 0
+
+    def put(self, index, frame):
+        with self._condition:
+            if self.stopped.is_set():
+                return
+            if self._frame is not None:
+                self.coalesced += 1
+            self._frame = (index, frame)
+            self.received += 1
+            self._condition.notify()
+
+    def close(self, error=None):
+        with self._condition:
+            self.closed = True
+            self.error = error
+            self._condition.notify()
+
+    def stop(self):
+        """
+        Tell the reader to stop and close its source, so a reader blocked on
+        a client that went away does not keep the thread and its buffered
+        frame alive
+        """
+        self.stopped.set()
+        with self._condition:
+            self.closed = True
+            self._frame = None
+            self._condition.notify()
+        if self.source is not None:
+            try:
+                self.source.close()
+            except Exception:
+                pass
+
+    def take(self, timeout=None):
+        """
+        Newest pending ``(index, frame)``. Returns None once the stream is
+        closed and drained, or when nothing arrives within ``timeout``.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._frame is None and not self.closed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+            frame, self._frame = self._frame, None
+            return frame
+
+
+def start_reader(stream, max_frame_bytes):
+    """
+    Read frames from ``stream`` on a daemon thread into a ``LatestFrame``;
+    ``LatestFrame.stop`` ends the thread
+    """
+    latest = LatestFrame(stream)
+
+    def read():
+        try:
+            for index, frame in enumerate(iter_frames(stream, max_frame_bytes)):
+                if latest.stopped.is_set():
+                    return
+                latest.put(index, frame)
+            latest.close()
+        except Exception as e:
+            # Reads fail once stop() has closed the source; that is not a stream error
+            if not latest.stopped.is_set():
+                latest.close(str(e))
+
+    threading.Thread(target=read, name='ocr-frame-reader', daemon=True).start()
+    return latest
+
+
+def normalise_text(text):
+    return ' '.join((text or '').split())
+
+
+def iter_stream_results(latest, recognise, dedup_distance, idle_timeout):
+    """
+    Process frames from ``latest`` and yield a result whenever the
+    recognised text changes, then a summary.
+
+    ``recognise(frame_bytes)`` returns an OCR result dict with
+    ``extracted_text``. Frames whose hash is within ``dedup_distance`` bits
+    of the last processed frame are skipped. The reader is stopped when
+    the generator finishes or is closed (the client went away).
+    """
+    try:
+        yield from process_stream(latest, recognise, dedup_distance, idle_timeout)
+    finally:
+        latest.stop()
+
+
+def process_stream(latest, recognise, dedup_distance, idle_timeout):
+    """The body of ``iter_stream_results``"""
+    started = time.perf_counter()
+    stats = {'processed': 0, 'skipped_duplicate': 0, 'failed': 0, 'emitted': 0}
+    last_hash = None
+    last_text = None
+
+    while True:
+        item = latest.take(idle_timeout)
+        if item is None:
+            if latest.error is None and not latest.closed:
+                latest.close('Idle timeout waiting for frames')
+            break
+        index, frame = item
+
+        frame_started = time.perf_counter()
+        try:
+            current_hash = frame_hash(frame)
+        except Exception as e:
+            stats['failed'] += 1
+            yield {'frame': index, 'error': f'Undecodable frame: {str(e)}'}
+            continue
+        if last_hash is not None and hash_distance(current_hash, last_hash) <= dedup_distance:
+            stats['skipped_duplicate'] += 1
+            continue
+        last_hash = current_hash
+
+        results = recognise(frame)
+        stats['processed'] += 1
+        if 'error' in results:
+            stats['failed'] += 1
+            yield {'frame': index, 'error': results['error']}
+            continue
+
+        text = normalise_text(results.get('extracted_text'))
+        if text == last_text:
+            continue
+        last_text = text
+        stats['emitted'] += 1
+        yield {
+            'frame': index,
+            'text': results.get('extracted_text', ''),
+            'ocr_confidence': results.get('ocr_confidence'),
+            'elapsed_ms': round((time.perf_counter() - frame_started) * 1000, 2)
+        }
+
+    summary = dict(stats, received=latest.received, coalesced=latest.coalesced,
+                   elapsed_ms=round((time.perf_counter() - started) * 1000, 2))
+    if latest.error:
+        summary['error'] = latest.error
+    yield {'summary': summary}
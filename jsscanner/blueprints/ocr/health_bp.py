@@ -0,0 +1,43 @@
+"""
+Flask Blueprint for Liveness and Readiness Probes
+Samsung Electronics India - Cheap health checks for the orchestrator
+
+Liveness only proves the worker answers requests. Readiness reports the
+cached capability probe (``capabilities``), so neither endpoint runs OCR or
+starts a tesseract process when it is polled.
+"""
+
+import os
+import time
+from datetime import datetime
+from flask import Blueprint, jsonify, current_app
+
+from blueprints.ocr.capabilities import get_capabilities, is_ready
+from blueprints.ocr.process_pool import pool_stats
+
+# Create blueprint
+health_bp = Blueprint('health', __name__, url_prefix='/health')
+
+STARTED = time.monotonic()
+
+@health_bp.route('/live')
+def liveness():
+    """The worker is up and serving requests"""
+    return jsonify({
+        'status': 'alive',
+        'pid': os.getpid(),
+        'uptime_seconds': round(time.monotonic() - STARTED, 1),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@health_bp.route('/ready')
+def readiness():
+    """Tesseract and OpenCV passed their last (cached) capability probe"""
+    capabilities = get_capabilities(current_app.config).get()
+    ready = is_ready(capabilities)
+    return jsonify({
+        'status': 'ready' if ready else 'not_ready',
+        'capabilities': capabilities,
+        'execution': pool_stats(current_app.config),
+        'timestamp': datetime.now().isoformat()
+    }), 200 if ready else 503
@@ -0,0 +1,122 @@
+"""
+Shared Image Decode Stage for the OCR Blueprints
+Samsung Electronics India - Decode sticker photos once, at the resolution OCR needs
+
+JPEGs are decoded at reduced scale (DCT draft mode) when the photo is larger
+than the configured maximum dimension, EXIF orientation is applied once, and
+the result is normalised to a maximum dimension and optionally to a target
+text height before any preprocessing runs.
+"""
+
+import io
+import math
+
+from flask import current_app
+
+from blueprints.ocr.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+ImageOps = lazy_import('PIL.ImageOps')
+
+# Text height estimation runs on a copy no larger than this
+ESTIMATE_MAX_DIMENSION = 800
+
+# Never scale by more than this to reach the target text height
+MAX_TEXT_UPSCALE = 2.0
+
+
+def decode_settings(config):
+    """Decode options from the Flask config"""
+    return {
+        'max_dimension': config.get('OCR_MAX_DIMENSION') or None,
+        'target_text_height': config.get('OCR_TARGET_TEXT_HEIGHT') or None
+    }
+
+
+def decode_fingerprint(config):
+    """Decode options as a cache fingerprint fragment"""
+    settings = decode_settings(config)
+    return f"max={settings['max_dimension']},text={settings['target_text_height']}"
+
+
+def estimate_text_height(image):
+    """
+    Median height in pixels of text-like connected components, measured on
+    a downscaled grayscale copy and scaled back to ``image`` size. Returns
+    None when no text-like components are found.
+    """
+    gray = image if isinstance(image, np.ndarray) else np.asarray(image.convert('L'))
+    scale = min(1.0, ESTIMATE_MAX_DIMENSION / max(gray.shape[:2]))
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    if count <= 1:
+        return None
+
+    height, width = binary.shape
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    text_like = ((heights >= 4) & (heights <= height / 4) & (widths <= width / 2)
+                 & (areas >= 8) & (widths <= heights * 4))
+    if not np.any(text_like):
+        return None
+    return float(np.median(heights[text_like])) / scale
+
+
+def decode_image(source, max_dimension=None, target_text_height=None):
+    """
+    Decode an uploaded image from bytes or a file-like object.
+
+    The returned image is fully loaded, upright and no larger than
+    ``max_dimension``. ``image.info['original_size']`` keeps the upright
+    size before normalisation.
+    """
+    image = Image.open(io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else source)
+    header_size = image.size
+    orientation = image.getexif().get(0x0112, 1)
+
+    # Reduced-scale JPEG decode: let libjpeg skip DCT work for pixels we drop anyway
+    if max_dimension and image.format == 'JPEG' and max(image.size) > max_dimension:
+        scale = max_dimension / max(image.size)
+        image.draft(image.mode, (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+
+    # Apply EXIF orientation once, at decode time
+    image = ImageOps.exif_transpose(image)
+    image.load()
+
+    # Orientations 5-8 swap width and height
+    original_size = header_size if orientation in (1, 2, 3, 4) else header_size[::-1]
+    return fit_image(image, max_dimension, target_text_height, original_size)
+
+
+def fit_image(image, max_dimension=None, target_text_height=None, original_size=None):
+    """
+    Rescale a loaded, upright image to the decode settings: text height
+    near ``target_text_height`` and no side above ``max_dimension``
+    """
+    original_size = original_size or image.size
+    scale = 1.0
+    if target_text_height:
+        text_height = estimate_text_height(image)
+        if text_height:
+            scale = min(target_text_height / text_height, MAX_TEXT_UPSCALE)
+    if max_dimension:
+        scale = min(scale, max_dimension / max(image.size))
+
+    if abs(scale - 1.0) > 0.05:
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        resample = Image.LANCZOS if scale > 1 else Image.BOX
+        image = image.resize(size, resample, reducing_gap=None if scale > 1 else 2.0)
+
+    image.info['original_size'] = original_size
+    return image
+
+
+def decode_image_bytes(image_bytes):
+    """Decode an upload with the app's decode settings"""
+    return decode_image(image_bytes, **decode_settings(current_app.config))
@@ -0,0 +1,348 @@
+"""
+Bounded OCR Job Queue
+Samsung Electronics India - Run OCR off the request thread with backpressure
+
+Jobs are queued up to ``max_depth`` and executed by a fixed pool of worker
+threads. When the queue is full ``submit`` raises ``QueueFullError`` with a
+Retry-After estimate instead of accepting work the server cannot finish.
+
+Each process runs its own queue, but with a ``store_path`` every job's
+status and result are also written to a SQLite file shared by all workers
+on the machine, so a job can be polled from whichever worker the request
+lands on.
+"""
+
+import json
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+
+
+# Polling interval while waiting on a job held by another worker
+STORE_POLL_SECONDS = 0.2
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at its maximum depth"""
+
+    def __init__(self, retry_after):
+        super().__init__('OCR job queue is full')
+        self.retry_after = retry_after
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return round(ordered[index], 2)
+
+
+class JobStore:
+    """
+    Job snapshots in a SQLite file shared by every worker process. Rows
+    are dropped ``ttl`` seconds after their last update.
+    """
+
+    def __init__(self, path, ttl=600):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                'job_id TEXT PRIMARY KEY, snapshot TEXT NOT NULL, updated REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_updated ON jobs (updated)')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def put(self, snapshot):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO jobs (job_id, snapshot, updated) VALUES (?, ?, ?)',
+            (snapshot['job_id'], json.dumps(snapshot, separators=(',', ':')), time.time()))
+
+    def get(self, job_id):
+        row = self._connection().execute(
+            'SELECT snapshot, updated FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        if row is None or row[1] < time.time() - self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def delete(self, job_id):
+        self._connection().execute('DELETE FROM jobs WHERE job_id = ?', (job_id,))
+
+    def purge(self):
+        self._connection().execute('DELETE FROM jobs WHERE updated < ?', (time.time() - self.ttl,))
+
+
+class JobQueue:
+    """
+    Fixed size worker pool behind a bounded FIFO queue.
+
+    Finished jobs are kept for ``result_ttl`` seconds so clients can poll
+    for their results. With ``store_path`` they can be polled from any
+    worker process (see ``JobStore``).
+    """
+
+    def __init__(self, app, workers=1, max_depth=64, result_ttl=600, name='ocr-job', store_path=None):
+        self.app = app
+        self.workers = workers
+        self.max_depth = max_depth
+        self.result_ttl = result_ttl
+        self.store = JobStore(store_path, result_ttl) if store_path else None
+
+        self._queue = queue.Queue(maxsize=max_depth)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._running = 0
+        self._counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0}
+        self._wait_ms = deque(maxlen=1000)
+        self._execution_ms = deque(maxlen=1000)
+
+        self._threads = []
+        for index in range(workers):
+            thread = threading.Thread(target=self._worker, name=f'{name}-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+    def _worker(self):
+        while True:
+            job_id = self._queue.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    continue
+                job['status'] = 'running'
+                job['started_at'] = time.time()
+                job['wait_ms'] = round((time.perf_counter() - job['_queued']) * 1000, 2)
+                self._wait_ms.append(job['wait_ms'])
+                self._running += 1
+                snapshot = self._snapshot(job)
+            self._store(snapshot)
+
+            started = time.perf_counter()
+            try:
+                with self.app.app_context():
+                    result = job['_fn'](*job['_args'])
+                status, error = 'completed', None
+            except Exception as e:
+                self.app.logger.error(f"OCR job {job_id} error: {str(e)}")
+                result, status, error = None, 'failed', str(e)
+
+            execution_ms = round((time.perf_counter() - started) * 1000, 2)
+            with self._lock:
+                self._running -= 1
+                self._counters[status] += 1
+                self._execution_ms.append(execution_ms)
+                job.update({
+                    'status': status,
+                    'result': result,
+                    'error': error,
+                    'finished_at': time.time(),
+                    'execution_ms': execution_ms
+                })
+                # Drop references to the input image as soon as the job is done
+                job['_args'] = ()
+                snapshot = self._snapshot(job)
+            # Stored before waiters wake, so any worker polling next sees the result
+            self._store(snapshot)
+            job['_done'].set()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def retry_after(self):
+        """Seconds a rejected client should wait before retrying"""
+        with self._lock:
+            average_ms = sum(self._execution_ms) / len(self._execution_ms) if self._execution_ms else 1000
+        backlog = self._queue.qsize() + self._running
+        return max(1, math.ceil(backlog * average_ms / 1000 / max(self.workers, 1)))
+
+    def submit(self, fn, *args, kind='ocr'):
+        """Queue ``fn(*args)`` and return its job id"""
+        self._purge()
+        job_id = uuid.uuid4().hex
+        job = {
+            'job_id': job_id,
+            'kind': kind,
+            'status': 'queued',
+            'submitted_at': time.time(),
+            'result': None,
+            'error': None,
+            '_queued': time.perf_counter(),
+            '_fn': fn,
+            '_args': args,
+            '_done': threading.Event()
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+        # Stored before a worker thread can pick the job up and store it as running
+        self._store(self._snapshot(job))
+        try:
+            self._queue.put_nowait(job_id)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job_id]
+                self._counters['rejected'] += 1
+            self._store(None, job_id)
+            raise QueueFullError(self.retry_after())
+        with self._lock:
+            self._counters['submitted'] += 1
+        return job_id
+
+    def get(self, job_id, wait=0):
+        """
+        Return a public snapshot of a job, optionally waiting up to ``wait``
+        seconds for it to finish. Jobs queued by another worker process are
+        read from the store. Returns None for unknown job ids.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return self._get_stored(job_id, wait)
+        if wait > 0:
+            job['_done'].wait(wait)
+        with self._lock:
+            snapshot = self._snapshot(job)
+        if snapshot['status'] == 'queued':
+            snapshot['queue_position'] = self._position(job_id)
+        return snapshot
+
+    def _get_stored(self, job_id, wait):
+        if self.store is None:
+            return None
+        deadline = time.monotonic() + wait
+        while True:
+            snapshot = self.store.get(job_id)
+            if snapshot is None or snapshot['status'] not in ('queued', 'running'):
+                return snapshot
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return snapshot
+            time.sleep(min(STORE_POLL_SECONDS, remaining))
+
+    @staticmethod
+    def _snapshot(job):
+        return {k: v for k, v in job.items() if not k.startswith('_')}
+
+    def _store(self, snapshot, job_id=None):
+        """Write ``snapshot`` to the shared store, or delete ``job_id`` from it"""
+        if self.store is None:
+            return
+        try:
+            if snapshot is None:
+                self.store.delete(job_id)
+            else:
+                self.store.put(snapshot)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            # The job still runs and can be polled from this worker
+            self.app.logger.warning(f"OCR job store update failed: {str(e)}")
+
+    def _position(self, job_id):
+        with self._queue.mutex:
+            try:
+                return list(self._queue.queue).index(job_id) + 1
+            except ValueError:
+                return 0
+
+    def _purge(self):
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.get('finished_at') and job['finished_at'] < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if self.store is not None:
+            try:
+                self.store.purge()
+            except sqlite3.Error as e:
+                self.app.logger.warning(f"OCR job store purge failed: {str(e)}")
+
+    def shutdown(self, timeout):
+        """
+        Give queued and running jobs up to ``timeout`` seconds to finish when
+        the worker process exits, then record the rest as failed so clients
+        polling another worker are not left waiting for them
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            pending = [job for job in self._jobs.values() if job['status'] in ('queued', 'running')]
+        for job in pending:
+            job['_done'].wait(max(0, deadline - time.monotonic()))
+        with self._lock:
+            snapshots = []
+            for job in pending:
+                if job['status'] in ('queued', 'running'):
+                    job.update(status='failed', error='The worker exited before the job finished',
+                               finished_at=time.time())
+                    snapshots.append(self._snapshot(job))
+        for snapshot in snapshots:
+            self._store(snapshot)
+
+    def stats(self):
+        """Queue depth, wait time and execution time for introspection"""
+        with self._lock:
+            wait_ms = list(self._wait_ms)
+            execution_ms = list(self._execution_ms)
+            stats = dict(self._counters)
+            stats.update({
+                'workers': self.workers,
+                'running': self._running,
+                'queue_depth': self._queue.qsize(),
+                'max_depth': self.max_depth,
+                'retained_jobs': len(self._jobs)
+            })
+        stats['wait_ms'] = {
+            'p50': _percentile(wait_ms, 0.5),
+            'p95': _percentile(wait_ms, 0.95),
+            'max': round(max(wait_ms), 2) if wait_ms else 0
+        }
+        stats['execution_ms'] = {
+            'p50': _percentile(execution_ms, 0.5),
+            'p95': _percentile(execution_ms, 0.95),
+            'max': round(max(execution_ms), 2) if execution_ms else 0
+        }
+        return stats
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue(app):
+    """Return the process wide job queue for ``app``, starting it on first use"""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue(
+                    app,
+                    workers=app.config.get('OCR_JOB_WORKERS') or app.config.get('OCR_ENGINE_POOL_SIZE') or 1,
+                    max_depth=app.config.get('OCR_JOB_QUEUE_DEPTH', 64),
+                    result_ttl=app.config.get('OCR_JOB_RESULT_TTL', 600),
+                    store_path=app.config.get('OCR_JOB_STORE_PATH') or None
+                )
+    return _job_queue
+
+
+def shutdown_job_queue(timeout):
+    """``JobQueue.shutdown`` for the process wide queue, if it was started"""
+    if _job_queue is not None:
+        _job_queue.shutdown(timeout)
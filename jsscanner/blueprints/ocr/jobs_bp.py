@@ -0,0 +1,118 @@
+"""
+Flask Blueprint for Asynchronous OCR Jobs
+Samsung Electronics India - Submit sticker images and poll for results
+"""
+
+import base64
+from datetime import datetime
+from flask import Blueprint, request, jsonify, current_app, url_for
+
+from blueprints.ocr import metrics
+from blueprints.ocr import opencv_bp as opencv_ocr
+from blueprints.ocr import pytesseract_bp as pytesseract_ocr
+from blueprints.ocr.job_queue import QueueFullError, get_job_queue
+
+# Create blueprint
+jobs_bp = Blueprint('ocr_jobs', __name__, url_prefix='/ocr/jobs')
+metrics.instrument_blueprint(jobs_bp)
+
+ENGINES = ('pytesseract', 'opencv')
+
+# Longest a client may block on GET /ocr/jobs/<id>?wait=...
+MAX_WAIT_SECONDS = 30
+
+def read_job_image():
+    """
+    Return ``(image_bytes, options)`` from a multipart upload or a JSON body
+    with a base64 ``image`` field
+    """
+    if request.is_json:
+        data = request.get_json(silent=True) or {}
+        image_data = data.get('image')
+        if not image_data:
+            return None, data
+        if image_data.startswith('data:image'):
+            image_data = image_data.split(',')[1]
+        return base64.b64decode(image_data), {k: v for k, v in data.items() if k != 'image'}
+
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return None, request.form.to_dict()
+    if not pytesseract_ocr.allowed_file(file.filename):
+        raise ValueError('Invalid file type. Allowed: PNG, JPG, JPEG, GIF, BMP, TIFF, WEBP')
+    return file.read(), request.form.to_dict()
+
+def run_job(engine, image_bytes, options):
+    """Execute one OCR job on a worker thread"""
+    if engine == 'opencv':
+        entry, cache_status = opencv_ocr.process_image_bytes(image_bytes, options)
+    else:
+        custom_config = options.get('tesseract_config', '--oem 3 --psm 6')
+        entry, cache_status = pytesseract_ocr.process_image_bytes(image_bytes, custom_config, options)
+    return {'ocr_results': entry['ocr_results'], 'cache': cache_status}
+
+@jobs_bp.route('', methods=['POST'])
+def submit_job():
+    """Queue an OCR job and return its id immediately"""
+    try:
+        image_bytes, options = read_job_image()
+        if image_bytes is None:
+            return jsonify({'error': 'No image data provided'}), 400
+
+        engine = options.get('engine', 'pytesseract')
+        if engine not in ENGINES:
+            return jsonify({'error': f'Unknown engine. Allowed: {", ".join(ENGINES)}'}), 400
+        if engine == 'opencv':
+            opencv_ocr.parse_mode(options.get('mode'))
+        else:
+            pytesseract_ocr.parse_cascade_options(options)
+
+        job_queue = get_job_queue(current_app._get_current_object())
+        try:
+            job_id = job_queue.submit(run_job, engine, image_bytes, options, kind=engine)
+        except QueueFullError as e:
+            response = jsonify({
+                'error': 'Server busy, OCR job queue is full',
+                'retry_after': e.retry_after
+            })
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response, 429
+
+        status_url = url_for('ocr_jobs.get_job', job_id=job_id)
+        response = jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status': 'queued',
+            'engine': engine,
+            'status_url': status_url,
+            'timestamp': datetime.now().isoformat()
+        })
+        response.headers['Location'] = status_url
+        return response, 202
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Job submit error: {str(e)}")
+        return jsonify({'error': f'Submission failed: {str(e)}'}), 500
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Poll a job, or block up to ``wait`` seconds for it to finish"""
+    try:
+        wait = min(float(request.args.get('wait', 0)), MAX_WAIT_SECONDS)
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+
+    job = get_job_queue(current_app._get_current_object()).get(job_id, wait=wait)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job id'}), 404
+    return jsonify(job)
+
+@jobs_bp.route('/stats', methods=['GET'])
+def job_stats():
+    """Queue depth, wait time and execution time per job"""
+    return jsonify({
+        'queue': get_job_queue(current_app._get_current_object()).stats(),
+        'timestamp': datetime.now().isoformat()
+    })
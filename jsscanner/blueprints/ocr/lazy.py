@@ -0,0 +1,48 @@
+"""
+Lazy Imports for the OCR Blueprints
+Samsung Electronics India - Heavy libraries load on first use, not at start-up
+
+``cv2``, ``numpy``, ``PIL`` and ``pytesseract`` account for most of the
+application's import time. Modules bind them with ``lazy_import`` and the
+real import happens on the first attribute access, so template-only routes
+and liveness probes never pay for it.
+"""
+
+import importlib
+
+
+class LazyModule:
+    """Stand-in for module ``name`` that imports it on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def available(self):
+        """Import now; False when the (optional) module is not installed"""
+        try:
+            self._load()
+        except ImportError:
+            return False
+        return True
+
+
+def lazy_import(name):
+    """Module proxy for ``name``; nothing is imported until it is used"""
+    return LazyModule(name)
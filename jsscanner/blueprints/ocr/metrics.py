@@ -0,0 +1,383 @@
+"""
+OCR Metrics
+Samsung Electronics India - Per-stage timing histograms in the Prometheus text format
+
+Histograms and counters are kept in process memory; observing a value is a
+bisect and a few additions under a lock. ``stage(engine, name)`` times one
+pipeline stage, and ``instrument_blueprint`` records request duration,
+bytes in and out and errors for every endpoint of a blueprint. When a
+request asks for ``timings`` the per-stage durations are added to its JSON
+response.
+
+Under a preforking server every worker process has its own registry. With
+``enable_multiprocess(directory)`` each process that serves requests writes
+its metrics to ``<directory>/<pid>.json`` every ``FLUSH_SECONDS`` and
+before each scrape, and ``render`` sums the files, so a scrape sees the
+whole server whichever worker answers it and counts never go back. Counters and histograms
+only grow, so the files of exited workers are folded into an archive file
+(``mark_process_dead``) rather than dropped.
+"""
+
+import bisect
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_app_context, request
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = tuple(1024 * 4 ** i for i in range(10))  # 1KB .. 256MB
+DIMENSION_BUCKETS = (256, 512, 1024, 1600, 2048, 3000, 4096, 6000, 8192)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Multiprocess mode: how often a worker writes its metrics file, the file the
+# metrics of exited workers are summed into, and the lock guarding that fold
+FLUSH_SECONDS = 1.0
+ARCHIVE_FILE = 'archive.json'
+LOCK_FILE = '.lock'
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(names, values, extra=()):
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{escape_label(value)}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter per label set"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def snapshot(self):
+        """Values as JSON-serialisable ``[labelvalues, value]`` pairs"""
+        with self._lock:
+            return [[list(labelvalues), value] for labelvalues, value in self._values.items()]
+
+    @staticmethod
+    def merge(snapshots):
+        values = {}
+        for snapshot in snapshots:
+            for labelvalues, value in snapshot:
+                labelvalues = tuple(labelvalues)
+                values[labelvalues] = values.get(labelvalues, 0) + value
+        return [[list(labelvalues), value] for labelvalues, value in values.items()]
+
+    def samples(self, snapshot):
+        for labelvalues, value in sorted((tuple(labels), value) for labels, value in snapshot):
+            yield f"{self.name}{format_labels(self.labelnames, labelvalues)} {format_value(value)}"
+
+
+class Histogram:
+    """Fixed-bucket histogram per label set"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            child = self._children.get(labelvalues)
+            if child is None:
+                # Per-bucket counts (the last slot is +Inf), sum
+                child = self._children[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            child[0][index] += 1
+            child[1] += value
+
+    def snapshot(self):
+        """Children as JSON-serialisable ``[labelvalues, bucket counts, sum]`` lists"""
+        with self._lock:
+            return [[list(labelvalues), list(counts), total] for labelvalues, (counts, total) in self._children.items()]
+
+    @staticmethod
+    def merge(snapshots):
+        children = {}
+        for snapshot in snapshots:
+            for labelvalues, counts, total in snapshot:
+                labelvalues = tuple(labelvalues)
+                child = children.get(labelvalues)
+                if child is None:
+                    children[labelvalues] = [list(counts), total]
+                else:
+                    child[0] = [a + b for a, b in zip(child[0], counts)]
+                    child[1] += total
+        return [[list(labelvalues), counts, total] for labelvalues, (counts, total) in children.items()]
+
+    def samples(self, snapshot):
+        children = sorted((tuple(labels), (counts, total)) for labels, counts, total in snapshot)
+        for labelvalues, (counts, total) in children:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = format_labels(self.labelnames, labelvalues, (('le', format_value(float(bound))),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = []
+        self.directory = None
+        self._writer_pid = None
+        self._writer_lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._written = None
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def snapshot(self):
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+    def merge(self, snapshots):
+        """Sum registry snapshots metric by metric"""
+        return {metric.name: metric.merge([snapshot.get(metric.name, []) for snapshot in snapshots])
+                for metric in self._metrics}
+
+    def render(self):
+        if self.directory:
+            # Every scrape reads the same files, its own process's included, so
+            # a count one worker has shown is never missing from another's
+            self.write_process_file()
+            merged = self.merge(read_process_files(self.directory))
+        else:
+            merged = self.merge([self.snapshot()])
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples(merged[metric.name]))
+        return '\n'.join(lines) + '\n'
+
+    # ------------------------------------------------------------------
+    # Multiprocess mode
+    # ------------------------------------------------------------------
+    def write_process_file(self):
+        """Write this process's metrics to its file in ``directory`` if they changed"""
+        if not self.directory:
+            return
+        with self._file_lock:
+            data = json.dumps(self.snapshot(), separators=(',', ':'))
+            if data == self._written:
+                return
+            path = os.path.join(self.directory, f"{os.getpid()}.json")
+            with open(f"{path}.tmp", 'w') as output:
+                output.write(data)
+            os.replace(f"{path}.tmp", path)
+            self._written = data
+
+    def start_writer(self):
+        """Start this process's metrics file writer, once per process"""
+        pid = os.getpid()
+        if not self.directory or self._writer_pid == pid:
+            return
+        with self._writer_lock:
+            if self._writer_pid == pid:
+                return
+            self._writer_pid = pid
+            self._written = None
+            threading.Thread(target=self._write_loop, name='ocr-metrics-writer', daemon=True).start()
+
+    def _write_loop(self):
+        while True:
+            time.sleep(FLUSH_SECONDS)
+            try:
+                self.write_process_file()
+            except OSError:
+                # Retried on the next tick; the live values are not affected
+                pass
+
+
+@contextmanager
+def _directory_lock(directory, operation):
+    with open(os.path.join(directory, LOCK_FILE), 'a') as lock:
+        fcntl.flock(lock, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read_json(path):
+    try:
+        with open(path) as source:
+            return json.load(source)
+    except (OSError, ValueError):
+        return None
+
+
+def read_process_files(directory):
+    """Snapshots of every process (and the archive) in ``directory``"""
+    snapshots = []
+    with _directory_lock(directory, fcntl.LOCK_SH):
+        for name in os.listdir(directory):
+            # <pid>.json files and the archive; .tmp files are still being written
+            if not name.endswith('.json'):
+                continue
+            snapshot = _read_json(os.path.join(directory, name))
+            if snapshot is not None:
+                snapshots.append(snapshot)
+    return snapshots
+
+
+def enable_multiprocess(directory):
+    """Share metrics between the worker processes of one server through ``directory``"""
+    os.makedirs(directory, exist_ok=True)
+    REGISTRY.directory = directory
+
+
+def mark_process_dead(directory, pid):
+    """Fold the metrics file of an exited worker into the archive"""
+    path = os.path.join(directory, f"{pid}.json")
+    with _directory_lock(directory, fcntl.LOCK_EX):
+        snapshot = _read_json(path)
+        if snapshot is None:
+            return
+        archive_path = os.path.join(directory, ARCHIVE_FILE)
+        archive = _read_json(archive_path) or {}
+        with open(f"{archive_path}.tmp", 'w') as output:
+            json.dump(REGISTRY.merge([archive, snapshot]), output, separators=(',', ':'))
+        os.replace(f"{archive_path}.tmp", archive_path)
+        os.remove(path)
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_DURATION = REGISTRY.register(Histogram(
+    'ocr_stage_duration_seconds', 'Duration of one OCR pipeline stage', ('engine', 'stage')))
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    'ocr_request_duration_seconds', 'OCR request duration by endpoint', ('endpoint',)))
+REQUEST_BYTES = REGISTRY.register(Histogram(
+    'ocr_request_bytes', 'OCR request body size by endpoint', ('endpoint',), BYTES_BUCKETS))
+RESPONSE_BYTES = REGISTRY.register(Histogram(
+    'ocr_response_bytes', 'OCR response body size by endpoint (streamed responses excluded)',
+    ('endpoint',), BYTES_BUCKETS))
+IMAGE_DIMENSION = REGISTRY.register(Histogram(
+    'ocr_image_dimension_pixels', 'Width and height of decoded images', ('engine', 'axis'), DIMENSION_BUCKETS))
+REQUESTS = REGISTRY.register(Counter(
+    'ocr_requests_total', 'OCR requests by endpoint and status code', ('endpoint', 'status')))
+ERRORS = REGISTRY.register(Counter(
+    'ocr_errors_total', 'OCR requests answered with an error status, by endpoint', ('endpoint', 'status')))
+
+
+def record_stage(engine, name, seconds):
+    """Record an already measured stage duration"""
+    STAGE_DURATION.observe(seconds, engine, name)
+    if has_app_context():
+        timings = g.get('ocr_timings')
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + seconds * 1000
+
+
+@contextmanager
+def stage(engine, name):
+    """Time the enclosed block as stage ``name`` of ``engine``"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(engine, name, time.perf_counter() - started)
+
+
+def record_image(engine, image):
+    """Record the decoded size of a PIL image"""
+    width, height = image.size
+    IMAGE_DIMENSION.observe(width, engine, 'width')
+    IMAGE_DIMENSION.observe(height, engine, 'height')
+
+
+def timings_requested():
+    value = request.args.get('timings') or request.headers.get('X-OCR-Timings')
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+def timings_block(timings, started):
+    """Milliseconds per stage plus the request total so far"""
+    block = {name: round(ms, 3) for name, ms in timings.items()}
+    block['total'] = round((time.perf_counter() - started) * 1000, 3)
+    return block
+
+
+def request_timings():
+    """``timings`` block of the current request, for responses encoded by the view itself"""
+    return timings_block(g.get('ocr_timings') or {}, g.get('ocr_request_started', time.perf_counter()))
+
+
+def instrument_blueprint(blueprint):
+    """
+    Record request metrics for every endpoint of ``blueprint`` and add a
+    ``timings`` block (stage -> milliseconds) to JSON responses when the
+    request asks for it with ``?timings=1`` or ``X-OCR-Timings: 1``
+    """
+
+    @blueprint.before_request
+    def start_request_metrics():
+        g.ocr_request_started = time.perf_counter()
+        g.ocr_timings = {}
+
+    @blueprint.after_request
+    def finish_request_metrics(response):
+        started = g.pop('ocr_request_started', None)
+        timings = g.pop('ocr_timings', None)
+        if started is None:
+            return response
+
+        endpoint = request.endpoint or 'unknown'
+        status = str(response.status_code)
+        REQUESTS.inc(endpoint, status)
+        if response.status_code >= 400:
+            ERRORS.inc(endpoint, status)
+        if request.content_length:
+            REQUEST_BYTES.observe(request.content_length, endpoint)
+
+        if timings is not None and response.is_json and not response.is_streamed and timings_requested():
+            body = response.get_json(silent=True)
+            if isinstance(body, dict):
+                body['timings'] = timings_block(timings, started)
+                response.set_data(json.dumps(body))
+
+        if not response.is_streamed and response.content_length is not None:
+            RESPONSE_BYTES.observe(response.content_length, endpoint)
+        # Streamed responses (batch NDJSON) are timed until the first byte only
+        REQUEST_DURATION.observe(time.perf_counter() - started, endpoint)
+        return response
+
+    return blueprint
@@ -0,0 +1,27 @@
+"""
+Flask Blueprint for OCR Metrics
+Samsung Electronics India - Prometheus scrape endpoint for the OCR service
+"""
+
+from flask import Blueprint, Response
+
+from blueprints.ocr.metrics import CONTENT_TYPE, REGISTRY, enable_multiprocess
+
+# Create blueprint
+metrics_bp = Blueprint('ocr_metrics', __name__)
+
+@metrics_bp.record_once
+def share_between_workers(state):
+    """Sum the metrics of every worker process when OCR_METRICS_DIR is set"""
+    directory = state.app.config.get('OCR_METRICS_DIR')
+    if directory:
+        enable_multiprocess(directory)
+
+@metrics_bp.before_app_request
+def start_metrics_writer():
+    REGISTRY.start_writer()
+
+@metrics_bp.route('/metrics')
+def prometheus_metrics():
+    """Per-stage and per-endpoint OCR metrics in the Prometheus text format"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
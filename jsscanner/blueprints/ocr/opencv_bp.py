@@ -4,98 +4,198 @@ Samsung Electronics India - Sticker Text Recognition with Computer Vision
 """
 
 import os
-import io
-import base64
-import numpy as np
+import threading
+from functools import lru_cache
 from datetime import datetime
 from flask import Blueprint, request, render_template, jsonify, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
-from PIL import Image
-import cv2
+
+from blueprints.ocr import metrics
+from blueprints.ocr.artifact_store import artifact_options, artifacts_available, store_image
+from blueprints.ocr.batch import batch_content_length, batch_options, iter_batch_inputs, iter_batch_results, ndjson_response
+from blueprints.ocr.capabilities import get_capabilities
+from blueprints.ocr.deskew import confidence_recognizer, deskew_array, deskew_fingerprint, restore_boxes
+from blueprints.ocr.documents import document_options, iter_document_results, open_document
+from blueprints.ocr.engine_pool import get_engine_pool
+from blueprints.ocr.image_decode import decode_fingerprint, decode_image_bytes
+from blueprints.ocr.lazy import lazy_import
+from blueprints.ocr.process_pool import run_task
+from blueprints.ocr.quality import ImageRejected, assess_image, quality_enabled, quality_fingerprint, scale_image
+from blueprints.ocr.region_ocr import plan_regions, recognize_regions, words_from_data
+from blueprints.ocr.result_cache import cached_ocr, get_result_cache
+from blueprints.ocr.text_regions import detect_boxes, regions_to_dicts
+from blueprints.ocr.wire import read_image_request, respond
+
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+cv2 = lazy_import('cv2')
 
 # Create blueprint
 opencv_bp = Blueprint('opencv_ocr', __name__, url_prefix='/ocr/opencv')
+metrics.instrument_blueprint(opencv_bp)
 
 # Configure allowed file extensions
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'webp'}
 
+# Tesseract config used on the best processed image
+OCR_CONFIG = '--oem 3 --psm 6'
+
+# 'full' runs one pass over the whole image, 'regions' OCRs detected text regions in parallel
+OCR_MODES = ('full', 'regions')
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def pil_to_opencv(pil_image):
-    return cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+def parse_mode(value):
+    """Parse the ``mode`` request parameter"""
+    mode = value or 'full'
+    if mode not in OCR_MODES:
+        raise ValueError(f"Unknown mode. Allowed: {', '.join(OCR_MODES)}")
+    return mode
+
+def cache_fingerprint(stages=(), mode='full', quality=True):
+    """Everything besides the pixels that changes the cached entry"""
+    fingerprint = (f"{OCR_CONFIG}|{decode_fingerprint(current_app.config)}|{quality_fingerprint(current_app.config, quality)}"
+                   f"|{deskew_fingerprint(current_app.config)}")
+    if mode != 'full':
+        fingerprint = f"{fingerprint}|mode={mode}"
+    if not stages:
+        return fingerprint
+    return f"{fingerprint}|stages={','.join(stages)}"
+
+# Structuring elements and filters shared by every request
+@lru_cache(maxsize=None)
+def kernel(name):
+    """Morphology and sharpening kernels, built on first use"""
+    if name == 'sharpen':
+        return np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]], np.float32)
+    size = int(name[0])
+    return np.ones((size, size), np.uint8)
+
+def to_grayscale_array(image):
+    """
+    Single-channel uint8 ndarray for a PIL image (or a grayscale ndarray).
+    Decodes straight to one channel instead of expanding to BGR first.
+    """
+    if isinstance(image, np.ndarray):
+        if image.ndim == 3:
+            return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return image
+    if image.mode != 'L':
+        image = image.convert('L')
+    return np.asarray(image)
+
+def best_processed_for_ocr(clahe_enhanced):
+    """
+    Best processed image for OCR (combination of techniques).
+    Blur, threshold and closing share one output buffer.
+    """
+    best_processed = cv2.GaussianBlur(clahe_enhanced, (3, 3), 0)
+    cv2.threshold(best_processed, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=best_processed)
+    
+    # Slight dilation to connect broken text
+    cv2.morphologyEx(best_processed, cv2.MORPH_CLOSE, kernel('2x2'), dst=best_processed)
+    return best_processed
+
+# Preprocessing stage graph: stage name -> (input stages, function of the inputs).
+# 'grayscale' is the root and is supplied by the caller.
+PREPROCESSING_STAGES = {
+    # Apply Gaussian blur to reduce noise
+    'blurred': (('grayscale',), lambda gray: cv2.GaussianBlur(gray, (5, 5), 0)),
+    # Apply threshold (binary)
+    'binary_threshold': (('blurred',), lambda blurred: cv2.threshold(
+        blurred, 127, 255, cv2.THRESH_BINARY)[1]),
+    # Adaptive threshold
+    'adaptive_threshold': (('blurred',), lambda blurred: cv2.adaptiveThreshold(
+        blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)),
+    # Otsu's threshold
+    'otsu_threshold': (('blurred',), lambda blurred: cv2.threshold(
+        blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]),
+    # Opening (erosion followed by dilation)
+    'morphology_opening': (('otsu_threshold',), lambda otsu: cv2.morphologyEx(
+        otsu, cv2.MORPH_OPEN, kernel('3x3'), iterations=1)),
+    # Closing (dilation followed by erosion)
+    'morphology_closing': (('otsu_threshold',), lambda otsu: cv2.morphologyEx(
+        otsu, cv2.MORPH_CLOSE, kernel('3x3'), iterations=1)),
+    # Edge detection using Canny
+    'canny_edges': (('blurred',), lambda blurred: cv2.Canny(blurred, 50, 150, apertureSize=3)),
+    # Sharpen the image
+    'sharpened': (('grayscale',), lambda gray: cv2.filter2D(gray, -1, kernel('sharpen'))),
+    # Contrast enhancement using CLAHE
+    'clahe_enhanced': (('grayscale',), lambda gray: cv2.createCLAHE(
+        clipLimit=2.0, tileGridSize=(8, 8)).apply(gray)),
+    'best_processed': (('clahe_enhanced',), best_processed_for_ocr)
+}
+
+# Every stage that can be materialised as a debug image, in display order
+STAGE_NAMES = ('grayscale',) + tuple(PREPROCESSING_STAGES)
+
+class StageGraph:
+    """
+    Lazily evaluated preprocessing stages sharing their intermediates.
+    Each stage is computed at most once, and only when something asks for it;
+    the graph can be shared by tasks running on different threads. Every
+    stage has its own lock, so a thread waiting for one stage is not held up
+    by another thread computing an unrelated one.
+    """
+    
+    def __init__(self, gray):
+        self._values = {'grayscale': gray}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.computed = ['grayscale']
+    
+    def get(self, name):
+        if name in self._values:
+            return self._values[name]
+        with self._lock:
+            stage_lock = self._locks.setdefault(name, threading.Lock())
+        # Stages form a DAG, so nested acquisitions never wait on each other in a cycle
+        with stage_lock:
+            if name not in self._values:
+                inputs, fn = PREPROCESSING_STAGES[name]
+                value = fn(*[self.get(dependency) for dependency in inputs])
+                with self._lock:
+                    self._values[name] = value
+                    self.computed.append(name)
+        return self._values[name]
 
-def opencv_to_pil(opencv_image):
-    return Image.fromarray(cv2.cvtColor(opencv_image, cv2.COLOR_BGR2RGB))
+def parse_stages(value):
+    """
+    Parse the ``stages`` request parameter: empty for none, ``all`` or a
+    comma separated list of stage names
+    """
+    if not value:
+        return ()
+    if value == 'all':
+        return STAGE_NAMES
+    stages = tuple(stage.strip() for stage in value.split(',') if stage.strip())
+    unknown = [stage for stage in stages if stage not in STAGE_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown preprocessing stages: {', '.join(unknown)}. Allowed: {', '.join(STAGE_NAMES)}")
+    return stages
 
-def preprocess_with_opencv(image):
+def preprocess_with_opencv(image, stages=(), graph=None):
     """
-    Advanced image preprocessing using OpenCV for better text extraction
+    Advanced image preprocessing using OpenCV for better text extraction.
+    
+    Only ``best_processed`` and whatever it depends on are computed for OCR;
+    ``stages`` selects additional debug images to return. Every stage is a
+    single-channel uint8 ndarray. Pass ``graph`` to reuse stages another
+    task has already computed for the same image.
     """
     results = {}
     
     try:
-        # Convert PIL to OpenCV
-        cv_image = pil_to_opencv(image)
-        original = cv_image.copy()
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-        results['grayscale'] = opencv_to_pil(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
-        
-        # Apply Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        results['blurred'] = opencv_to_pil(cv2.cvtColor(blurred, cv2.COLOR_GRAY2BGR))
-        
-        # Apply threshold (binary)
-        _, thresh_binary = cv2.threshold(blurred, 127, 255, cv2.THRESH_BINARY)
-        results['binary_threshold'] = opencv_to_pil(cv2.cvtColor(thresh_binary, cv2.COLOR_GRAY2BGR))
-        
-        # Adaptive threshold
-        adaptive_thresh = cv2.adaptiveThreshold(
-            blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
-        )
-        results['adaptive_threshold'] = opencv_to_pil(cv2.cvtColor(adaptive_thresh, cv2.COLOR_GRAY2BGR))
-        
-        # Otsu's threshold
-        _, otsu_thresh = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        results['otsu_threshold'] = opencv_to_pil(cv2.cvtColor(otsu_thresh, cv2.COLOR_GRAY2BGR))
-        
-        # Morphological operations
-        kernel = np.ones((3, 3), np.uint8)
+        if graph is None:
+            graph = StageGraph(to_grayscale_array(image))
         
-        # Opening (erosion followed by dilation)
-        opening = cv2.morphologyEx(otsu_thresh, cv2.MORPH_OPEN, kernel, iterations=1)
-        results['morphology_opening'] = opencv_to_pil(cv2.cvtColor(opening, cv2.COLOR_GRAY2BGR))
+        for stage in stages:
+            results[stage] = graph.get(stage)
         
-        # Closing (dilation followed by erosion)
-        closing = cv2.morphologyEx(otsu_thresh, cv2.MORPH_CLOSE, kernel, iterations=1)
-        results['morphology_closing'] = opencv_to_pil(cv2.cvtColor(closing, cv2.COLOR_GRAY2BGR))
-        
-        # Edge detection using Canny
-        edges = cv2.Canny(blurred, 50, 150, apertureSize=3)
-        results['canny_edges'] = opencv_to_pil(cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR))
-        
-        # Sharpen the image
-        kernel_sharpen = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-        sharpened = cv2.filter2D(gray, -1, kernel_sharpen)
-        results['sharpened'] = opencv_to_pil(cv2.cvtColor(sharpened, cv2.COLOR_GRAY2BGR))
-        
-        # Contrast enhancement using CLAHE
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        clahe_enhanced = clahe.apply(gray)
-        results['clahe_enhanced'] = opencv_to_pil(cv2.cvtColor(clahe_enhanced, cv2.COLOR_GRAY2BGR))
-        
-        # Best processed image for OCR (combination of techniques)
-        best_processed = cv2.GaussianBlur(clahe_enhanced, (3, 3), 0)
-        _, best_processed = cv2.threshold(best_processed, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        
-        # Slight dilation to connect broken text
-        kernel_small = np.ones((2, 2), np.uint8)
-        best_processed = cv2.morphologyEx(best_processed, cv2.MORPH_CLOSE, kernel_small)
-        
-        results['best_processed'] = opencv_to_pil(cv2.cvtColor(best_processed, cv2.COLOR_GRAY2BGR))
-        results['best_processed_cv'] = best_processed  # Keep OpenCV format for further processing
+        results['best_processed_cv'] = graph.get('best_processed')  # Keep OpenCV format for further processing
+        results['stages_computed'] = list(graph.computed)
         
         return results
         
@@ -105,54 +205,52 @@ def preprocess_with_opencv(image):
 
 def detect_text_regions(cv_image):
     """
-    Detect text regions using OpenCV's text detection methods
+    Detect text regions using OpenCV connected component statistics
     """
     try:
-        text_regions = []
-        
         # Convert to grayscale if needed
         if len(cv_image.shape) == 3:
             gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
         else:
             gray = cv_image
-            
-        # Find contours
-        contours, _ = cv2.findContours(gray, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
-        # Filter contours that might contain text
-        for contour in contours:
-            x, y, w, h = cv2.boundingRect(contour)
-            area = cv2.contourArea(contour)
-            
-            # Filter based on size and aspect ratio
-            if area > 100 and w > 10 and h > 10:
-                aspect_ratio = w / h
-                if 0.05 < aspect_ratio < 10:  # Reasonable aspect ratio for text
-                    text_regions.append({
-                        'x': int(x),
-                        'y': int(y),
-                        'width': int(w),
-                        'height': int(h),
-                        'area': int(area),
-                        'aspect_ratio': round(aspect_ratio, 2)
-                    })
-        
-        return sorted(text_regions, key=lambda r: r['area'], reverse=True)
+        # Filtered, non-overlapping component boxes, largest first
+        return regions_to_dicts(*detect_boxes(gray))
         
     except Exception as e:
         current_app.logger.error(f"Text region detection error: {str(e)}")
         return []
 
-def extract_text_opencv(image):
+def unscale_boxes(items, scale):
+    """Map box coordinates measured on an image scaled by ``scale`` back to the original"""
+    for item in items:
+        for key in ('x', 'y', 'left', 'top', 'width', 'height'):
+            if key in item:
+                item[key] = int(round(item[key] / scale))
+    return items
+
+def extract_text_opencv(image, stages=(), mode='full', graph=None, recipe=None):
     """
     Extract text using OpenCV preprocessing + simple OCR simulation
     Since we don't have tesseract here, we'll focus on preprocessing
+    
+    With ``mode='regions'`` only the detected text regions are recognised,
+    in parallel, falling back to a full page pass when they cover most of
+    the image. ``graph`` is an optional shared ``StageGraph`` for ``image``.
+    A quality ``recipe`` that scales the image gets its own graph. With
+    ``OCR_DESKEW`` the binarised image is straightened before region
+    detection and OCR; boxes are reported in the coordinates of ``image``.
     """
     results = {}
+    scale = recipe['scale'] if recipe else 1.0
     
     try:
+        if scale != 1.0:
+            graph = StageGraph(scale_image(to_grayscale_array(image), scale))
+        
         # Get preprocessing results
-        preprocessing_results = preprocess_with_opencv(image)
+        with metrics.stage('opencv', 'preprocess'):
+            preprocessing_results = preprocess_with_opencv(image, stages, graph)
         
         if 'error' in preprocessing_results:
             return {'error': preprocessing_results['error']}
@@ -160,16 +258,25 @@ def extract_text_opencv(image):
         # Get the best processed image
         best_cv_image = preprocessing_results['best_processed_cv']
         
+        # Straighten skewed or rotated text on the binarised image before anything reads its layout
+        ocr_image, orientation, matrix = best_cv_image, None, None
+        if current_app.config.get('OCR_DESKEW', True):
+            with metrics.stage('opencv', 'deskew'):
+                recognizer = confidence_recognizer(get_engine_pool(current_app.config.get('OCR_ENGINE_POOL_SIZE')))
+                ocr_image, orientation, matrix = deskew_array(best_cv_image, binary=True, recognizer=recognizer)
+        
         # Detect text regions
-        text_regions = detect_text_regions(best_cv_image)
+        with metrics.stage('opencv', 'region_detection'):
+            text_regions = detect_text_regions(ocr_image)
         
         # Get image statistics
+        # best_processed is binary, so every pixel is either white or black
         height, width = best_cv_image.shape
-        white_pixels = np.sum(best_cv_image == 255)
-        black_pixels = np.sum(best_cv_image == 0)
+        white_pixels = cv2.countNonZero(best_cv_image)
+        black_pixels = width * height - white_pixels
         
         results = {
-            'preprocessing_stages': {k: v for k, v in preprocessing_results.items() if k != 'best_processed_cv'},
+            'preprocessing_stages': {k: v for k, v in preprocessing_results.items() if k in stages},
             'text_regions': text_regions,
             'image_stats': {
                 'dimensions': f"{width}x{height}",
@@ -189,24 +296,41 @@ def extract_text_opencv(image):
                     'Image sharpening',
                     'Text region detection'
                 ],
-                'recommended_for_ocr': 'best_processed'
+                'recommended_for_ocr': 'best_processed',
+                'stages_computed': preprocessing_results['stages_computed'],
+                'ocr_mode': 'full'
             }
         }
         
         # If pytesseract is available, try to use it
         try:
-            import pytesseract
+            # Extract text and confidence data from a single pooled recognition pass
+            # on the grayscale buffer itself
+            engine_pool = get_engine_pool(current_app.config.get('OCR_ENGINE_POOL_SIZE'))
             
-            # Convert back to PIL for pytesseract
-            pil_image = opencv_to_pil(cv2.cvtColor(best_cv_image, cv2.COLOR_GRAY2BGR))
+            boxes = ()
+            if mode == 'regions':
+                # Merge line-level text boxes into crops; skip region OCR when they cover most of the page
+                with metrics.stage('opencv', 'region_planning'):
+                    boxes, coverage = plan_regions(ocr_image)
+                results['processing_info']['region_coverage'] = coverage
             
-            # Extract text
-            extracted_text = pytesseract.image_to_string(pil_image, config='--oem 3 --psm 6')
-            results['extracted_text'] = extracted_text.strip()
+            if len(boxes):
+                with metrics.stage('opencv', 'region_ocr'):
+                    words, ocr_regions = recognize_regions(
+                        engine_pool, ocr_image, boxes, current_app.config.get('OCR_REGION_WORKERS'))
+                results['extracted_text'] = '\n'.join(region['text'] for region in ocr_regions if region['text'])
+                results['ocr_regions'] = ocr_regions
+                results['processing_info']['ocr_mode'] = 'regions'
+            else:
+                with metrics.stage('opencv', 'tesseract'):
+                    page = engine_pool.recognize(ocr_image, OCR_CONFIG)
+                results['extracted_text'] = page['text'].strip()
+                words = words_from_data(page['data'])
+            results['detailed_words'] = words
             
             # Get confidence data
-            data = pytesseract.image_to_data(pil_image, output_type=pytesseract.Output.DICT)
-            confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
+            confidences = [word['confidence'] for word in words]
             
             if confidences:
                 results['ocr_confidence'] = {
@@ -220,12 +344,51 @@ def extract_text_opencv(image):
             results['extracted_text'] = "Pytesseract not available - showing preprocessing results only"
             results['ocr_confidence'] = None
         
+        if orientation:
+            results['processing_info']['orientation'] = orientation
+            if orientation['corrected']:
+                results['processing_info']['techniques_applied'].append('Deskew and orientation correction')
+            for key in ('text_regions', 'detailed_words', 'ocr_regions'):
+                restore_boxes(results.get(key, []), matrix, (width, height))
+        if recipe:
+            results['processing_info']['recipe'] = recipe['name']
+            results['processing_info']['scale'] = scale
+        if scale != 1.0:
+            for key in ('text_regions', 'detailed_words', 'ocr_regions'):
+                unscale_boxes(results.get(key, []), scale)
+        
         return results
         
     except Exception as e:
         current_app.logger.error(f"OpenCV text extraction error: {str(e)}")
         return {'error': str(e)}
 
+def process_image(image, options=None):
+    """
+    Quality check and the OpenCV pipeline for one decoded image (an upload
+    or a document page). Returns ``{'ocr_results': ...}``.
+    """
+    mode = parse_mode((options or {}).get('mode'))
+    
+    # Unusable images are rejected before any preprocessing
+    analysis, recipe = assess_image(image, current_app.config, 'opencv', quality_enabled(options, current_app.config))
+    ocr_results = run_task(current_app.config, 'opencv', extract_text_opencv, image, mode=mode, recipe=recipe)
+    if analysis:
+        ocr_results['quality'] = dict(analysis, recipe=recipe['name'])
+    return {'ocr_results': {k: v for k, v in ocr_results.items() if k != 'preprocessing_stages'}}
+
+def process_image_bytes(image_bytes, options=None):
+    """
+    Run the OpenCV pipeline on an encoded image through the result cache.
+    Returns ``(entry, cache_status)``.
+    """
+    mode = parse_mode((options or {}).get('mode'))
+    quality = quality_enabled(options, current_app.config)
+    return cached_ocr(
+        current_app.config, image_bytes, 'opencv', cache_fingerprint(mode=mode, quality=quality),
+        decode_image_bytes, lambda image: process_image(image, options)
+    )
+
 @opencv_bp.route('/')
 def index():
     """Main OpenCV OCR interface"""
@@ -245,110 +408,177 @@ def upload_and_extract():
         if not allowed_file(file.filename):
             return jsonify({'error': 'Invalid file type. Allowed: PNG, JPG, JPEG, GIF, BMP, TIFF, WEBP'}), 400
         
-        # Read image
-        image = Image.open(file.stream)
+        # Images are stored once and returned as URLs (or data URIs with inline_images)
+        image_options = artifact_options(request.form, current_app.config)
         
-        # Get original image info
-        original_size = image.size
-        original_mode = image.mode
+        # Debug images to return (default: none, only what OCR needs is computed)
+        stages = parse_stages(request.form.get('stages'))
+        mode = parse_mode(request.form.get('mode'))
+        quality = quality_enabled(request.form, current_app.config)
         
-        # Extract text using OpenCV
-        ocr_results = extract_text_opencv(image)
-        
-        # Convert all PIL images to base64
-        def image_to_base64(img):
-            buffer = io.BytesIO()
-            img.save(buffer, format='PNG')
-            img_str = base64.b64encode(buffer.getvalue()).decode()
-            return f"data:image/png;base64,{img_str}"
-        
-        # Convert preprocessing images to base64
-        preprocessing_images = {}
-        if 'preprocessing_stages' in ocr_results:
-            for stage_name, stage_image in ocr_results['preprocessing_stages'].items():
-                if isinstance(stage_image, Image.Image):
-                    preprocessing_images[stage_name] = image_to_base64(stage_image)
+        def process(image):
+            # Unusable images are rejected before any preprocessing
+            analysis, recipe = assess_image(image, current_app.config, 'opencv', quality)
+            
+            # Extract text using OpenCV (in a worker process with the process backend)
+            ocr_results = run_task(current_app.config, 'opencv', extract_text_opencv, image, stages, mode, recipe=recipe)
+            if analysis:
+                ocr_results['quality'] = dict(analysis, recipe=recipe['name'])
+            
+            # Store preprocessing images in the artifact store
+            with metrics.stage('opencv', 'artifacts'):
+                preprocessing_images = {}
+                if 'preprocessing_stages' in ocr_results:
+                    for stage_name, stage_image in ocr_results['preprocessing_stages'].items():
+                        if isinstance(stage_image, np.ndarray):
+                            preprocessing_images[stage_name] = store_image(stage_image, image_options, current_app.config)
+                original_image = store_image(image, image_options, current_app.config)
+            
+            return {
+                'image_info': {
+                    'original_size': image.info.get('original_size', image.size),
+                    'original_mode': image.mode,
+                    'decoded_size': image.size
+                },
+                'ocr_results': {k: v for k, v in ocr_results.items() if k != 'preprocessing_stages'},
+                'preprocessing_images': preprocessing_images,
+                'original_image': original_image,
+                'image_options': image_options
+            }
+        
+        # Read image once; identical re-uploads are answered from the result cache
+        entry, cache_status = cached_ocr(
+            current_app.config, file.read(), 'opencv', cache_fingerprint(stages, mode, quality),
+            decode_image_bytes, process, required_fields=('preprocessing_images',),
+            validate=lambda entry: entry.get('image_options') == image_options and artifacts_available(
+                list(entry['preprocessing_images'].values()) + [entry['original_image']], current_app.config)
+        )
         
         response_data = {
             'success': True,
             'filename': secure_filename(file.filename),
             'timestamp': datetime.now().isoformat(),
-            'image_info': {
-                'original_size': original_size,
-                'original_mode': original_mode
-            },
-            'ocr_results': {k: v for k, v in ocr_results.items() if k != 'preprocessing_stages'},
-            'preprocessing_images': preprocessing_images,
-            'original_image': image_to_base64(image)
+            'image_info': entry['image_info'],
+            'ocr_results': entry['ocr_results'],
+            'preprocessing_images': entry['preprocessing_images'],
+            'original_image': entry['original_image'],
+            'cache': cache_status
         }
         
-        return jsonify(response_data)
+        with metrics.stage('opencv', 'encode'):
+            return jsonify(response_data)
         
+    except ImageRejected as e:
+        return jsonify({'error': str(e), 'quality': e.to_dict()}), 422
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Upload and extract error: {str(e)}")
         return jsonify({'error': f'Processing failed: {str(e)}'}), 500
 
 @opencv_bp.route('/extract_from_base64', methods=['POST'])
 def extract_from_base64():
-    """Extract text from base64 encoded image"""
+    """Extract text from a base64 encoded image, or from the raw image sent as the request body"""
     try:
-        data = request.get_json()
-        if not data or 'image' not in data:
-            return jsonify({'error': 'No image data provided'}), 400
-        
-        # Decode base64 image
-        image_data = data['image']
-        if image_data.startswith('data:image'):
-            image_data = image_data.split(',')[1]
-        
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
+        image_bytes, options = read_image_request(request)
         
         # Extract text using OpenCV
-        ocr_results = extract_text_opencv(image)
+        entry, cache_status = process_image_bytes(image_bytes, options)
         
         response_data = {
             'success': True,
             'timestamp': datetime.now().isoformat(),
-            'ocr_results': ocr_results
+            'ocr_results': entry['ocr_results'],
+            'cache': cache_status
         }
         
-        return jsonify(response_data)
+        # JSON, or MessagePack/CBOR when the client's Accept header asks for it
+        with metrics.stage('opencv', 'encode'):
+            return respond(response_data)
         
+    except ImageRejected as e:
+        return respond({'error': str(e), 'quality': e.to_dict()}, 422)
+    except ValueError as e:
+        return respond({'error': str(e)}, 400)
     except Exception as e:
         current_app.logger.error(f"Base64 extract error: {str(e)}")
-        return jsonify({'error': f'Processing failed: {str(e)}'}), 500
+        return respond({'error': f'Processing failed: {str(e)}'}, 500)
 
-@opencv_bp.route('/health')
-def health_check():
-    """Check if OpenCV is properly installed and accessible"""
+@opencv_bp.route('/batch', methods=['POST'])
+def batch_extract():
+    """Extract text from many images, streaming one NDJSON line per image"""
     try:
-        # Check OpenCV version
-        cv_version = cv2.__version__
+        request.max_content_length = batch_content_length(request, current_app.config)
+        if not request.is_json and not request.files:
+            return jsonify({'error': 'No files uploaded'}), 400
         
-        # Create a simple test image
-        test_image = np.zeros((100, 200, 3), dtype=np.uint8)
-        test_image.fill(255)  # White background
+        options = batch_options(request)
+        parse_mode(options.get('mode'))
         
-        # Try basic OpenCV operations
-        gray = cv2.cvtColor(test_image, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        results = iter_batch_results(
+            iter_batch_inputs(request, allowed_file),
+            lambda image_bytes: process_image_bytes(image_bytes, options)
+        )
+        return ndjson_response(results)
         
-        # Check if pytesseract is also available
-        pytesseract_available = False
-        try:
-            import pytesseract
-            pytesseract_version = str(pytesseract.get_tesseract_version())
-            pytesseract_available = True
-        except ImportError:
-            pytesseract_version = "Not installed"
+    except RequestEntityTooLarge:
+        limit = request.max_content_length
+        return jsonify({'error': f'Batch larger than {limit // (1024 * 1024)}MB'}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Batch extract error: {str(e)}")
+        return jsonify({'error': f'Processing failed: {str(e)}'}), 500
+
+@opencv_bp.route('/document', methods=['POST'])
+def document_extract():
+    """OCR a multi-page TIFF or PDF page by page, streaming one NDJSON line per page"""
+    try:
+        # Documents are spooled to disk, so they may be far larger than single images
+        request.max_content_length = current_app.config.get('OCR_DOCUMENT_MAX_CONTENT_LENGTH')
+        options = document_options(request)
+        parse_mode(options.get('mode'))
+        document = open_document(request)
+        
+        results = iter_document_results(
+            document,
+            lambda page: (process_image(page, options), None)
+        )
+        return ndjson_response(results)
+        
+    except RequestEntityTooLarge:
+        limit = current_app.config.get('OCR_DOCUMENT_MAX_CONTENT_LENGTH')
+        return jsonify({'error': f'Document larger than {limit // (1024 * 1024)}MB'}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Document extract error: {str(e)}")
+        return jsonify({'error': f'Processing failed: {str(e)}'}), 500
+
+@opencv_bp.route('/health')
+def health_check():
+    """Check if OpenCV is properly installed and accessible (cached capability probe)"""
+    try:
+        capabilities = get_capabilities(current_app.config).get()
+        opencv = capabilities['opencv']
+        tesseract = capabilities['tesseract']
+        if not opencv['available']:
+            return jsonify({
+                'status': 'error',
+                'error': opencv['error'],
+                'checked_at': capabilities['checked_at'],
+                'timestamp': datetime.now().isoformat()
+            }), 500
         
         return jsonify({
             'status': 'healthy',
-            'opencv_version': cv_version,
-            'pytesseract_available': pytesseract_available,
-            'pytesseract_version': pytesseract_version,
+            'opencv_version': opencv['version'],
+            'pytesseract_available': tesseract['available'],
+            'pytesseract_version': tesseract.get('version', 'Not installed'),
+            'engine_pool': get_engine_pool(current_app.config.get('OCR_ENGINE_POOL_SIZE')).stats(),
+            'result_cache': get_result_cache(current_app.config).stats(),
             'test_result': 'success',
+            'checked_at': capabilities['checked_at'],
             'timestamp': datetime.now().isoformat()
         })
         
@@ -373,8 +603,12 @@ def get_processing_options():
             'Morphological closing',
             'Canny edge detection',
             'Image sharpening',
-            'CLAHE enhancement'
+            'CLAHE enhancement',
+            'Deskew and orientation correction'
         ],
+        'available_stages': list(STAGE_NAMES),
+        'default_stages': [],
+        'ocr_modes': list(OCR_MODES),
         'recommended_workflow': [
             'Load image',
             'Convert to grayscale',
@@ -382,6 +616,7 @@ def get_processing_options():
             'Gaussian blur for noise reduction',
             'Otsu threshold for binarization',
             'Morphological closing for text connection',
+            'Deskew and orientation correction',
             'Text region detection',
             'OCR processing'
         ],
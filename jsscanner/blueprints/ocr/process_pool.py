@@ -0,0 +1,368 @@
+"""
+Process Pool Execution Backend for the OCR Pipelines
+Samsung Electronics India - Preprocessing and OCR on every core
+
+With ``OCR_EXECUTION_BACKEND=process`` the preprocessing and OCR stages of
+the pytesseract and OpenCV pipelines run in a pool of worker processes
+instead of on the request thread, so PIL filters and the Python parts of
+the pipelines stop contending for one GIL. Each worker owns a
+``multiprocessing.shared_memory`` buffer. Images are copied into it once
+and the worker wraps them without copying. Output images are written back
+into the same buffer, so only the small result dicts are pickled.
+
+Every worker has its own pipe, so a worker that crashes or overruns
+``OCR_PROCESS_TASK_TIMEOUT`` fails only the request it was serving. It is
+replaced before the next task. The default ``thread`` backend runs
+everything in-process as before.
+"""
+
+import atexit
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from blueprints.ocr import metrics
+from blueprints.ocr.lazy import lazy_import
+
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+
+EXECUTION_BACKENDS = ('thread', 'process')
+
+# Arrays are laid out in the shared buffer on cache line boundaries
+ALIGNMENT = 64
+
+# PIL modes that survive the trip through a plain array; anything else (a
+# palette in particular) is converted first
+SHARED_MODES = ('L', 'RGB', 'RGBA')
+
+
+class WorkerCrashed(RuntimeError):
+    """A pool worker died or timed out while running a task"""
+
+
+class SharedArray:
+    """Placeholder for an array (or PIL image) stored in a worker's shared buffer"""
+
+    __slots__ = ('offset', 'shape', 'dtype', 'mode')
+
+    def __init__(self, offset, shape, dtype, mode=None):
+        self.offset = offset
+        self.shape = shape
+        self.dtype = dtype
+        self.mode = mode
+
+    def __getstate__(self):
+        return (self.offset, self.shape, self.dtype, self.mode)
+
+    def __setstate__(self, state):
+        self.offset, self.shape, self.dtype, self.mode = state
+
+
+class SlotWriter:
+    """Packs arrays into a shared buffer; what does not fit is pickled instead"""
+
+    def __init__(self, buffer, offset=0):
+        self.buffer = buffer
+        self.offset = offset
+        self.pickled = 0
+
+    def put(self, array, mode=None):
+        start = -(-self.offset // ALIGNMENT) * ALIGNMENT
+        if start + array.nbytes > len(self.buffer):
+            self.pickled += 1
+            return array if mode is None else Image.fromarray(array, mode)
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=self.buffer, offset=start)
+        view[...] = array
+        self.offset = start + array.nbytes
+        return SharedArray(start, array.shape, array.dtype.str, mode)
+
+    def pack(self, value):
+        """``value`` with every ndarray and PIL image moved into the buffer"""
+        if isinstance(value, np.ndarray):
+            return self.put(value)
+        if isinstance(value, Image.Image):
+            value = shareable_image(value)
+            return self.put(np.asarray(value), value.mode)
+        if isinstance(value, dict):
+            return {key: self.pack(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return type(value)(self.pack(item) for item in value)
+        return value
+
+
+def shareable_image(image):
+    """
+    ``image`` in a mode whose pixels alone describe it: palette and
+    multi-band images become RGB, other single-band ones (1, I, F) L, as
+    the pipelines' own ``convert('L')`` would read them
+    """
+    if image.mode in SHARED_MODES:
+        return image
+    if image.mode != 'P' and len(image.getbands()) == 1:
+        return image.convert('L')
+    return image.convert('RGB')
+
+
+def unpack(value, buffer, copy):
+    """
+    Replace ``SharedArray`` placeholders with arrays (or PIL images). Views
+    into ``buffer`` are only handed out when ``copy`` is false.
+    """
+    if isinstance(value, SharedArray):
+        array = np.ndarray(value.shape, dtype=np.dtype(value.dtype), buffer=buffer, offset=value.offset)
+        if copy:
+            array = array.copy()
+        return array if value.mode is None else Image.fromarray(array, value.mode)
+    if isinstance(value, dict):
+        return {key: unpack(item, buffer, copy) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(unpack(item, buffer, copy) for item in value)
+    return value
+
+
+def worker_config(config):
+    """The plain settings a worker's app needs; each worker runs one task at a time"""
+    settings = {key: value for key, value in config.items()
+                if key.isupper() and isinstance(value, (str, int, float, bool, type(None)))}
+    settings['OCR_ENGINE_POOL_SIZE'] = 1
+    settings['OCR_CACHE_ENABLED'] = False
+    return settings
+
+
+def worker_main(conn, slot_name, config):
+    """Worker process loop: run one task per message until told to stop"""
+    from multiprocessing import shared_memory
+    from flask import Flask, g
+    from blueprints.ocr.engine_pool import get_engine_pool
+    from blueprints.ocr.opencv_bp import OCR_CONFIG, StageGraph
+    from blueprints.ocr.warmup import limit_native_threads, warmup_image
+
+    limit_native_threads(1)
+    app = Flask('ocr-worker')
+    app.config.update(config)
+    slot = shared_memory.SharedMemory(name=slot_name)
+
+    if config.get('OCR_WARMUP'):
+        try:
+            processed = StageGraph(warmup_image()).get('best_processed')
+            get_engine_pool(1).recognize(processed, OCR_CONFIG)
+        except Exception as e:
+            # The first task loads lazily instead
+            app.logger.warning(f"OCR worker warm-up failed: {str(e)}")
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+
+        function, args, kwargs, input_bytes = message
+        writer = SlotWriter(slot.buf, input_bytes)
+        result = None
+        with app.app_context():
+            g.ocr_timings = {}
+            try:
+                result = function(*unpack(args, slot.buf, copy=False), **kwargs)
+                reply = ('ok', writer.pack(result), g.ocr_timings, writer.pickled)
+            except Exception as e:
+                app.logger.error(f"OCR worker task error: {str(e)}")
+                reply = ('error', e, g.ocr_timings, 0)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # Unpicklable exceptions are reported by message
+            conn.send(('error', RuntimeError(str(e if reply[0] == 'ok' else reply[1])), {}, 0))
+        del result, reply, writer
+
+    slot.close()
+
+
+class Worker:
+    """One worker process, its end of the pipe and its shared buffer"""
+
+    def __init__(self, context, slot, config):
+        self.slot = slot
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=worker_main, args=(child_conn, slot.name, config),
+                                       name='ocr-process-worker', daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def stop(self, timeout=5):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class ProcessPool:
+    """
+    Fixed pool of OCR worker processes with one shared buffer each.
+
+    ``call`` checks out an idle worker, so at most ``size`` tasks run at once
+    and the rest wait for a worker to free up.
+    """
+
+    def __init__(self, config, size=None, slot_bytes=64 * 1024 * 1024, task_timeout=120):
+        from multiprocessing import shared_memory
+
+        self.size = size or os.cpu_count() or 1
+        self.slot_bytes = slot_bytes
+        self.task_timeout = task_timeout
+        self._config = worker_config(config)
+        # Forking a threaded server is unsafe; forkserver children start clean
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self._context = multiprocessing.get_context(method)
+        self._lock = threading.Lock()
+        self._idle = queue.LifoQueue()
+        self._workers = []
+        self._closed = False
+        self._stats = {'tasks': 0, 'errors': 0, 'crashes': 0, 'timeouts': 0, 'restarts': 0,
+                       'pickled_arrays': 0, 'oversized_inputs': 0}
+
+        for _ in range(self.size):
+            slot = shared_memory.SharedMemory(create=True, size=slot_bytes)
+            worker = Worker(self._context, slot, self._config)
+            self._workers.append(worker)
+            self._idle.put(worker)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _replace(self, worker):
+        """Kill ``worker`` and start a fresh process on the same shared buffer"""
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join()
+        worker.conn.close()
+        replacement = Worker(self._context, worker.slot, self._config)
+        with self._lock:
+            self._workers[self._workers.index(worker)] = replacement
+            self._stats['restarts'] += 1
+        return replacement
+
+    def call(self, function, args=(), kwargs=None):
+        """
+        Run ``function(*args, **kwargs)`` in a worker and return its result
+        and stage timings. ``function`` must be importable by name.
+        Raises whatever the task raised, or ``WorkerCrashed``.
+        """
+        if self._closed:
+            raise RuntimeError('OCR process pool is closed')
+        worker = self._idle.get()
+        try:
+            writer = SlotWriter(worker.slot.buf)
+            packed_args = writer.pack(args)
+            if writer.pickled:
+                self._count('oversized_inputs', writer.pickled)
+
+            try:
+                worker.conn.send((function, packed_args, kwargs or {}, writer.offset))
+                if not worker.conn.poll(self.task_timeout):
+                    self._count('timeouts')
+                    worker = self._replace(worker)
+                    raise WorkerCrashed(f'OCR worker timed out after {self.task_timeout} s')
+                status, result, timings, pickled = worker.conn.recv()
+            except (EOFError, OSError) as e:
+                self._count('crashes')
+                worker.process.join(1)
+                exitcode = worker.process.exitcode
+                worker = self._replace(worker)
+                raise WorkerCrashed(f'OCR worker exited (code {exitcode}) while processing the image') from e
+
+            self._count('tasks')
+            if status == 'error':
+                self._count('errors')
+                raise result
+            if pickled:
+                self._count('pickled_arrays', pickled)
+            # Outputs are copied out before the buffer is handed to the next task
+            return unpack(result, worker.slot.buf, copy=True), timings
+        finally:
+            self._idle.put(worker)
+
+    def stats(self):
+        with self._lock:
+            alive = sum(worker.process.is_alive() for worker in self._workers)
+            return dict(self._stats, backend='process', size=self.size, alive=alive,
+                        idle=self._idle.qsize(), slot_mb=round(self.slot_bytes / 2 ** 20, 1))
+
+    def close(self):
+        """Stop every worker and free the shared buffers"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._workers)
+        for worker in workers:
+            worker.stop()
+            worker.slot.close()
+            worker.slot.unlink()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def execution_backend(config):
+    backend = config.get('OCR_EXECUTION_BACKEND', 'thread')
+    if backend not in EXECUTION_BACKENDS:
+        raise ValueError(f"Unknown OCR_EXECUTION_BACKEND '{backend}'. Allowed: {', '.join(EXECUTION_BACKENDS)}")
+    return backend
+
+
+def get_process_pool(config):
+    """
+    Return the process wide worker pool, starting it on first use, or None
+    with the ``thread`` backend
+    """
+    global _pool
+    if execution_backend(config) != 'process':
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPool(
+                    config,
+                    size=config.get('OCR_PROCESS_WORKERS') or None,
+                    slot_bytes=int(config.get('OCR_PROCESS_SLOT_MB', 64) * 1024 * 1024),
+                    task_timeout=config.get('OCR_PROCESS_TASK_TIMEOUT', 120)
+                )
+                atexit.register(_pool.close)
+    return _pool
+
+
+def run_task(config, engine, function, *args, **kwargs):
+    """
+    Run one pipeline task on the configured backend. With the process
+    backend the worker's stage timings are recorded here as stages of
+    ``engine``, and the whole round trip as its ``process_pool`` stage.
+    """
+    pool = get_process_pool(config)
+    if pool is None:
+        return function(*args, **kwargs)
+
+    started = time.perf_counter()
+    result, timings = pool.call(function, args, kwargs)
+    for name, ms in timings.items():
+        metrics.record_stage(engine, name, ms / 1000)
+    metrics.record_stage(engine, 'process_pool', time.perf_counter() - started)
+    return result
+
+
+def pool_stats(config):
+    """Execution backend state for the health endpoints; does not start the pool"""
+    if _pool is not None:
+        return _pool.stats()
+    return {'backend': execution_backend(config)}
@@ -3,17 +3,37 @@ Flask Blueprint for Text Extraction using Pytesseract OCR
 Samsung Electronics India - Sticker Text Recognition
 """
 
+import math
 import os
-import io
-import base64
+import time
 from datetime import datetime
 from flask import Blueprint, request, render_template, jsonify, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
-from PIL import Image, ImageEnhance, ImageFilter
-import pytesseract
+
+from blueprints.ocr import metrics
+from blueprints.ocr.artifact_store import artifact_options, artifacts_available, store_image
+from blueprints.ocr.batch import batch_content_length, batch_options, iter_batch_inputs, iter_batch_results, ndjson_response
+from blueprints.ocr.capabilities import get_capabilities
+from blueprints.ocr.deskew import confidence_recognizer, deskew_fingerprint, deskew_image, restore_boxes
+from blueprints.ocr.documents import document_options, iter_document_results, open_document
+from blueprints.ocr.engine_pool import get_engine_pool
+from blueprints.ocr.image_decode import decode_fingerprint, decode_image_bytes
+from blueprints.ocr.lazy import lazy_import
+from blueprints.ocr.process_pool import run_task
+from blueprints.ocr.quality import ImageRejected, assess_image, quality_enabled, quality_fingerprint, scale_image
+from blueprints.ocr.result_cache import cached_ocr, get_result_cache
+from blueprints.ocr.wire import read_image_request, respond
+
+Image = lazy_import('PIL.Image')
+ImageEnhance = lazy_import('PIL.ImageEnhance')
+ImageFilter = lazy_import('PIL.ImageFilter')
+ImageOps = lazy_import('PIL.ImageOps')
+pytesseract = lazy_import('pytesseract')
 
 # Create blueprint
 pytesseract_bp = Blueprint('pytesseract', __name__, url_prefix='/ocr/pytesseract')
+metrics.instrument_blueprint(pytesseract_bp)
 
 # Configure allowed file extensions
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'webp'}
@@ -48,54 +68,99 @@ def preprocess_image_for_ocr(image):
         current_app.logger.error(f"Image preprocessing error: {str(e)}")
         return image
 
-def extract_text_pytesseract(image, config_options=None):
+def summarize_page(page):
     """
-    Extract text from image using Pytesseract with various configurations
+    Build the word level OCR results for one recognition pass
     """
-    results = {}
+    data = page['data']
+    
+    # Extract words with confidence scores
+    words_with_confidence = []
+    for i in range(len(data['text'])):
+        if int(float(data['conf'][i])) > 0:  # Only include confident predictions
+            word_info = {
+                'text': data['text'][i],
+                'confidence': int(float(data['conf'][i])),
+                'left': data['left'][i],
+                'top': data['top'][i],
+                'width': data['width'][i],
+                'height': data['height'][i]
+            }
+            words_with_confidence.append(word_info)
     
+    results = {
+        'basic_text': page['text'].strip(),
+        'detailed_words': words_with_confidence
+    }
+    
+    # Calculate overall confidence
+    if words_with_confidence:
+        avg_confidence = sum(w['confidence'] for w in words_with_confidence) / len(words_with_confidence)
+        results['average_confidence'] = round(avg_confidence, 2)
+    else:
+        results['average_confidence'] = 0
+        
+    # High confidence words only (>70%)
+    high_conf_words = [w for w in words_with_confidence if w['confidence'] > 70]
+    results['high_confidence_text'] = ' '.join([w['text'] for w in high_conf_words])
+    
+    return results
+
+def empty_ocr_results(error):
+    """OCR results returned when recognition fails"""
+    return {
+        'error': str(error),
+        'basic_text': '',
+        'detailed_words': [],
+        'psm_variations': {},
+        'average_confidence': 0,
+        'high_confidence_text': ''
+    }
+
+def extract_text_pytesseract(image, config_options=None, osd=True, sweep=True):
+    """
+    Extract text from image using Pytesseract with various configurations.
+    The ``--psm 1`` orientation pass only runs with ``osd``, i.e. when the
+    deskew stage could not tell upright from upside down. Without ``sweep``
+    (a quality recipe already picked the branch) only the requested
+    configuration is recognised.
+    """
     # Default Tesseract config
     default_config = '--oem 3 --psm 6'
     if config_options:
         default_config = config_options
     
     try:
-        # Basic text extraction
-        text = pytesseract.image_to_string(image, config=default_config)
-        results['basic_text'] = text.strip()
-        
-        # Get detailed data (confidence, word positions)
-        data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT, config=default_config)
-        
-        # Extract words with confidence scores
-        words_with_confidence = []
-        for i in range(len(data['text'])):
-            if int(data['conf'][i]) > 0:  # Only include confident predictions
-                word_info = {
-                    'text': data['text'][i],
-                    'confidence': int(data['conf'][i]),
-                    'left': data['left'][i],
-                    'top': data['top'][i],
-                    'width': data['width'][i],
-                    'height': data['height'][i]
-                }
-                words_with_confidence.append(word_info)
+        engine_pool = get_engine_pool(current_app.config.get('OCR_ENGINE_POOL_SIZE'))
         
-        results['detailed_words'] = words_with_confidence
+        # Single recognition pass for text and detailed data (confidence, word positions)
+        with metrics.stage('pytesseract', 'tesseract'):
+            page = engine_pool.recognize(image, default_config)
+        results = summarize_page(page)
         
         # Try different PSM modes for better results
-        psm_modes = [
-            ('Auto OSD', '--oem 3 --psm 1'),
+        # Straightened images whose orientation is settled need no OSD pass
+        psm_modes = [('Auto OSD', '--oem 3 --psm 1')] if osd else []
+        psm_modes += [
             ('Single Block', '--oem 3 --psm 6'),
             ('Single Line', '--oem 3 --psm 7'),
             ('Single Word', '--oem 3 --psm 8'),
             ('Single Character', '--oem 3 --psm 10')
         ]
+        # A quality recipe already chose the branch: keep the requested config (and OSD)
+        if not sweep:
+            psm_modes = [(mode_name, config) for mode_name, config in psm_modes
+                         if config == default_config or (osd and config == '--oem 3 --psm 1')]
         
         psm_results = {}
         for mode_name, config in psm_modes:
             try:
-                mode_text = pytesseract.image_to_string(image, config=config).strip()
+                # The default pass already recognised this configuration
+                if config == default_config:
+                    mode_text = results['basic_text']
+                else:
+                    with metrics.stage('pytesseract', 'psm_sweep'):
+                        mode_text = engine_pool.image_to_string(image, config).strip()
                 if mode_text:
                     psm_results[mode_name] = mode_text
             except Exception as e:
@@ -103,29 +168,285 @@ def extract_text_pytesseract(image, config_options=None):
         
         results['psm_variations'] = psm_results
         
-        # Calculate overall confidence
-        if words_with_confidence:
-            avg_confidence = sum(w['confidence'] for w in words_with_confidence) / len(words_with_confidence)
-            results['average_confidence'] = round(avg_confidence, 2)
-        else:
-            results['average_confidence'] = 0
-            
-        # High confidence words only (>70%)
-        high_conf_words = [w for w in words_with_confidence if w['confidence'] > 70]
-        results['high_confidence_text'] = ' '.join([w['text'] for w in high_conf_words])
-        
         return results
         
     except Exception as e:
         current_app.logger.error(f"Pytesseract OCR error: {str(e)}")
-        return {
-            'error': str(e),
-            'basic_text': '',
-            'detailed_words': [],
-            'psm_variations': {},
-            'average_confidence': 0,
-            'high_confidence_text': ''
+        return empty_ocr_results(e)
+
+def otsu_threshold(histogram):
+    """
+    Otsu's threshold for a 256 bin grayscale histogram
+    """
+    total = sum(histogram)
+    if total == 0:
+        return 127
+    sum_all = sum(i * count for i, count in enumerate(histogram))
+    sum_background = 0
+    weight_background = 0
+    best_threshold = 127
+    best_variance = 0.0
+    for i, count in enumerate(histogram):
+        weight_background += count
+        if weight_background == 0:
+            continue
+        weight_foreground = total - weight_background
+        if weight_foreground == 0:
+            break
+        sum_background += i * count
+        mean_background = sum_background / weight_background
+        mean_foreground = (sum_all - sum_background) / weight_foreground
+        variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_variance = variance
+            best_threshold = i
+    return best_threshold
+
+def enhance_image_for_ocr(image, upscale=True):
+    """
+    Heavier preprocessing for the cascade: upscale small text, stretch
+    contrast and binarise with Otsu's threshold
+    """
+    try:
+        if image.mode != 'L':
+            image = image.convert('L')
+        
+        # Tesseract works best with capital letters around 30px tall
+        if upscale and max(image.size) < 1500:
+            image = image.resize((image.width * 2, image.height * 2), Image.LANCZOS)
+        
+        image = ImageOps.autocontrast(image, cutoff=1)
+        threshold = otsu_threshold(image.histogram())
+        return image.point(lambda p: 255 if p > threshold else 0)
+    
+    except Exception as e:
+        current_app.logger.error(f"Image enhancement error: {str(e)}")
+        return image
+
+# Cascade stages, cheapest first: (stage name, tesseract config, preprocessing)
+CASCADE_STAGES = [
+    ('Single Block', '--oem 3 --psm 6', 'standard'),
+    ('Single Line', '--oem 3 --psm 7', 'standard'),
+    ('Sparse Text', '--oem 3 --psm 11', 'standard'),
+    ('Single Block (Enhanced)', '--oem 3 --psm 6', 'enhanced'),
+    ('Auto OSD (Enhanced)', '--oem 3 --psm 1', 'enhanced'),
+    ('Sparse Text (Enhanced)', '--oem 3 --psm 11', 'enhanced')
+]
+
+# Stages that detect orientation themselves; skipped once deskew has settled it
+OSD_CONFIGS = ('--oem 3 --psm 1',)
+
+def extract_text_cascade(image, config_options=None, confidence_threshold=None, time_budget_ms=None,
+                         preprocessing=None, osd=True):
+    """
+    Extract text with a confidence-driven cascade.
+    
+    The requested configuration runs first; further PSM modes and the
+    enhanced preprocessing only run while the average word confidence stays
+    below ``confidence_threshold`` and the ``time_budget_ms`` allows it.
+    The best scoring stage is returned along with a report of every stage
+    that actually ran.
+    
+    When a quality recipe has already prepared ``image`` with one
+    ``preprocessing`` branch, only that branch's stages run. The OSD stage
+    is left out unless ``osd``.
+    """
+    if confidence_threshold is None:
+        confidence_threshold = current_app.config.get('OCR_CASCADE_CONFIDENCE', 75)
+    if time_budget_ms is None:
+        time_budget_ms = current_app.config.get('OCR_CASCADE_BUDGET_MS', 3000)
+    
+    first_config = config_options or '--oem 3 --psm 6'
+    branch = preprocessing or 'standard'
+    stages = [('Requested Config', first_config, branch)]
+    stages += [stage for stage in CASCADE_STAGES if stage[1:] != (first_config, branch)
+               and (preprocessing is None or stage[2] == preprocessing)
+               and (osd or stage[1] not in OSD_CONFIGS)]
+    
+    try:
+        engine_pool = get_engine_pool(current_app.config.get('OCR_ENGINE_POOL_SIZE'))
+        prepared = {branch: image}
+        
+        started = time.perf_counter()
+        stages_run = []
+        psm_results = {}
+        best = None
+        best_stage = None
+        budget_exhausted = False
+        
+        for stage_name, config, branch_preprocessing in stages:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            last_stage_ms = stages_run[-1]['elapsed_ms'] if stages_run else 0
+            # Stop before a stage that would likely overrun the budget
+            if stages_run and elapsed_ms + last_stage_ms > time_budget_ms:
+                budget_exhausted = True
+                break
+            
+            stage_started = time.perf_counter()
+            if branch_preprocessing not in prepared:
+                with metrics.stage('pytesseract', 'enhance'):
+                    prepared[branch_preprocessing] = enhance_image_for_ocr(image)
+            with metrics.stage('pytesseract', 'tesseract'):
+                page = engine_pool.recognize(prepared[branch_preprocessing], config)
+            stage_results = summarize_page(page)
+            stage_ms = (time.perf_counter() - stage_started) * 1000
+            
+            stages_run.append({
+                'stage': stage_name,
+                'config': config,
+                'preprocessing': branch_preprocessing,
+                'average_confidence': stage_results['average_confidence'],
+                'word_count': len(stage_results['detailed_words']),
+                'elapsed_ms': round(stage_ms, 2)
+            })
+            if stage_results['basic_text']:
+                psm_results[stage_name] = stage_results['basic_text']
+            
+            if best is None or stage_results['average_confidence'] > best['average_confidence']:
+                best = stage_results
+                best_stage = stage_name
+            
+            if stage_results['average_confidence'] >= confidence_threshold:
+                break
+        
+        results = best
+        results['psm_variations'] = psm_results
+        results['cascade'] = {
+            'confidence_threshold': confidence_threshold,
+            'time_budget_ms': time_budget_ms,
+            'stages_run': stages_run,
+            'stages_skipped': len(stages) - len(stages_run),
+            'selected_stage': best_stage,
+            'threshold_met': best['average_confidence'] >= confidence_threshold,
+            'budget_exhausted': budget_exhausted,
+            'total_ms': round((time.perf_counter() - started) * 1000, 2)
         }
+        return results
+        
+    except Exception as e:
+        current_app.logger.error(f"Pytesseract cascade OCR error: {str(e)}")
+        return empty_ocr_results(e)
+
+def cache_fingerprint(config_options, options):
+    """
+    Everything besides the pixels that changes the OCR output
+    """
+    return '|'.join(str(part) for part in (
+        config_options,
+        options.get('mode', 'full'),
+        options.get('confidence_threshold', ''),
+        options.get('time_budget_ms', ''),
+        decode_fingerprint(current_app.config),
+        quality_fingerprint(current_app.config, quality_enabled(options, current_app.config)),
+        deskew_fingerprint(current_app.config)
+    ))
+
+def prepare_image(image, recipe=None):
+    """
+    Preprocess an image with the quality recipe's single branch (standard
+    preprocessing when the quality check is off)
+    """
+    if recipe is None:
+        return preprocess_image_for_ocr(image)
+    image = scale_image(image, recipe['scale'])
+    if recipe['preprocessing'] == 'enhanced':
+        return enhance_image_for_ocr(image, upscale=False)
+    return preprocess_image_for_ocr(image)
+
+def parse_cascade_options(options):
+    """
+    ``(confidence_threshold, time_budget_ms)`` request parameters as
+    numbers, None where not given. Raises ValueError for anything else
+    than a non-negative number.
+    """
+    parsed = []
+    for name in ('confidence_threshold', 'time_budget_ms'):
+        value = (options or {}).get(name)
+        if value in (None, ''):
+            parsed.append(None)
+            continue
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be a number, got '{value}'")
+        if not math.isfinite(number) or number < 0:
+            raise ValueError(f"{name} must be a non-negative number, got '{value}'")
+        parsed.append(number)
+    return tuple(parsed)
+
+def run_ocr(image, config_options, options, recipe=None, osd=True):
+    """
+    Dispatch to the full PSM sweep or the cascade depending on ``mode``.
+    Images with a quality ``recipe`` skip the sweep.
+    """
+    if options.get('mode') == 'cascade':
+        threshold, budget = parse_cascade_options(options)
+        return extract_text_cascade(
+            image,
+            config_options,
+            confidence_threshold=threshold,
+            time_budget_ms=budget,
+            preprocessing=recipe['preprocessing'] if recipe else None,
+            osd=osd
+        )
+    return extract_text_pytesseract(image, config_options, osd=osd, sweep=recipe is None)
+
+# Request options the OCR stages read; only these are sent to a worker process
+OCR_OPTIONS = ('mode', 'confidence_threshold', 'time_budget_ms')
+
+def ocr_pipeline(image, custom_config, options, recipe=None):
+    """
+    Preprocess and OCR one decoded image; runs in a worker process with the
+    process execution backend. Returns ``(processed_image, ocr_results)``.
+    With ``OCR_DESKEW`` the preprocessed image is straightened before OCR;
+    word boxes stay in the coordinates of the uncorrected image. Tesseract's
+    OSD pass only runs when deskew is off or left the orientation undecided.
+    """
+    with metrics.stage('pytesseract', 'preprocess'):
+        processed_image = prepare_image(image, recipe)
+    
+    orientation, matrix, size = None, None, processed_image.size
+    if current_app.config.get('OCR_DESKEW', True):
+        with metrics.stage('pytesseract', 'deskew'):
+            recognizer = confidence_recognizer(get_engine_pool(current_app.config.get('OCR_ENGINE_POOL_SIZE')))
+            processed_image, orientation, matrix = deskew_image(processed_image, recognizer)
+    
+    osd = orientation is None or orientation['flip_cue'] is None
+    ocr_results = run_ocr(processed_image, custom_config, options, recipe, osd)
+    if orientation:
+        ocr_results['orientation'] = orientation
+        restore_boxes(ocr_results.get('detailed_words', []), matrix, size)
+    return processed_image, ocr_results
+
+def run_pipeline(image, custom_config, options, recipe=None):
+    """``ocr_pipeline`` on the configured execution backend"""
+    options = {key: options.get(key) for key in OCR_OPTIONS if options.get(key) is not None}
+    return run_task(current_app.config, 'pytesseract', ocr_pipeline, image, custom_config, options, recipe)
+
+def process_image(image, custom_config, options):
+    """
+    Quality check, preprocessing and OCR for one decoded image (an upload
+    or a document page). Returns ``{'ocr_results': ...}``.
+    """
+    # Unusable images are rejected before any preprocessing
+    analysis, recipe = assess_image(image, current_app.config, 'pytesseract', quality_enabled(options, current_app.config))
+    
+    # Preprocess image and extract text
+    _, ocr_results = run_pipeline(image, custom_config, options, recipe)
+    if analysis:
+        ocr_results['quality'] = dict(analysis, recipe=recipe['name'])
+    return {'ocr_results': ocr_results}
+
+def process_image_bytes(image_bytes, custom_config, options):
+    """
+    Preprocess and OCR an encoded image through the result cache.
+    Returns ``(entry, cache_status)``.
+    """
+    return cached_ocr(
+        current_app.config, image_bytes, 'pytesseract',
+        cache_fingerprint(custom_config, options),
+        decode_image_bytes, lambda image: process_image(image, custom_config, options)
+    )
 
 @pytesseract_bp.route('/')
 def index():
@@ -146,107 +467,180 @@ def upload_and_extract():
         if not allowed_file(file.filename):
             return jsonify({'error': 'Invalid file type. Allowed: PNG, JPG, JPEG, GIF, BMP, TIFF, WEBP'}), 400
         
-        # Read image
-        image = Image.open(file.stream)
-        
-        # Get original image info
-        original_size = image.size
-        original_mode = image.mode
-        
-        # Preprocess image
-        processed_image = preprocess_image_for_ocr(image.copy())
-        
         # Get custom config from request
         custom_config = request.form.get('tesseract_config', '--oem 3 --psm 6')
+        parse_cascade_options(request.form)
         
-        # Extract text using Pytesseract
-        ocr_results = extract_text_pytesseract(processed_image, custom_config)
+        # Images are stored once and returned as URLs (or data URIs with inline_images)
+        image_options = artifact_options(request.form, current_app.config)
         
-        # Convert images to base64 for display
-        def image_to_base64(img):
-            buffer = io.BytesIO()
-            img.save(buffer, format='PNG')
-            img_str = base64.b64encode(buffer.getvalue()).decode()
-            return f"data:image/png;base64,{img_str}"
+        quality = quality_enabled(request.form, current_app.config)
+        
+        def process(image):
+            # Unusable images are rejected before any preprocessing
+            analysis, recipe = assess_image(image, current_app.config, 'pytesseract', quality)
+            
+            # Preprocess and extract text using Pytesseract (full PSM sweep or confidence cascade)
+            processed_image, ocr_results = run_pipeline(image.copy(), custom_config, request.form, recipe)
+            if analysis:
+                ocr_results['quality'] = dict(analysis, recipe=recipe['name'])
+            
+            with metrics.stage('pytesseract', 'artifacts'):
+                images = {
+                    'original': store_image(image, image_options, current_app.config),
+                    'processed': store_image(processed_image, image_options, current_app.config)
+                }
+            
+            return {
+                'image_info': {
+                    'original_size': image.info.get('original_size', image.size),
+                    'original_mode': image.mode,
+                    'decoded_size': image.size,
+                    'processed_size': processed_image.size
+                },
+                'ocr_results': ocr_results,
+                'images': images,
+                'image_options': image_options
+            }
+        
+        # Read image once; identical re-uploads are answered from the result cache
+        entry, cache_status = cached_ocr(
+            current_app.config, file.read(), 'pytesseract',
+            cache_fingerprint(custom_config, request.form),
+            decode_image_bytes, process, required_fields=('images',),
+            validate=lambda entry: entry.get('image_options') == image_options
+            and artifacts_available(entry['images'].values(), current_app.config)
+        )
         
         response_data = {
             'success': True,
             'filename': secure_filename(file.filename),
             'timestamp': datetime.now().isoformat(),
-            'image_info': {
-                'original_size': original_size,
-                'original_mode': original_mode,
-                'processed_size': processed_image.size
-            },
-            'ocr_results': ocr_results,
-            'images': {
-                'original': image_to_base64(image),
-                'processed': image_to_base64(processed_image)
-            },
-            'tesseract_config': custom_config
+            'image_info': entry['image_info'],
+            'ocr_results': entry['ocr_results'],
+            'images': entry['images'],
+            'tesseract_config': custom_config,
+            'cache': cache_status
         }
         
-        return jsonify(response_data)
+        with metrics.stage('pytesseract', 'encode'):
+            return jsonify(response_data)
         
+    except ImageRejected as e:
+        return jsonify({'error': str(e), 'quality': e.to_dict()}), 422
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Upload and extract error: {str(e)}")
         return jsonify({'error': f'Processing failed: {str(e)}'}), 500
 
 @pytesseract_bp.route('/extract_from_base64', methods=['POST'])
 def extract_from_base64():
-    """Extract text from base64 encoded image"""
+    """Extract text from a base64 encoded image, or from the raw image sent as the request body"""
     try:
-        data = request.get_json()
-        if not data or 'image' not in data:
-            return jsonify({'error': 'No image data provided'}), 400
-        
-        # Decode base64 image
-        image_data = data['image']
-        if image_data.startswith('data:image'):
-            image_data = image_data.split(',')[1]
-        
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # Preprocess image
-        processed_image = preprocess_image_for_ocr(image)
+        image_bytes, options = read_image_request(request)
         
         # Get custom config
-        custom_config = data.get('tesseract_config', '--oem 3 --psm 6')
+        custom_config = options.get('tesseract_config', '--oem 3 --psm 6')
+        parse_cascade_options(options)
         
-        # Extract text
-        ocr_results = extract_text_pytesseract(processed_image, custom_config)
+        # Preprocess and extract text
+        entry, cache_status = process_image_bytes(image_bytes, custom_config, options)
         
         response_data = {
             'success': True,
             'timestamp': datetime.now().isoformat(),
-            'ocr_results': ocr_results,
-            'tesseract_config': custom_config
+            'ocr_results': entry['ocr_results'],
+            'tesseract_config': custom_config,
+            'cache': cache_status
         }
         
-        return jsonify(response_data)
+        # JSON, or MessagePack/CBOR when the client's Accept header asks for it
+        with metrics.stage('pytesseract', 'encode'):
+            return respond(response_data)
         
+    except ImageRejected as e:
+        return respond({'error': str(e), 'quality': e.to_dict()}, 422)
+    except ValueError as e:
+        return respond({'error': str(e)}, 400)
     except Exception as e:
         current_app.logger.error(f"Base64 extract error: {str(e)}")
+        return respond({'error': f'Processing failed: {str(e)}'}, 500)
+
+@pytesseract_bp.route('/batch', methods=['POST'])
+def batch_extract():
+    """Extract text from many images, streaming one NDJSON line per image"""
+    try:
+        request.max_content_length = batch_content_length(request, current_app.config)
+        if not request.is_json and not request.files:
+            return jsonify({'error': 'No files uploaded'}), 400
+        
+        options = batch_options(request)
+        custom_config = options.get('tesseract_config', '--oem 3 --psm 6')
+        parse_cascade_options(options)
+        
+        results = iter_batch_results(
+            iter_batch_inputs(request, allowed_file),
+            lambda image_bytes: process_image_bytes(image_bytes, custom_config, options)
+        )
+        return ndjson_response(results)
+        
+    except RequestEntityTooLarge:
+        limit = request.max_content_length
+        return jsonify({'error': f'Batch larger than {limit // (1024 * 1024)}MB'}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Batch extract error: {str(e)}")
+        return jsonify({'error': f'Processing failed: {str(e)}'}), 500
+
+@pytesseract_bp.route('/document', methods=['POST'])
+def document_extract():
+    """OCR a multi-page TIFF or PDF page by page, streaming one NDJSON line per page"""
+    try:
+        # Documents are spooled to disk, so they may be far larger than single images
+        request.max_content_length = current_app.config.get('OCR_DOCUMENT_MAX_CONTENT_LENGTH')
+        options = document_options(request)
+        custom_config = options.get('tesseract_config', '--oem 3 --psm 6')
+        parse_cascade_options(options)
+        document = open_document(request)
+        
+        results = iter_document_results(
+            document,
+            lambda page: (process_image(page, custom_config, options), None)
+        )
+        return ndjson_response(results)
+        
+    except RequestEntityTooLarge:
+        limit = current_app.config.get('OCR_DOCUMENT_MAX_CONTENT_LENGTH')
+        return jsonify({'error': f'Document larger than {limit // (1024 * 1024)}MB'}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Document extract error: {str(e)}")
         return jsonify({'error': f'Processing failed: {str(e)}'}), 500
 
 @pytesseract_bp.route('/health')
 def health_check():
-    """Check if Pytesseract is properly installed and accessible"""
+    """Check if Pytesseract is properly installed and accessible (cached capability probe)"""
     try:
-        # Try to get Tesseract version
-        version = pytesseract.get_tesseract_version()
-        
-        # Create a simple test image
-        test_image = Image.new('RGB', (200, 50), color='white')
-        
-        # Try basic OCR
-        test_text = pytesseract.image_to_string(test_image)
+        capabilities = get_capabilities(current_app.config).get()
+        tesseract = capabilities['tesseract']
+        if not tesseract['available']:
+            return jsonify({
+                'status': 'error',
+                'error': tesseract['error'],
+                'checked_at': capabilities['checked_at'],
+                'timestamp': datetime.now().isoformat()
+            }), 500
         
         return jsonify({
             'status': 'healthy',
-            'tesseract_version': str(version),
+            'tesseract_version': tesseract['version'],
             'test_result': 'success',
+            'checked_at': capabilities['checked_at'],
+            'engine_pool': get_engine_pool(current_app.config.get('OCR_ENGINE_POOL_SIZE')).stats(),
+            'result_cache': get_result_cache(current_app.config).stats(),
             'timestamp': datetime.now().isoformat()
         })
         
@@ -261,7 +655,10 @@ def health_check():
 def get_languages():
     """Get available Tesseract languages"""
     try:
-        languages = pytesseract.get_languages()
+        tesseract = get_capabilities(current_app.config).get()['tesseract']
+        if not tesseract['available']:
+            return jsonify({'error': tesseract['error']}), 500
+        languages = tesseract['languages']
         return jsonify({
             'available_languages': languages,
             'default_language': 'eng',
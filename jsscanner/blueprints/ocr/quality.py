@@ -0,0 +1,190 @@
+"""
+Image Quality Analysis for the OCR Blueprints
+Samsung Electronics India - Reject unreadable sticker photos before any OCR work
+
+Sharpness (variance of the Laplacian), contrast, exposure and text scale are
+measured on a grayscale copy no larger than ``ANALYSIS_MAX_DIMENSION``. The
+numbers either pick one preprocessing recipe for the image or reject it with
+a reason and a hint the client can show to the user.
+"""
+
+from blueprints.ocr import metrics
+from blueprints.ocr.image_decode import estimate_text_height
+from blueprints.ocr.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+
+ANALYSIS_MAX_DIMENSION = 640
+
+# Pixels at or beyond these levels count as clipped
+CLIP_LOW, CLIP_HIGH = 5, 250
+
+# Pixels at or below DARK_TEXT_LEVEL are dark ink; a bright image with at least
+# MIN_DARK_SHARE of them is black-on-white text (a label, screenshot or scan),
+# not an overexposed photo
+DARK_TEXT_LEVEL = 96
+MIN_DARK_SHARE = 0.002
+
+# Images with a smaller 1st-99th percentile range get the enhanced recipe
+LOW_CONTRAST_RANGE = 80
+
+# Text smaller than this (pixels, at decoded size) is upscaled to SMALL_TEXT_TARGET
+SMALL_TEXT_HEIGHT = 14
+SMALL_TEXT_TARGET = 20
+MAX_RECIPE_UPSCALE = 2.0
+
+# Recipes: ``preprocessing`` is the Pytesseract branch ('standard' or
+# 'enhanced'); the OpenCV pipeline always OCRs ``best_processed`` and only
+# applies ``scale``
+RECIPES = {
+    'standard': {'preprocessing': 'standard', 'description': 'Sharp and well exposed'},
+    'low_contrast': {'preprocessing': 'enhanced', 'description': 'Contrast stretched and binarised'},
+    'small_text': {'preprocessing': 'enhanced', 'description': 'Upscaled so text is large enough for Tesseract'}
+}
+
+REJECTION_HINTS = {
+    'blurred': 'Hold the camera steady and tap to focus on the sticker',
+    'overexposed': 'Avoid glare: tilt the sticker or reduce the light',
+    'underexposed': 'Add light or move out of the shadow',
+    'low_contrast': 'Fill the frame with the sticker in even light',
+    'text_too_small': 'Move closer so the text fills more of the frame'
+}
+
+
+class ImageRejected(Exception):
+    """Image not worth running OCR on; ``analysis`` holds the measurements"""
+
+    def __init__(self, reason, message, analysis):
+        super().__init__(message)
+        self.reason = reason
+        self.analysis = analysis
+
+    def to_dict(self):
+        return {'reason': self.reason, 'hint': REJECTION_HINTS[self.reason], 'analysis': self.analysis}
+
+
+def quality_settings(config):
+    """Quality thresholds from the Flask config"""
+    return {
+        'enabled': config.get('OCR_QUALITY_CHECK', True),
+        'min_sharpness': config.get('OCR_QUALITY_MIN_SHARPNESS', 8.0),
+        'min_contrast': config.get('OCR_QUALITY_MIN_CONTRAST', 24),
+        'max_clipped': config.get('OCR_QUALITY_MAX_CLIPPED', 0.9),
+        'min_text_height': config.get('OCR_QUALITY_MIN_TEXT_HEIGHT', 6)
+    }
+
+
+def quality_enabled(options, config):
+    """Quality check switch: on by default, ``quality=0`` skips it per request"""
+    value = (options or {}).get('quality')
+    if value not in (None, ''):
+        return str(value).lower() not in ('0', 'false', 'no')
+    return quality_settings(config)['enabled']
+
+
+def quality_fingerprint(config, enabled=True):
+    """Quality settings as a cache fingerprint fragment"""
+    if not enabled:
+        return 'quality=off'
+    settings = quality_settings(config)
+    return ('quality=' + ','.join(str(settings[key]) for key in
+                                  ('min_sharpness', 'min_contrast', 'max_clipped', 'min_text_height')))
+
+
+def analyse_image(image):
+    """
+    Sharpness, contrast, exposure and text height of a PIL image or
+    grayscale ndarray. Text height is reported at the image's own scale.
+    """
+    gray = image if isinstance(image, np.ndarray) else np.asarray(image.convert('L'))
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_BGR2GRAY)
+    scale = min(1.0, ANALYSIS_MAX_DIMENSION / max(gray.shape[:2]))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+
+    histogram = cv2.calcHist([small], [0], None, [256], [0, 256]).ravel()
+    cumulative = np.cumsum(histogram) / small.size
+    p1 = int(np.searchsorted(cumulative, 0.01))
+    p99 = int(np.searchsorted(cumulative, 0.99))
+    mean, std = cv2.meanStdDev(small)
+
+    text_height = estimate_text_height(small)
+    return {
+        'sharpness': round(float(cv2.Laplacian(small, cv2.CV_64F).var()), 2),
+        'contrast': p99 - p1,
+        'rms_contrast': round(float(std[0][0]), 2),
+        'mean_brightness': round(float(mean[0][0]), 2),
+        'clipped_dark': round(float(histogram[:CLIP_LOW + 1].sum() / small.size), 4),
+        'clipped_bright': round(float(histogram[CLIP_HIGH:].sum() / small.size), 4),
+        'dark_share': round(float(histogram[:DARK_TEXT_LEVEL + 1].sum() / small.size), 4),
+        'text_height': round(text_height / scale, 1) if text_height else None
+    }
+
+
+def reject(reason, detail, analysis):
+    raise ImageRejected(reason, f"{detail}. {REJECTION_HINTS[reason]}", analysis)
+
+
+def choose_recipe(analysis, settings):
+    """
+    Recipe for an analysed image, or raise ``ImageRejected``.
+    Returns ``{'name', 'preprocessing', 'scale'}``.
+
+    A clipped white background only means overexposure when there is no
+    dark ink on it: clean black-on-white labels, screenshots and scans are
+    mostly pure white too. With sparse ink the 1st-99th percentile range
+    can be zero, so such images skip the contrast check as well.
+    """
+    white_page = (analysis['clipped_bright'] >= settings['max_clipped']
+                  and analysis['dark_share'] >= MIN_DARK_SHARE)
+    if analysis['clipped_bright'] >= settings['max_clipped'] and not white_page:
+        reject('overexposed', f"Image is overexposed ({analysis['clipped_bright']:.0%} of pixels clipped)", analysis)
+    if analysis['clipped_dark'] >= settings['max_clipped']:
+        reject('underexposed', f"Image is too dark ({analysis['clipped_dark']:.0%} of pixels black)", analysis)
+    if analysis['contrast'] < settings['min_contrast'] and not white_page:
+        if analysis['mean_brightness'] < 64:
+            reject('underexposed', f"Image is too dark to read (contrast {analysis['contrast']})", analysis)
+        if analysis['mean_brightness'] > 192:
+            reject('overexposed', f"Image is washed out (contrast {analysis['contrast']})", analysis)
+        reject('low_contrast', f"Image has no readable contrast (contrast {analysis['contrast']})", analysis)
+    if analysis['sharpness'] < settings['min_sharpness']:
+        reject('blurred', f"Image is too blurred to read (sharpness {analysis['sharpness']} < "
+                          f"{settings['min_sharpness']})", analysis)
+
+    text_height = analysis['text_height']
+    if text_height is not None and text_height < settings['min_text_height']:
+        reject('text_too_small', f"Text is too small to read ({text_height} px tall)", analysis)
+
+    if text_height is not None and text_height < SMALL_TEXT_HEIGHT:
+        name = 'small_text'
+        scale = round(min(SMALL_TEXT_TARGET / text_height, MAX_RECIPE_UPSCALE), 2)
+    else:
+        name = 'low_contrast' if analysis['contrast'] < LOW_CONTRAST_RANGE and not white_page else 'standard'
+        scale = 1.0
+    return {'name': name, 'preprocessing': RECIPES[name]['preprocessing'], 'scale': scale}
+
+
+def assess_image(image, config, engine, enabled=True):
+    """
+    Analyse ``image`` and choose its recipe, timed as ``engine``'s
+    ``quality`` stage. Raises ``ImageRejected`` for unusable images.
+    Returns ``(analysis, recipe)``; both are None when the check is off.
+    """
+    if not enabled:
+        return None, None
+    with metrics.stage(engine, 'quality'):
+        analysis = analyse_image(image)
+        recipe = choose_recipe(analysis, quality_settings(config))
+    return analysis, recipe
+
+
+def scale_image(image, scale):
+    """Resize a PIL image or ndarray by ``scale`` (no-op for 1.0)"""
+    if not scale or scale == 1.0:
+        return image
+    if isinstance(image, np.ndarray):
+        return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.BICUBIC)
@@ -0,0 +1,140 @@
+"""
+Region OCR for the OpenCV Blueprint
+Samsung Electronics India - OCR only the parts of a sticker photo that hold text
+
+Candidate text boxes are grouped into lines and merged into blocks, cropped out of
+the binarised image and recognised in parallel on the shared engine pool,
+each with a page segmentation mode suited to its shape. Word coordinates are
+mapped back onto the full image so the results merge into the usual
+``detailed_words`` layout.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from blueprints.ocr.engine_pool import text_from_data
+from blueprints.ocr.lazy import lazy_import
+from blueprints.ocr.text_regions import detect_boxes, empty_boxes, group_lines, merge_boxes
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# Regions are OCR'd with the same engine settings as the full page pass,
+# only the page segmentation mode changes
+REGION_OEM = 3
+PSM_BLOCK = 6
+PSM_SINGLE_LINE = 7
+PSM_SINGLE_WORD = 8
+
+# White border added around every crop - Tesseract misses glyphs touching the edge
+CROP_PADDING = 8
+
+# When the regions cover more than this share of the image a single full
+# page pass is cheaper than many crops
+MAX_REGION_COVERAGE = 0.6
+
+
+def line_kernel(width):
+    """Horizontal structuring element that joins characters into lines"""
+    return cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, width // 60), 3))
+
+
+def text_mask(binary):
+    """
+    Foreground mask of text lines for a binarised page (dark text on a
+    light background): inverted, then closed horizontally so the glyphs of
+    one line form a single component
+    """
+    inverted = cv2.bitwise_not(binary)
+    return cv2.morphologyEx(inverted, cv2.MORPH_CLOSE, line_kernel(binary.shape[1]))
+
+
+def region_psm(width, height, line_height):
+    """
+    Page segmentation mode for a crop: one line of text, one word, or a
+    uniform block
+    """
+    if height <= line_height * 1.6:
+        return PSM_SINGLE_WORD if width <= height * 2 else PSM_SINGLE_LINE
+    return PSM_BLOCK
+
+
+def crop_region(binary, box):
+    """Crop ``box`` out of ``binary`` with a white border"""
+    x, y, w, h = box
+    crop = binary[y:y + h, x:x + w]
+    return cv2.copyMakeBorder(crop, CROP_PADDING, CROP_PADDING, CROP_PADDING, CROP_PADDING,
+                              cv2.BORDER_CONSTANT, value=255)
+
+
+def plan_regions(binary):
+    """
+    Detect text lines on ``binary`` and merge them into OCR crops.
+    Returns ``(boxes, coverage)`` with ``boxes`` an ``(N, 4)`` array that is
+    empty when a full page pass should be used instead.
+    """
+    candidates, _ = detect_boxes(text_mask(binary))
+    if len(candidates) == 0:
+        return empty_boxes(), 0.0
+    height, width = binary.shape
+    gap = max(2, int(np.median(candidates[:, 3]) // 2))
+    boxes = merge_boxes(group_lines(candidates), gap)
+
+    coverage = round(float(np.sum(boxes[:, 2].astype(np.int64) * boxes[:, 3])) / (width * height), 3)
+    if coverage > MAX_REGION_COVERAGE:
+        return empty_boxes(), coverage
+    return boxes, coverage
+
+
+def words_from_data(data, offset_x=0, offset_y=0):
+    """
+    Word dicts in the ``detailed_words`` layout from image_to_data output,
+    shifted by the crop origin
+    """
+    words = []
+    for i in range(len(data['text'])):
+        confidence = int(float(data['conf'][i]))
+        if confidence > 0:  # Only include confident predictions
+            words.append({
+                'text': data['text'][i],
+                'confidence': confidence,
+                'left': int(data['left'][i]) + offset_x,
+                'top': int(data['top'][i]) + offset_y,
+                'width': int(data['width'][i]),
+                'height': int(data['height'][i])
+            })
+    return words
+
+
+def recognize_regions(engine_pool, binary, boxes, max_workers=None):
+    """
+    OCR every ``(N, 4)`` box in parallel on ``engine_pool``.
+
+    Returns ``(words, regions)``: word dicts in the ``detailed_words`` layout
+    with full-image coordinates, and one summary per region in reading order.
+    """
+    boxes = boxes.tolist()
+    line_height = float(np.median([h for _, _, _, h in boxes])) if boxes else 0
+
+    def recognize(box):
+        psm = region_psm(box[2], box[3], line_height)
+        data = engine_pool.image_to_data(crop_region(binary, box), f'--oem {REGION_OEM} --psm {psm}')
+        return psm, data
+
+    with ThreadPoolExecutor(max_workers=max_workers or 1) as executor:
+        pages = list(executor.map(recognize, boxes))
+
+    words = []
+    regions = []
+    for (x, y, w, h), (psm, data) in zip(boxes, pages):
+        region_words = words_from_data(data, x - CROP_PADDING, y - CROP_PADDING)
+        words.extend(region_words)
+        regions.append({
+            'x': x,
+            'y': y,
+            'width': w,
+            'height': h,
+            'psm': psm,
+            'text': text_from_data(data).strip(),
+            'word_count': len(region_words)
+        })
+    return words, regions
@@ -0,0 +1,358 @@
+"""
+Content-addressed OCR Result Cache
+Samsung Electronics India - Skip the OCR pipeline for re-uploaded sticker photos
+
+Entries are keyed by a hash of the decoded pixels plus the Tesseract config
+and the pipeline version: ``PIPELINE_VERSION`` and a digest of the source of
+the packages that produce cached results, so a deploy that changes them
+never serves entries made by the old code. A hash of the uploaded bytes is linked to the pixel
+key so an identical re-upload is answered without decoding the image again.
+
+Two tiers are kept: a bounded in-memory LRU and a persistent SQLite file
+with size and TTL based eviction, shared by every worker on the machine.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from blueprints.ocr import metrics
+
+# Bump whenever preprocessing or OCR output changes so stale entries miss
+PIPELINE_VERSION = '2'
+
+# Packages (relative to blueprints/) whose source is part of the cache key
+PIPELINE_PACKAGES = ('ocr', 'barcode', 'scan')
+
+
+def pipeline_digest():
+    """Digest of the pipeline packages' source; empty when it is not shipped"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.blake2b(digest_size=6)
+    found = False
+    for package in PIPELINE_PACKAGES:
+        directory = os.path.join(root, package)
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.py'):
+                with open(os.path.join(directory, name), 'rb') as source:
+                    digest.update(f"{package}/{name}|".encode())
+                    digest.update(source.read())
+                found = True
+    return digest.hexdigest() if found else ''
+
+
+PIPELINE_KEY = f"{PIPELINE_VERSION}-{pipeline_digest()}"
+
+ALIAS_FIELD = '__alias__'
+
+
+def bytes_cache_key(raw_bytes, namespace, fingerprint=''):
+    """Key for the encoded upload bytes"""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"raw|{namespace}|{PIPELINE_KEY}|{fingerprint}|".encode())
+    digest.update(raw_bytes)
+    return digest.hexdigest()
+
+
+def image_cache_key(image, namespace, fingerprint=''):
+    """Key for the decoded pixels of a PIL image"""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"px|{namespace}|{PIPELINE_KEY}|{fingerprint}|{image.mode}|{image.size}|".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+class OCRResultCache:
+    """
+    Two tier cache of JSON-serialisable OCR results.
+
+    Values are stored serialised so callers can freely mutate what they get
+    back and so the memory tier can be bounded by bytes as well as entries.
+    """
+
+    def __init__(self, memory_entries=256, memory_bytes=64 * 1024 * 1024,
+                 disk_path=None, disk_bytes=512 * 1024 * 1024, ttl_seconds=24 * 3600):
+        self.memory_entries = memory_entries
+        self.memory_bytes = memory_bytes
+        self.disk_path = disk_path
+        self.disk_bytes = disk_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._local = threading.local()
+        self._puts_since_purge = 0
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'puts': 0,
+            'evictions': 0,
+            'expired': 0
+        }
+
+        if self.disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.disk_path)), exist_ok=True)
+            with self._connection() as conn:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS entries ('
+                    'key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, '
+                    'created REAL NOT NULL, accessed REAL NOT NULL)'
+                )
+                conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+
+    # ------------------------------------------------------------------
+    # Disk tier
+    # ------------------------------------------------------------------
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.disk_path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _disk_get(self, key):
+        conn = self._connection()
+        row = conn.execute('SELECT value, created FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        value, created = row
+        now = time.time()
+        if now - created > self.ttl_seconds:
+            conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self._count('expired')
+            return None
+        conn.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, key))
+        return bytes(value)
+
+    def _disk_put(self, key, payload):
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)',
+            (key, payload, len(payload), now, now)
+        )
+        with self._lock:
+            self._puts_since_purge += 1
+            purge = self._puts_since_purge >= 50
+            if purge:
+                self._puts_since_purge = 0
+        if purge:
+            self._disk_purge(conn)
+
+    def _disk_purge(self, conn):
+        """Drop expired entries, then least recently used ones above the size budget"""
+        cursor = conn.execute('DELETE FROM entries WHERE created < ?', (time.time() - self.ttl_seconds,))
+        self._count('expired', cursor.rowcount)
+
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.disk_bytes:
+            return
+        target = int(self.disk_bytes * 0.9)
+        evicted = 0
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY accessed').fetchall():
+            if total <= target:
+                break
+            conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            total -= size
+            evicted += 1
+        self._count('evictions', evicted)
+
+    # ------------------------------------------------------------------
+    # Memory tier
+    # ------------------------------------------------------------------
+    def _memory_get(self, key):
+        with self._lock:
+            item = self._memory.get(key)
+            if item is None:
+                return None
+            payload, created = item
+            if time.time() - created > self.ttl_seconds:
+                del self._memory[key]
+                self._memory_size -= len(payload)
+                self._counters['expired'] += 1
+                return None
+            self._memory.move_to_end(key)
+            return payload
+
+    def _memory_put(self, key, payload, created=None):
+        if len(payload) > self.memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_size -= len(previous[0])
+            self._memory[key] = (payload, created or time.time())
+            self._memory_size += len(payload)
+            while self._memory and (len(self._memory) > self.memory_entries
+                                    or self._memory_size > self.memory_bytes):
+                _, (evicted, _) = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+                self._counters['evictions'] += 1
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def _get_payload(self, key):
+        payload = self._memory_get(key)
+        if payload is not None:
+            return payload, 'memory'
+        if self.disk_path:
+            payload = self._disk_get(key)
+            if payload is not None:
+                self._memory_put(key, payload)
+                return payload, 'disk'
+        return None, None
+
+    def lookup(self, key):
+        """
+        Return ``(value, tier)`` for ``key`` following links, without
+        touching the hit/miss counters; use ``record()`` once the outcome
+        of a request is known.
+        """
+        payload, tier = self._get_payload(key)
+        value = json.loads(payload) if payload is not None else None
+        if isinstance(value, dict) and ALIAS_FIELD in value:
+            payload, tier = self._get_payload(value[ALIAS_FIELD])
+            value = json.loads(payload) if payload is not None else None
+        return value, tier
+
+    def get(self, key):
+        """Return the cached value for ``key`` (following links) or None"""
+        value, tier = self.lookup(key)
+        self.record(value is not None, tier)
+        return value
+
+    def record(self, hit, tier=None):
+        """Count one cache lookup outcome"""
+        with self._lock:
+            self._counters['hits' if hit else 'misses'] += 1
+            if hit and tier:
+                self._counters[f'{tier}_hits'] += 1
+
+    def put(self, key, value):
+        """Store a JSON-serialisable value in both tiers"""
+        payload = json.dumps(value, separators=(',', ':')).encode()
+        self._memory_put(key, payload)
+        if self.disk_path:
+            self._disk_put(key, payload)
+        self._count('puts')
+
+    def link(self, alias_key, key):
+        """Make ``alias_key`` resolve to the entry stored under ``key``"""
+        payload = json.dumps({ALIAS_FIELD: key}).encode()
+        self._memory_put(alias_key, payload)
+        if self.disk_path:
+            self._disk_put(alias_key, payload)
+
+    def stats(self):
+        """Hit/miss counters and tier sizes for health endpoints"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._memory)
+            stats['memory_bytes'] = self._memory_size
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0
+        stats['pipeline_version'] = PIPELINE_KEY
+        if self.disk_path:
+            try:
+                count, size = self._connection().execute(
+                    'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+                stats['disk_entries'] = count
+                stats['disk_bytes'] = size
+            except sqlite3.Error as e:
+                stats['disk_error'] = str(e)
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache(config):
+    """Return the process wide cache configured from the Flask ``config``"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                disk_path = config.get('OCR_CACHE_PATH')
+                _cache = OCRResultCache(
+                    memory_entries=config.get('OCR_CACHE_MEMORY_ENTRIES', 256),
+                    memory_bytes=config.get('OCR_CACHE_MEMORY_BYTES', 64 * 1024 * 1024),
+                    disk_path=disk_path or None,
+                    disk_bytes=config.get('OCR_CACHE_DISK_BYTES', 512 * 1024 * 1024),
+                    ttl_seconds=config.get('OCR_CACHE_TTL_SECONDS', 24 * 3600)
+                )
+    return _cache
+
+
+def timed_decode(decode, raw_bytes, namespace):
+    """Decode an upload, recording the decode stage and image size"""
+    with metrics.stage(namespace, 'decode'):
+        image = decode(raw_bytes)
+    metrics.record_image(namespace, image)
+    return image
+
+
+def cached_ocr(config, raw_bytes, namespace, fingerprint, decode, compute, required_fields=(), validate=None,
+               results_key='ocr_results'):
+    """
+    Return ``(entry, cache_status)`` for an uploaded image.
+
+    ``decode(raw_bytes)`` returns a PIL image and ``compute(image)`` returns
+    the JSON-serialisable entry to cache. Entries missing any of
+    ``required_fields`` (for example images only produced by ``/upload``)
+    or rejected by ``validate(entry)`` are recomputed. Entries whose
+    ``entry[results_key]`` carries an error are not stored.
+    """
+    if not config.get('OCR_CACHE_ENABLED', True):
+        return compute(timed_decode(decode, raw_bytes, namespace)), 'disabled'
+
+    def usable(entry):
+        if entry is None or not all(field in entry for field in required_fields):
+            return False
+        return validate is None or validate(entry)
+
+    cache = get_result_cache(config)
+    with metrics.stage(namespace, 'cache_lookup'):
+        raw_key = bytes_cache_key(raw_bytes, namespace, fingerprint)
+        entry, tier = cache.lookup(raw_key)
+        hit = usable(entry)
+    if hit:
+        cache.record(True, tier)
+        return entry, 'hit'
+
+    image = timed_decode(decode, raw_bytes, namespace)
+    if entry is None:
+        with metrics.stage(namespace, 'cache_lookup'):
+            pixel_key = image_cache_key(image, namespace, fingerprint)
+            entry, tier = cache.lookup(pixel_key)
+            hit = usable(entry)
+        if hit:
+            cache.record(True, tier)
+            cache.link(raw_key, pixel_key)
+            return entry, 'hit'
+    else:
+        pixel_key = image_cache_key(image, namespace, fingerprint)
+
+    cache.record(False)
+    entry = compute(image)
+    if 'error' not in entry.get(results_key, {}):
+        with metrics.stage(namespace, 'cache_store'):
+            cache.put(pixel_key, entry)
+            cache.link(raw_key, pixel_key)
+    return entry, 'miss'
@@ -0,0 +1,133 @@
+"""
+Flask Blueprint for Live Camera OCR Streams
+Samsung Electronics India - Live camera OCR as one chunked request, or one request per frame in a session
+
+Native clients can send a whole camera session as one chunked request body.
+Browsers cannot read a response while still sending the body, so they open a
+session and post each frame to it; the session keeps the dedup state between
+frames on whichever worker they land.
+"""
+
+from flask import Blueprint, request, jsonify, current_app, url_for
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from blueprints.ocr import metrics
+from blueprints.ocr.batch import ndjson_response
+from blueprints.ocr.frame_stream import iter_stream_results, start_reader
+from blueprints.ocr.stream_sessions import get_session_store, process_session_frame
+from blueprints.ocr.image_decode import decode_image
+from blueprints.ocr.opencv_bp import extract_text_opencv, parse_mode
+
+# Create blueprint
+stream_bp = Blueprint('ocr_stream', __name__, url_prefix='/ocr/stream')
+metrics.instrument_blueprint(stream_bp)
+
+def recognise_frame(frame_bytes, mode, max_dimension):
+    """Full decode and OCR of one frame; errors come back as ``{'error': ...}``"""
+    try:
+        with metrics.stage('stream', 'decode'):
+            image = decode_image(frame_bytes, max_dimension)
+        return extract_text_opencv(image, mode=mode)
+    except Exception as e:
+        current_app.logger.error(f"Stream frame error: {str(e)}")
+        return {'error': str(e)}
+
+@stream_bp.route('/frames', methods=['POST'])
+def stream_frames():
+    """
+    OCR a stream of length-prefixed camera frames, answering with one
+    NDJSON line each time the recognised text changes
+    """
+    try:
+        config = current_app.config
+        request.max_content_length = config.get('OCR_STREAM_MAX_CONTENT_LENGTH')
+
+        mode = parse_mode(request.args.get('mode'))
+        dedup_distance = int(request.args.get('dedup_distance', config.get('OCR_STREAM_DEDUP_DISTANCE')))
+        max_dimension = config.get('OCR_STREAM_MAX_DIMENSION') or None
+
+        def recognise(frame_bytes):
+            return recognise_frame(frame_bytes, mode, max_dimension)
+
+        latest = start_reader(request.stream, config.get('OCR_STREAM_MAX_FRAME_BYTES'))
+        return ndjson_response(iter_stream_results(
+            latest, recognise, dedup_distance, config.get('OCR_STREAM_IDLE_TIMEOUT')))
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Stream frames error: {str(e)}")
+        return jsonify({'error': f'Processing failed: {str(e)}'}), 500
+
+@stream_bp.route('/sessions', methods=['POST'])
+def create_session():
+    """
+    Open a per-frame session for clients that cannot stream a request body.
+    Options (``mode``, ``dedup_distance``) come from the query or a JSON body.
+    """
+    try:
+        config = current_app.config
+        options = request.get_json(silent=True) or {}
+        if not isinstance(options, dict):
+            raise ValueError('Session options must be a JSON object')
+        mode = parse_mode(request.args.get('mode', options.get('mode')))
+        dedup_distance = int(request.args.get(
+            'dedup_distance', options.get('dedup_distance', config.get('OCR_STREAM_DEDUP_DISTANCE'))))
+
+        session_id = get_session_store(config).create({'mode': mode, 'dedup_distance': dedup_distance})
+        return jsonify({
+            'session_id': session_id,
+            'frames_url': url_for('ocr_stream.session_frame', session_id=session_id),
+            'idle_timeout': config.get('OCR_STREAM_IDLE_TIMEOUT')
+        }), 201
+
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Stream session error: {str(e)}")
+        return jsonify({'error': f'Processing failed: {str(e)}'}), 500
+
+@stream_bp.route('/sessions/<session_id>/frames', methods=['POST'])
+def session_frame(session_id):
+    """
+    OCR one camera frame of a session, sent as the raw request body. The
+    answer says whether the text changed; ``coalesced`` means the previous
+    frame is still being read, so the client should send its newest frame.
+    """
+    try:
+        config = current_app.config
+        request.max_content_length = config.get('OCR_STREAM_MAX_FRAME_BYTES')
+        frame_bytes = request.get_data(cache=False)
+        if not frame_bytes:
+            raise ValueError('No frame in the request body')
+        max_dimension = config.get('OCR_STREAM_MAX_DIMENSION') or None
+
+        def recognise(frame, options):
+            return recognise_frame(frame, options['mode'], max_dimension)
+
+        result = process_session_frame(get_session_store(config), session_id, frame_bytes, recognise)
+        if result is None:
+            return jsonify({'error': 'Unknown or expired session'}), 404
+        return jsonify(result)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RequestEntityTooLarge:
+        limit = request.max_content_length
+        return jsonify({'error': f'Frame larger than {limit // (1024 * 1024)}MB'}), 413
+    except Exception as e:
+        current_app.logger.error(f"Stream session frame error: {str(e)}")
+        return jsonify({'error': f'Processing failed: {str(e)}'}), 500
+
+@stream_bp.route('/sessions/<session_id>', methods=['DELETE'])
+def close_session(session_id):
+    """End a session and return its frame counters"""
+    try:
+        summary = get_session_store(current_app.config).close(session_id)
+        if summary is None:
+            return jsonify({'error': 'Unknown or expired session'}), 404
+        return jsonify({'summary': summary})
+
+    except Exception as e:
+        current_app.logger.error(f"Stream session close error: {str(e)}")
+        return jsonify({'error': f'Processing failed: {str(e)}'}), 500
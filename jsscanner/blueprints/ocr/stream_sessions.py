@@ -0,0 +1,206 @@
+"""
+Live Camera OCR Sessions
+Samsung Electronics India - One small request per frame, with the stream's dedup state kept between them
+
+Browsers cannot send a request body while they read the response of the same
+request over HTTP/1.1, so live scanners post each camera frame as a request
+of its own to a session. The session keeps what the chunked stream keeps in
+memory (the hash of the last processed frame, the last recognised text and
+the counters) in a SQLite file shared by every worker, so consecutive frames
+may land on any worker. A frame that arrives while the session's previous
+frame is still being recognised is answered straight away as ``coalesced``;
+the client sends its newest frame next instead of queueing stale ones.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from blueprints.ocr.frame_stream import frame_hash, hash_distance, normalise_text
+
+# A frame being recognised holds its session this long at most; a worker that
+# dies mid-frame does not block the session for longer
+FRAME_LEASE_SECONDS = 60
+
+COUNTERS = ('received', 'coalesced', 'skipped_duplicate', 'processed', 'failed', 'emitted')
+
+
+class StreamSessionStore:
+    """
+    Live OCR sessions in a SQLite file shared by every worker process.
+    Sessions without a frame for ``idle_timeout`` seconds are dropped.
+    """
+
+    def __init__(self, path, idle_timeout=30):
+        self.path = path
+        self.idle_timeout = idle_timeout
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS sessions ('
+                'session_id TEXT PRIMARY KEY, options TEXT NOT NULL, last_hash TEXT, last_text TEXT, '
+                'busy_until REAL NOT NULL DEFAULT 0, created REAL NOT NULL, updated REAL NOT NULL, '
+                + ', '.join(f'{name} INTEGER NOT NULL DEFAULT 0' for name in COUNTERS) + ')'
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def create(self, options):
+        """Start a session with ``options`` (mode, dedup_distance) and return its id"""
+        self.purge()
+        session_id = uuid.uuid4().hex
+        now = time.time()
+        self._connection().execute(
+            'INSERT INTO sessions (session_id, options, created, updated) VALUES (?, ?, ?, ?)',
+            (session_id, json.dumps(options), now, now))
+        return session_id
+
+    def claim(self, session_id):
+        """
+        Count a frame for the session and try to take its lease. Returns
+        None for an unknown or expired session, otherwise ``(session,
+        frame_index, claimed)``; ``claimed`` is False while another frame
+        of the session is being recognised.
+        """
+        now = time.time()
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT options, last_hash, last_text, busy_until, received FROM sessions '
+                'WHERE session_id = ? AND updated >= ?', (session_id, now - self.idle_timeout)).fetchone()
+            if row is None:
+                return None
+            options, last_hash, last_text, busy_until, received = row
+            claimed = busy_until < now
+            if claimed:
+                conn.execute('UPDATE sessions SET received = received + 1, busy_until = ?, updated = ? '
+                             'WHERE session_id = ?', (now + FRAME_LEASE_SECONDS, now, session_id))
+            else:
+                conn.execute('UPDATE sessions SET received = received + 1, coalesced = coalesced + 1, '
+                             'updated = ? WHERE session_id = ?', (now, session_id))
+        finally:
+            conn.execute('COMMIT')
+        session = {
+            'options': json.loads(options),
+            'last_hash': int(last_hash, 16) if last_hash else None,
+            'last_text': last_text
+        }
+        return session, received, claimed
+
+    def release(self, session_id, counts, last_hash=None, last_text=None):
+        """Give the lease back, adding ``counts`` and remembering the processed frame"""
+        assignments = ['busy_until = 0', 'updated = ?']
+        values = [time.time()]
+        for name, amount in counts.items():
+            assignments.append(f'{name} = {name} + ?')
+            values.append(amount)
+        if last_hash is not None:
+            assignments.append('last_hash = ?')
+            values.append(format(last_hash, 'x'))
+        if last_text is not None:
+            assignments.append('last_text = ?')
+            values.append(last_text)
+        self._connection().execute(
+            f"UPDATE sessions SET {', '.join(assignments)} WHERE session_id = ?", values + [session_id])
+
+    def close(self, session_id):
+        """Remove a session and return its counters, or None if it is unknown"""
+        conn = self._connection()
+        row = conn.execute(f"SELECT created, {', '.join(COUNTERS)} FROM sessions WHERE session_id = ?",
+                           (session_id,)).fetchone()
+        if row is None:
+            return None
+        conn.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+        summary = dict(zip(COUNTERS, row[1:]))
+        summary['elapsed_ms'] = round((time.time() - row[0]) * 1000, 2)
+        return summary
+
+    def purge(self):
+        self._connection().execute('DELETE FROM sessions WHERE updated < ?', (time.time() - self.idle_timeout,))
+
+
+def process_session_frame(store, session_id, frame_bytes, recognise):
+    """
+    Dedup and recognise one posted frame of a session. Returns None for an
+    unknown session, otherwise a result with the frame's ``status``:
+    ``coalesced``, ``duplicate``, ``unchanged``, ``changed`` (with the new
+    text) or ``failed``.
+    """
+    claim = store.claim(session_id)
+    if claim is None:
+        return None
+    session, index, claimed = claim
+    if not claimed:
+        return {'frame': index, 'status': 'coalesced'}
+
+    started = time.perf_counter()
+    counts = {}
+    try:
+        try:
+            current_hash = frame_hash(frame_bytes)
+        except Exception as e:
+            counts['failed'] = 1
+            return {'frame': index, 'status': 'failed', 'error': f'Undecodable frame: {str(e)}'}
+        last_hash = session['last_hash']
+        if last_hash is not None and hash_distance(current_hash, last_hash) <= session['options']['dedup_distance']:
+            counts['skipped_duplicate'] = 1
+            return {'frame': index, 'status': 'duplicate'}
+
+        results = recognise(frame_bytes, session['options'])
+        counts['processed'] = 1
+        if 'error' in results:
+            counts['failed'] = 1
+            store.release(session_id, counts, last_hash=current_hash)
+            counts = None
+            return {'frame': index, 'status': 'failed', 'error': results['error']}
+
+        text = normalise_text(results.get('extracted_text'))
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        if text == session['last_text']:
+            store.release(session_id, counts, last_hash=current_hash)
+            counts = None
+            return {'frame': index, 'status': 'unchanged', 'elapsed_ms': elapsed_ms}
+
+        counts['emitted'] = 1
+        store.release(session_id, counts, last_hash=current_hash, last_text=text)
+        counts = None
+        return {
+            'frame': index,
+            'status': 'changed',
+            'text': results.get('extracted_text', ''),
+            'ocr_confidence': results.get('ocr_confidence'),
+            'elapsed_ms': elapsed_ms
+        }
+    finally:
+        # Early returns and errors give the lease back too
+        if counts is not None:
+            store.release(session_id, counts)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store(config):
+    """Return the process wide session store configured from the Flask ``config``"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = StreamSessionStore(
+                    config.get('OCR_STREAM_SESSION_PATH'),
+                    idle_timeout=config.get('OCR_STREAM_IDLE_TIMEOUT', 30)
+                )
+    return _store
@@ -0,0 +1,216 @@
+"""
+Text Region Detection Engine for the OCR Blueprints
+Samsung Electronics India - Vectorised candidate text boxes for sticker photos
+
+Regions come from connected-component statistics instead of a per-contour
+Python loop. Size and aspect ratio filtering, non-maximum suppression and
+line grouping all work on ``(N, 4)`` arrays of ``x, y, width, height``
+boxes; dicts are only built at the JSON boundary by ``regions_to_dicts``.
+"""
+
+from blueprints.ocr.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# Candidate filters (same thresholds the contour based detector used)
+MIN_REGION_AREA = 100
+MIN_REGION_SIDE = 10
+MIN_ASPECT_RATIO = 0.05
+MAX_ASPECT_RATIO = 10
+
+# Boxes overlapping a larger kept box by more than this share of their own
+# area are suppressed (this also drops components nested inside others)
+NMS_OVERLAP = 0.5
+
+
+def empty_boxes():
+    """No boxes, in the (N, 4) int32 layout every box function returns"""
+    return np.empty((0, 4), dtype=np.int32)
+
+
+def component_boxes(foreground):
+    """
+    Bounding boxes and pixel areas of the 8-connected components of a
+    single-channel image (non-zero pixels are foreground)
+    """
+    # Block-based (Grana) labelling measured about twice as fast as the default here
+    _, _, stats, _ = cv2.connectedComponentsWithStatsWithAlgorithm(
+        foreground, 8, cv2.CV_32S, cv2.CCL_GRANA)
+    stats = stats[1:]  # Label 0 is the background
+    return stats[:, :4], stats[:, cv2.CC_STAT_AREA]
+
+
+def filter_boxes(boxes, areas, min_area=MIN_REGION_AREA, min_side=MIN_REGION_SIDE,
+                 min_aspect=MIN_ASPECT_RATIO, max_aspect=MAX_ASPECT_RATIO):
+    """Keep boxes with a plausible size and aspect ratio for text"""
+    widths = boxes[:, 2]
+    heights = boxes[:, 3]
+    aspect = widths / np.maximum(heights, 1)
+    keep = ((areas > min_area) & (widths > min_side) & (heights > min_side)
+            & (aspect > min_aspect) & (aspect < max_aspect))
+    return boxes[keep], areas[keep]
+
+
+def non_max_suppression(boxes, scores, overlap=NMS_OVERLAP):
+    """
+    Greedy non-maximum suppression. Boxes are visited by descending score and
+    dropped when their intersection with an already kept box exceeds
+    ``overlap`` of the smaller box. Returns the indices kept, best first.
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.intp)
+
+    x1 = boxes[:, 0].astype(np.int64)
+    y1 = boxes[:, 1].astype(np.int64)
+    x2 = x1 + boxes[:, 2]
+    y2 = y1 + boxes[:, 3]
+    box_areas = (x2 - x1) * (y2 - y1)
+
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        inter_w = np.clip(np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]), 0, None)
+        inter_h = np.clip(np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]), 0, None)
+        smaller = np.minimum(box_areas[best], box_areas[rest])
+        order = rest[inter_w * inter_h <= overlap * smaller]
+    return np.asarray(keep, dtype=np.intp)
+
+
+def group_lines(boxes, gap_factor=2.0):
+    """
+    Group boxes into text lines. Boxes whose vertical centres lie within half
+    a median box height of each other share a line; a line is split where the
+    horizontal gap exceeds ``gap_factor`` median heights. Returns one
+    bounding box per line in reading order.
+    """
+    if len(boxes) == 0:
+        return empty_boxes()
+
+    x1 = boxes[:, 0]
+    y1 = boxes[:, 1]
+    x2 = x1 + boxes[:, 2]
+    y2 = y1 + boxes[:, 3]
+    median_height = float(np.median(boxes[:, 3]))
+
+    # Assign line ids by walking the boxes top to bottom
+    centres = y1 + boxes[:, 3] / 2.0
+    by_centre = np.argsort(centres, kind='stable')
+    line_breaks = np.diff(centres[by_centre]) > median_height / 2
+    line_ids = np.empty(len(boxes), dtype=np.intp)
+    line_ids[by_centre] = np.concatenate(([0], np.cumsum(line_breaks)))
+
+    # Within each line, walk left to right and split at wide gaps
+    order = np.lexsort((x1, line_ids))
+    gaps = x1[order][1:] - x2[order][:-1]
+    breaks = (line_ids[order][1:] != line_ids[order][:-1]) | (gaps > gap_factor * median_height)
+    starts = np.flatnonzero(np.concatenate(([True], breaks)))
+
+    lx1 = np.minimum.reduceat(x1[order], starts)
+    ly1 = np.minimum.reduceat(y1[order], starts)
+    lx2 = np.maximum.reduceat(x2[order], starts)
+    ly2 = np.maximum.reduceat(y2[order], starts)
+    lines = np.stack([lx1, ly1, lx2 - lx1, ly2 - ly1], axis=1).astype(np.int32)
+    return lines[np.lexsort((lines[:, 0], lines[:, 1]))]
+
+
+def touching_groups(boxes, gap):
+    """
+    Group id per box for the connected components of "overlaps or lies
+    within ``gap`` pixels". A sweep over boxes sorted by left edge only
+    compares each box with those starting before its right edge (plus
+    ``gap``), and a union-find forest joins them, so memory stays linear
+    in the number of boxes.
+    """
+    order = np.argsort(boxes[:, 0], kind='stable')
+    x1 = boxes[order, 0]
+    y1 = boxes[order, 1]
+    x2 = x1 + boxes[order, 2]
+    y2 = y1 + boxes[order, 3]
+    # Boxes after i in the sweep start at or after x1[i]; those up to ends[i] also start near enough to x2[i]
+    ends = np.searchsorted(x1, x2 + gap, side='right')
+
+    parent = np.arange(len(boxes))
+    for i in range(len(boxes) - 1):
+        end = ends[i]
+        if end <= i + 1:
+            continue
+        near = (y1[i + 1:end] <= y2[i] + gap) & (y1[i] <= y2[i + 1:end] + gap)
+        if not near.any():
+            continue
+        members = np.append(np.flatnonzero(near) + i + 1, i)
+        roots = parent[members]
+        while True:
+            above = parent[roots]
+            if np.array_equal(above, roots):
+                break
+            roots = above
+        root = roots.min()
+        parent[roots] = root
+        parent[members] = root
+
+    while True:
+        above = parent[parent]
+        if np.array_equal(above, parent):
+            break
+        parent = above
+    groups = np.empty(len(boxes), dtype=np.int64)
+    groups[order] = parent
+    return groups
+
+
+def merge_boxes(boxes, gap):
+    """
+    Merge boxes that overlap or lie within ``gap`` pixels of each other,
+    repeating until no merged boxes touch. Returns boxes in reading order.
+    """
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    while len(boxes) > 1:
+        groups, group_ids = np.unique(touching_groups(boxes, gap), return_inverse=True)
+        if len(groups) == len(boxes):
+            break
+        x1 = boxes[:, 0]
+        y1 = boxes[:, 1]
+        x2 = x1 + boxes[:, 2]
+        y2 = y1 + boxes[:, 3]
+        mx1 = np.full(len(groups), np.iinfo(np.int64).max)
+        my1 = np.full(len(groups), np.iinfo(np.int64).max)
+        mx2 = np.zeros(len(groups), dtype=np.int64)
+        my2 = np.zeros(len(groups), dtype=np.int64)
+        np.minimum.at(mx1, group_ids, x1)
+        np.minimum.at(my1, group_ids, y1)
+        np.maximum.at(mx2, group_ids, x2)
+        np.maximum.at(my2, group_ids, y2)
+        boxes = np.stack([mx1, my1, mx2 - mx1, my2 - my1], axis=1)
+
+    boxes = boxes.astype(np.int32)
+    return boxes[np.lexsort((boxes[:, 0], boxes[:, 1]))]
+
+
+def detect_boxes(foreground):
+    """
+    Candidate text boxes of a single-channel image: filtered components
+    after non-maximum suppression. Returns ``(boxes, areas)`` sorted by
+    descending area.
+    """
+    boxes, areas = filter_boxes(*component_boxes(foreground))
+    keep = non_max_suppression(boxes, areas)
+    return boxes[keep], areas[keep]
+
+
+def regions_to_dicts(boxes, areas):
+    """JSON form of ``detect_boxes`` output"""
+    return [
+        {
+            'x': int(x),
+            'y': int(y),
+            'width': int(w),
+            'height': int(h),
+            'area': int(area),
+            'aspect_ratio': round(w / h, 2)
+        }
+        for (x, y, w, h), area in zip(boxes.tolist(), areas.tolist())
+    ]
@@ -0,0 +1,85 @@
+"""
+Worker Warm-up for the OCR Blueprints
+Samsung Electronics India - Workers load their engines before they accept traffic
+
+Gunicorn (``gunicorn.conf.py``) imports the application once in the master
+and forks the workers; nothing native is started before the fork. Each
+worker then caps its OpenCV and OpenMP thread pools, so several workers on
+one box do not oversubscribe the cores, and runs a small synthetic sticker
+through the OpenCV preprocessing, every engine of the Tesseract pool and the
+barcode detector, starts the OCR worker processes when the process backend
+is configured, then runs the capability probe the health checks answer
+from. The first real request no longer pays for model loading.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from blueprints.barcode.decoder import detect_linear
+from blueprints.ocr.capabilities import get_capabilities
+from blueprints.ocr.engine_pool import get_engine_pool
+from blueprints.ocr.lazy import lazy_import
+from blueprints.ocr.opencv_bp import OCR_CONFIG, StageGraph
+from blueprints.ocr.process_pool import get_process_pool
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+WARMUP_TEXT = 'SM-R510 8801643'
+
+
+def limit_native_threads(opencv_threads=0):
+    """
+    Cap the native thread pools of this process. ``OMP_THREAD_LIMIT`` is
+    read by Tesseract when an engine or tesseract process starts; 0 keeps
+    OpenCV's own default.
+    """
+    os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+    if opencv_threads:
+        cv2.setNumThreads(opencv_threads)
+    return {'opencv_threads': cv2.getNumThreads(), 'omp_thread_limit': os.environ['OMP_THREAD_LIMIT']}
+
+
+def warmup_image():
+    """Grayscale sticker-like image with one line of text"""
+    image = np.full((96, 480), 255, dtype=np.uint8)
+    cv2.putText(image, WARMUP_TEXT, (12, 62), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 0, 3, cv2.LINE_AA)
+    return image
+
+
+def warm_up(app):
+    """
+    Exercise OpenCV, the engine pool and the barcode detector once.
+    Returns milliseconds per component. Bypasses the blueprints so the
+    request metrics stay clean.
+    """
+    timings = {}
+    image = warmup_image()
+
+    started = time.perf_counter()
+    graph = StageGraph(image)
+    processed = graph.get('best_processed')
+    timings['opencv'] = round((time.perf_counter() - started) * 1000, 2)
+
+    # One recognition per pool slot, concurrently, so every engine is created now
+    started = time.perf_counter()
+    engine_pool = get_engine_pool(app.config.get('OCR_ENGINE_POOL_SIZE'))
+    with ThreadPoolExecutor(max_workers=engine_pool.size, thread_name_prefix='warmup') as executor:
+        list(executor.map(lambda _: engine_pool.recognize(processed, OCR_CONFIG), range(engine_pool.size)))
+    timings['tesseract'] = round((time.perf_counter() - started) * 1000, 2)
+
+    started = time.perf_counter()
+    detect_linear(image)
+    timings['barcode'] = round((time.perf_counter() - started) * 1000, 2)
+
+    # With the process backend, start the worker processes before the first request
+    started = time.perf_counter()
+    if get_process_pool(app.config) is not None:
+        timings['process_pool'] = round((time.perf_counter() - started) * 1000, 2)
+
+    # Health checks answer from this probe until it expires
+    started = time.perf_counter()
+    get_capabilities(app.config).refresh()
+    timings['capabilities'] = round((time.perf_counter() - started) * 1000, 2)
+    return timings
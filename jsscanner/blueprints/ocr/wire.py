@@ -0,0 +1,99 @@
+"""
+Binary Wire Protocol for the OCR Endpoints
+Samsung Electronics India - Raw image uploads and compact responses for handheld clients
+
+Besides the JSON body with a base64 ``image``, the ``extract_from_base64``
+endpoints accept the encoded image itself as the request body
+(``Content-Type: application/octet-stream`` or ``image/*``). Options then
+travel as query parameters or ``X-OCR-<Option>`` headers, and the body is
+read from the request stream once, without base64 or a JSON parse.
+
+Responses are JSON unless the ``Accept`` header prefers MessagePack
+(``application/msgpack``) or CBOR (``application/cbor``) and the optional
+``msgpack``/``cbor2`` package is installed.
+"""
+
+import base64
+
+from flask import current_app, jsonify, request
+
+from blueprints.ocr import metrics
+from blueprints.ocr.lazy import lazy_import
+
+# Optional dependencies - responses stay JSON without them
+msgpack = lazy_import('msgpack')
+cbor2 = lazy_import('cbor2')
+
+OPTION_HEADER_PREFIX = 'X-OCR-'
+
+# Media type -> (optional module, encoder)
+RESPONSE_ENCODINGS = {
+    'application/msgpack': (msgpack, lambda data: msgpack.packb(data, use_bin_type=True)),
+    'application/x-msgpack': (msgpack, lambda data: msgpack.packb(data, use_bin_type=True)),
+    'application/cbor': (cbor2, lambda data: cbor2.dumps(data))
+}
+
+
+def is_binary_request(req):
+    """The body is the encoded image itself"""
+    return req.mimetype == 'application/octet-stream' or req.mimetype.startswith('image/')
+
+
+def binary_options(req):
+    """
+    Options of a binary request: ``X-OCR-Tesseract-Config`` becomes
+    ``tesseract_config`` and so on; query parameters win over headers
+    """
+    options = {}
+    for name, value in req.headers.items():
+        if name.upper().startswith(OPTION_HEADER_PREFIX):
+            options[name[len(OPTION_HEADER_PREFIX):].lower().replace('-', '_')] = value
+    options.update(req.args.to_dict())
+    return options
+
+
+def read_image_request(req):
+    """
+    ``(image_bytes, options)`` from a raw image body or a JSON body with a
+    base64 ``image``. Raises ``ValueError`` when no image was sent.
+    """
+    if is_binary_request(req):
+        # One read from the stream, bounded by MAX_CONTENT_LENGTH; nothing else is buffered
+        image_bytes = req.get_data(cache=False)
+        if not image_bytes:
+            raise ValueError('No image data provided')
+        return image_bytes, binary_options(req)
+
+    data = req.get_json(silent=True)
+    if not data or 'image' not in data:
+        raise ValueError('No image data provided')
+
+    image_data = data['image']
+    if image_data.startswith('data:image'):
+        image_data = image_data.split(',')[1]
+    return base64.b64decode(image_data), data
+
+
+def response_encoding(req):
+    """Binary media type the client prefers over JSON, if its encoder is installed"""
+    best = req.accept_mimetypes.best_match(['application/json'] + list(RESPONSE_ENCODINGS))
+    if best in RESPONSE_ENCODINGS and RESPONSE_ENCODINGS[best][0].available():
+        return best
+    return None
+
+
+def respond(data, status=200):
+    """
+    ``data`` as JSON, or as MessagePack/CBOR when ``Accept`` asks for it.
+    Binary responses carry their own ``timings`` block when requested.
+    """
+    mimetype = response_encoding(request)
+    if mimetype is None:
+        response = jsonify(data)
+    else:
+        if metrics.timings_requested():
+            data = dict(data, timings=metrics.request_timings())
+        response = current_app.response_class(RESPONSE_ENCODINGS[mimetype][1](data), mimetype=mimetype)
+    response.status_code = status
+    response.vary.add('Accept')
+    return response
@@ -0,0 +1 @@
+# Scan Blueprints
\ No newline at end of file
@@ -0,0 +1,203 @@
+"""
+Flask Blueprint for Single-pass Sticker Scans
+Samsung Electronics India - Barcodes and sticker text from one upload
+
+The upload is decoded once, at ``BARCODE_MAX_DIMENSION`` (dense barcodes
+need the pixels), and OCR gets a copy fitted to the OCR decode settings.
+Barcode decoding and OpenCV OCR then run concurrently; when both work at
+the same resolution they share one preprocessing graph, so CLAHE and the
+binarised image are computed at most once. The request takes about as
+long as the slower of the two tasks.
+"""
+
+import base64
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import Blueprint, request, jsonify, current_app, g
+from werkzeug.utils import secure_filename
+
+from blueprints.barcode.barcode_bp import parse_options as parse_barcode_options
+from blueprints.barcode.decoder import decode_barcodes
+from blueprints.ocr import metrics
+from blueprints.ocr.image_decode import decode_image, decode_settings, fit_image
+from blueprints.ocr.opencv_bp import StageGraph, cache_fingerprint, extract_text_opencv, parse_mode, to_grayscale_array
+from blueprints.ocr.quality import ImageRejected, assess_image, quality_enabled
+from blueprints.ocr.result_cache import cached_ocr
+
+# Create blueprint
+scan_bp = Blueprint('scan', __name__, url_prefix='/scan')
+metrics.instrument_blueprint(scan_bp)
+
+# Configure allowed file extensions
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'webp'}
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def barcode_dimension(config):
+    """Decode size for scans: the larger of the barcode and OCR limits (None for no limit)"""
+    limits = (config.get('BARCODE_MAX_DIMENSION') or None, config.get('OCR_MAX_DIMENSION') or None)
+    return None if None in limits else max(limits)
+
+def decode_scan_image(image_bytes):
+    """Decode an upload at the barcode resolution"""
+    return decode_image(image_bytes, barcode_dimension(current_app.config))
+
+def barcode_task(graph, formats, exhaustive):
+    """Barcodes on the grayscale image, retried on the CLAHE image when none are found"""
+    barcode_results = decode_barcodes(graph.get('grayscale'), formats, exhaustive)
+    barcode_results['source'] = 'grayscale'
+    if not barcode_results['count']:
+        # Low-contrast stickers; CLAHE is shared with the OCR task
+        retry = decode_barcodes(graph.get('clahe_enhanced'), formats, exhaustive)
+        if retry['count']:
+            retry['stages_run'] = barcode_results['stages_run'] + retry['stages_run']
+            barcode_results = retry
+            barcode_results['source'] = 'clahe_enhanced'
+    return barcode_results
+
+def ocr_task(image, graph, mode, quality):
+    """OCR on the shared graph; a rejected image fails only this task, barcodes still run"""
+    try:
+        analysis, recipe = assess_image(graph.get('grayscale'), current_app.config, 'scan', quality)
+    except ImageRejected as e:
+        return {'error': str(e), 'quality': e.to_dict()}
+    ocr_results = extract_text_opencv(image, mode=mode, graph=graph, recipe=recipe)
+    if analysis:
+        ocr_results['quality'] = dict(analysis, recipe=recipe['name'])
+    return {k: v for k, v in ocr_results.items() if k != 'preprocessing_stages'}
+
+def scan_image(image, options):
+    """
+    Run barcode decoding and OCR concurrently on one decoded image.
+    Returns the merged, JSON-serialisable scan results.
+    """
+    formats, exhaustive = parse_barcode_options(options)
+    mode = parse_mode(options.get('mode'))
+    quality = quality_enabled(options, current_app.config)
+    app = current_app._get_current_object()
+
+    # Barcodes read the full decoded resolution, OCR the image fitted to its own decode settings
+    with metrics.stage('scan', 'decode'):
+        ocr_image = fit_image(image, original_size=image.info.get('original_size'),
+                              **decode_settings(current_app.config))
+    with metrics.stage('scan', 'grayscale'):
+        barcode_graph = StageGraph(to_grayscale_array(image))
+        graph = barcode_graph if ocr_image is image else StageGraph(to_grayscale_array(ocr_image))
+
+    def run(name, task, *args):
+        # Worker threads get their own app context; stage timings are handed back
+        started = time.perf_counter()
+        with app.app_context():
+            g.ocr_timings = {}
+            try:
+                result = task(*args)
+            except Exception as e:
+                app.logger.error(f"Scan {name} error: {str(e)}")
+                result = {'error': str(e)}
+            return result, g.ocr_timings, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix='scan') as executor:
+        barcode_future = executor.submit(run, 'barcode', barcode_task, barcode_graph, formats, exhaustive)
+        ocr_future = executor.submit(run, 'ocr', ocr_task, ocr_image, graph, mode, quality)
+        barcode_results, barcode_timings, barcode_seconds = barcode_future.result()
+        ocr_results, ocr_timings, ocr_seconds = ocr_future.result()
+    wall_seconds = time.perf_counter() - started
+
+    timings = g.get('ocr_timings')
+    if timings is not None:
+        for name, ms in list(barcode_timings.items()) + list(ocr_timings.items()):
+            timings[name] = timings.get(name, 0.0) + ms
+    metrics.record_stage('scan', 'barcodes', barcode_seconds)
+    metrics.record_stage('scan', 'ocr', ocr_seconds)
+
+    scan_results = {
+        'image_info': {
+            'original_size': image.info.get('original_size', image.size),
+            'decoded_size': image.size,
+            'ocr_size': ocr_image.size
+        },
+        'barcode_results': barcode_results,
+        'ocr_results': ocr_results,
+        'scan_info': {
+            'barcode_ms': round(barcode_seconds * 1000, 2),
+            'ocr_ms': round(ocr_seconds * 1000, 2),
+            'wall_ms': round(wall_seconds * 1000, 2),
+            'shared_stages': list(graph.computed) if graph is barcode_graph else []
+        }
+    }
+    failed = [name for name, results in (('barcode', barcode_results), ('ocr', ocr_results)) if 'error' in results]
+    if failed:
+        scan_results['error'] = f"Failed: {', '.join(failed)}"
+    return scan_results
+
+def process_image_bytes(image_bytes, options=None):
+    """
+    Scan an encoded image through the result cache.
+    Returns ``(entry, cache_status)``.
+    """
+    options = options or {}
+    formats, exhaustive = parse_barcode_options(options)
+    mode = parse_mode(options.get('mode'))
+    quality = quality_enabled(options, current_app.config)
+
+    fingerprint = (f"{cache_fingerprint(mode=mode, quality=quality)}|barcode_max={barcode_dimension(current_app.config)}"
+                   f"|formats={','.join(formats)}|exhaustive={exhaustive}")
+    return cached_ocr(
+        current_app.config, image_bytes, 'scan', fingerprint,
+        decode_scan_image, lambda image: {'scan_results': scan_image(image, options)},
+        results_key='scan_results'
+    )
+
+@scan_bp.route('', methods=['POST'])
+def scan():
+    """Decode barcodes and extract sticker text from one uploaded or base64 encoded image"""
+    try:
+        filename = None
+        if request.is_json:
+            data = request.get_json(silent=True) or {}
+            if 'image' not in data:
+                return jsonify({'error': 'No image data provided'}), 400
+
+            image_data = data['image']
+            if image_data.startswith('data:image'):
+                image_data = image_data.split(',')[1]
+            image_bytes = base64.b64decode(image_data)
+            options = data
+        else:
+            if 'file' not in request.files:
+                return jsonify({'error': 'No file uploaded'}), 400
+
+            file = request.files['file']
+            if file.filename == '':
+                return jsonify({'error': 'No file selected'}), 400
+
+            if not allowed_file(file.filename):
+                return jsonify({'error': 'Invalid file type. Allowed: PNG, JPG, JPEG, GIF, BMP, TIFF, WEBP'}), 400
+
+            filename = secure_filename(file.filename)
+            image_bytes = file.read()
+            options = request.form.to_dict()
+
+        entry, cache_status = process_image_bytes(image_bytes, options)
+        scan_results = entry['scan_results']
+
+        response_data = {
+            'success': 'error' not in scan_results,
+            'timestamp': datetime.now().isoformat(),
+            **scan_results,
+            'cache': cache_status
+        }
+        if filename:
+            response_data['filename'] = filename
+
+        with metrics.stage('scan', 'encode'):
+            return jsonify(response_data)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Scan error: {str(e)}")
+        return jsonify({'error': f'Processing failed: {str(e)}'}), 500
@@ -0,0 +1,82 @@
+"""
+Gunicorn Configuration
+Samsung Electronics India - Production serving with preforked, pre-warmed workers
+
+    gunicorn -c gunicorn.conf.py
+
+The application is imported once in the master (``preload_app``) and forked
+into one worker per core. Each worker caps its native thread pools and warms
+its OCR engines in ``post_fork`` before it accepts traffic, and is recycled
+after ``max_requests`` requests to bound memory growth. Workers share their
+metrics through ``OCR_METRICS_DIR`` and their jobs through the SQLite job
+store, so any worker can answer a scrape or a job poll.
+"""
+
+import os
+import tempfile
+
+# Serving
+wsgi_app = 'app:create_app()'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5005')
+workers = int(os.environ.get('GUNICORN_WORKERS', os.cpu_count() or 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+# gthread even with one thread: its main loop keeps the worker's heartbeat
+# going while a request runs, whereas a sync worker busy for longer than
+# ``timeout`` is killed - which would cut every camera stream at 120 s
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+preload_app = True
+
+# Silent (hung) workers are restarted after ``timeout``; with gthread this does
+# not limit how long a request or camera stream may run. Recycled workers
+# finish their requests first
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# Worker recycling - jitter keeps the workers from restarting together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Per-worker threading - the cores are shared by every worker, so each one
+# gets its share of the cores for region crops, as many engines as request
+# threads or crop threads, and single-threaded native pools.
+# Set before the application is imported; create_app() reads them.
+os.environ.setdefault('OCR_REGION_WORKERS', str(max(1, (os.cpu_count() or 1) // workers)))
+os.environ.setdefault('OCR_ENGINE_POOL_SIZE', str(max(threads, int(os.environ['OCR_REGION_WORKERS']))))
+# With the process backend every worker starts its own OCR process pool
+os.environ.setdefault('OCR_PROCESS_WORKERS', str(max(1, (os.cpu_count() or 1) // workers)))
+os.environ.setdefault('OCR_OPENCV_THREADS', '1')
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+# One metrics directory per server; workers inherit it, so a reload keeps the counts
+if 'OCR_METRICS_DIR' not in os.environ:
+    os.environ['OCR_METRICS_DIR'] = tempfile.mkdtemp(prefix='ocr-metrics-')
+
+
+def post_fork(server, worker):
+    from blueprints.ocr.warmup import limit_native_threads, warm_up
+
+    app = worker.app.wsgi()
+    threading = limit_native_threads(app.config.get('OCR_OPENCV_THREADS'))
+    if app.config.get('OCR_WARMUP'):
+        try:
+            timings = warm_up(app)
+            server.log.info(f"Worker {worker.pid} warmed up: {timings} ({threading})")
+        except Exception as e:
+            # A worker that cannot warm up still serves; the first request loads lazily
+            server.log.warning(f"Worker {worker.pid} warm-up failed: {str(e)}")
+
+
+def worker_exit(server, worker):
+    from blueprints.ocr.job_queue import shutdown_job_queue
+    from blueprints.ocr.metrics import REGISTRY
+
+    # Queued jobs get most of the graceful timeout; unfinished ones are stored as failed
+    shutdown_job_queue(max(graceful_timeout - 5, 0))
+    # Last counts since the writer's previous tick
+    REGISTRY.write_process_file()
+
+
+def child_exit(server, worker):
+    from blueprints.ocr.metrics import mark_process_dead
+
+    if os.environ.get('OCR_METRICS_DIR'):
+        mark_process_dead(os.environ['OCR_METRICS_DIR'], worker.pid)
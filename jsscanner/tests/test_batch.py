@@ -0,0 +1,44 @@
+"""
+Tests for batch OCR inputs
+Samsung Electronics India - One bad image in a JSON batch fails on its own line
+"""
+
+import base64
+
+import pytest
+from flask import request
+
+from app import create_app
+from blueprints.ocr.batch import iter_batch_inputs, iter_batch_results
+
+
+@pytest.fixture
+def app():
+    return create_app()
+
+
+def process(image_bytes):
+    return {'ocr_results': {'size': len(image_bytes)}}, None
+
+
+def test_invalid_base64_item_keeps_batch_going(app):
+    good = base64.b64encode(b'sticker').decode()
+    body = {'images': [good, 'notb64!!', {'name': 'last', 'image': f'data:image/png;base64,{good}'}, 7]}
+    with app.test_request_context(json=body):
+        results = list(iter_batch_results(iter_batch_inputs(request, None), process, max_workers=2))
+    summary = results.pop()['summary']
+    assert summary == dict(summary, total=4, succeeded=2, failed=2)
+    assert 'input_error' not in summary
+    by_index = {result['index']: result for result in results}
+    assert by_index[0]['ocr_results'] == {'size': 7}
+    assert not by_index[1]['success'] and 'base64' in by_index[1]['error']
+    assert by_index[2]['name'] == 'last' and by_index[2]['success']
+    assert not by_index[3]['success']
+
+
+@pytest.mark.parametrize('body', [{'images': 'abc'}, ['abc'], {'images': {'a': 'abc'}}])
+@pytest.mark.parametrize('endpoint', ['/ocr/pytesseract/batch', '/ocr/opencv/batch', '/barcode/batch'])
+def test_malformed_json_body_rejected(app, endpoint, body):
+    response = app.test_client().post(endpoint, json=body)
+    assert response.status_code == 400
+    assert 'images' in response.get_json()['error']
@@ -0,0 +1,112 @@
+"""
+Tests for the deskew and orientation stage
+Samsung Electronics India - Rendered stickers turned by right angles
+"""
+
+import io
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from benchmarks.corpus import render_sticker
+from blueprints.ocr.deskew import deskew_array, estimate_orientation, restore_boxes
+
+MIXED_CASE_LINES = ('Galaxy Buds2 Pro', 'Model SM-R510 Graphite', 'Serial R58M12ABCDE', 'Made in India')
+
+
+def sticker(lines=None):
+    """A rendered sticker as a grayscale array"""
+    data = render_sticker((1600, 1200), lines=lines) if lines else render_sticker((1600, 1200))
+    return np.asarray(Image.open(io.BytesIO(data)).convert('L'))
+
+
+def turned(array, degrees):
+    """``array`` turned counter-clockwise by a multiple of 90 degrees"""
+    return np.ascontiguousarray(np.rot90(array, degrees // 90))
+
+
+def reference_recognizer(upright, calls=None):
+    """
+    Stand-in for OCR confidence on the stacked flip-check canvas: a word at
+    the centre of each copy, confident when the copy looks like ``upright``
+    """
+    def recognizer(canvas):
+        if calls is not None:
+            calls.append(canvas.shape)
+        width = canvas.shape[1]
+        height = round(upright.shape[0] * width / upright.shape[1])
+        reference = cv2.resize(upright, (width, height), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+        def confidence(copy):
+            same = np.abs(copy - reference).mean()
+            flipped = np.abs(copy - reference[::-1, ::-1]).mean()
+            return 90.0 if same < flipped else 40.0
+        return [(height / 2, confidence(canvas[:height])),
+                (canvas.shape[0] - height / 2, confidence(canvas[-height:]))]
+    return recognizer
+
+
+def failing_recognizer(array):
+    raise OSError('tesseract is not installed or it is not in your PATH')
+
+
+@pytest.mark.parametrize('degrees', [90, 180, 270])
+def test_capitals_sticker_turned_upright(degrees):
+    upright = sticker()
+    corrected, orientation, matrix = deskew_array(turned(upright, degrees))
+    assert orientation['rotation'] == (-degrees) % 360
+    assert orientation['flip_cue'] == 'alignment'
+    assert orientation['corrected'] and matrix is not None
+    assert np.array_equal(corrected, upright)
+
+
+@pytest.mark.parametrize('degrees', [0, 90, 180, 270])
+def test_mixed_case_sticker_turned_upright(degrees):
+    upright = sticker(MIXED_CASE_LINES)
+    corrected, orientation, _ = deskew_array(turned(upright, degrees))
+    assert orientation['rotation'] == (-degrees) % 360
+    assert np.array_equal(corrected, upright)
+
+
+def test_upright_sticker_left_alone():
+    array = sticker()
+    corrected, orientation, matrix = deskew_array(array)
+    assert orientation['rotation'] == 0 and not orientation['corrected']
+    assert matrix is None and corrected is array
+
+
+@pytest.mark.parametrize('degrees', [0, 180])
+def test_single_line_settled_by_recognizer(degrees):
+    upright = sticker(('SM-A525F/DS',))
+    array = turned(upright, degrees)
+    assert estimate_orientation(array)['flip_cue'] is None
+
+    calls = []
+    corrected, orientation, _ = deskew_array(array, recognizer=reference_recognizer(upright, calls))
+    assert len(calls) == 1
+    assert orientation['flip_cue'] == 'ocr'
+    assert orientation['rotation'] == (-degrees) % 360
+    assert np.array_equal(corrected, upright)
+
+
+def test_boxes_restored_to_turned_image():
+    upright = sticker()
+    array = turned(upright, 90)
+    _, _, matrix = deskew_array(array)
+    # A box in the upright image lands on the same pixels of the turned one
+    box = {'x': 100, 'y': 300, 'width': 200, 'height': 50}
+    mask = np.zeros_like(upright)
+    mask[300:350, 100:300] = 1
+    restored = restore_boxes([dict(box)], matrix, (array.shape[1], array.shape[0]))[0]
+    ys, xs = np.nonzero(turned(mask, 90))
+    assert (restored['x'], restored['y']) == (xs.min(), ys.min())
+    assert (restored['width'], restored['height']) == (xs.max() - xs.min() + 1, ys.max() - ys.min() + 1)
+
+
+def test_engine_failure_leaves_orientation_undecided():
+    array = turned(sticker(('SM-A525F/DS',)), 180)
+    corrected, orientation, _ = deskew_array(array, recognizer=failing_recognizer)
+    assert orientation['flip_cue'] is None
+    assert corrected is array
@@ -0,0 +1,26 @@
+"""
+Tests for the Tesseract engine pool
+Samsung Electronics India - One recognition pass, image_to_string's text
+"""
+
+import os
+
+import pytest
+from PIL import Image
+
+from blueprints.ocr.engine_pool import TesseractEnginePool
+
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'images')
+
+
+def test_recognize_keeps_image_to_string_text():
+    pool = TesseractEnginePool(size=1)
+    if pool.backend != 'tesserocr':
+        pytest.skip('tesserocr or its eng model is not installed')
+    image = Image.open(os.path.join(IMAGES_DIR, 'adapter.jpg')).convert('L')
+
+    page = pool.recognize(image, '--oem 3 --psm 6')
+    assert page['text'] == pool.image_to_string(image, '--oem 3 --psm 6')
+    assert page['data']['text'] == pool.image_to_data(image, '--oem 3 --psm 6')['text']
+    assert pool.stats()['engines'] == {'eng/oem3': 1}
+    pool.close()
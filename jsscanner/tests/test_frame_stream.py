@@ -0,0 +1,74 @@
+"""
+Tests for live camera frame streams
+Samsung Electronics India - The reader thread ends with the response
+"""
+
+import io
+import queue
+import threading
+
+from PIL import Image
+
+from blueprints.ocr.frame_stream import FRAME_HEADER, iter_stream_results, start_reader
+
+
+class BlockingSource:
+    """A request body that hands out queued chunks and blocks until closed"""
+
+    def __init__(self):
+        self.chunks = queue.Queue()
+        self.closed = threading.Event()
+        self.pending = b''
+
+    def read(self, size):
+        while not self.pending:
+            if self.closed.is_set():
+                raise ValueError('read from a closed stream')
+            try:
+                self.pending = self.chunks.get(timeout=0.05)
+            except queue.Empty:
+                continue
+        data, self.pending = self.pending[:size], self.pending[size:]
+        return data
+
+    def close(self):
+        self.closed.set()
+
+
+def frame(shade):
+    image = Image.new('L', (64, 64), shade)
+    image.paste(255 - shade, (0, 0, 32, 64))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    data = buffer.getvalue()
+    return FRAME_HEADER.pack(len(data)) + data
+
+
+def reader_threads():
+    return [thread for thread in threading.enumerate() if thread.name == 'ocr-frame-reader']
+
+
+def test_closing_results_stops_reader():
+    source = BlockingSource()
+    latest = start_reader(source, 1 << 20)
+    results = iter_stream_results(latest, lambda data: {'extracted_text': 'SM-A525F'}, 0, 30)
+
+    source.chunks.put(frame(20))
+    assert next(results)['text'] == 'SM-A525F'
+
+    # The client went away while the reader waits for the next frame
+    results.close()
+    assert source.closed.is_set() and latest.stopped.is_set()
+    for thread in reader_threads():
+        thread.join(2)
+    assert not reader_threads()
+    assert latest.error is None
+
+
+def test_stream_ends_with_summary():
+    source = BlockingSource()
+    source.chunks.put(frame(20) + frame(200) + FRAME_HEADER.pack(0))
+    latest = start_reader(source, 1 << 20)
+    lines = list(iter_stream_results(latest, lambda data: {'extracted_text': str(len(data))}, 0, 30))
+    assert lines[-1]['summary']['received'] == 2
+    assert 'error' not in lines[-1]['summary']
@@ -0,0 +1,46 @@
+"""
+Tests for the image quality check
+Samsung Electronics India - Clean labels pass, washed-out photos are rejected
+"""
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from blueprints.ocr.quality import ImageRejected, analyse_image, choose_recipe, quality_settings
+
+
+def label(ink=20, paper=255, lines=4):
+    """Black-on-white label text on a pure white background"""
+    image = Image.new('L', (1200, 800), paper)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=40)
+    for i in range(lines):
+        draw.text((60, 60 + i * 70), f'SM-A525F/DS IMEI 35693803564380{i}', fill=ink, font=font)
+    return image
+
+
+def test_clean_label_is_not_overexposed():
+    analysis = analyse_image(label())
+    assert analysis['clipped_bright'] >= 0.9
+    recipe = choose_recipe(analysis, quality_settings({}))
+    assert recipe['name'] == 'standard'
+
+
+def test_sparse_text_on_white_page_passes():
+    analysis = analyse_image(label(lines=1))
+    assert choose_recipe(analysis, quality_settings({}))['name'] == 'standard'
+
+
+def test_washed_out_text_is_overexposed():
+    analysis = analyse_image(label(ink=235, paper=255))
+    with pytest.raises(ImageRejected) as rejected:
+        choose_recipe(analysis, quality_settings({}))
+    assert rejected.value.reason == 'overexposed'
+
+
+def test_blank_white_frame_is_overexposed():
+    analysis = analyse_image(np.full((600, 800), 255, dtype=np.uint8))
+    with pytest.raises(ImageRejected) as rejected:
+        choose_recipe(analysis, quality_settings({}))
+    assert rejected.value.reason == 'overexposed'
@@ -0,0 +1,80 @@
+"""
+Tests for per-frame live camera sessions
+Samsung Electronics India - Dedup and coalescing state is shared by every worker
+"""
+
+import io
+import threading
+
+from PIL import Image
+
+from app import create_app
+from blueprints.ocr import stream_sessions
+from blueprints.ocr.stream_sessions import StreamSessionStore, process_session_frame
+
+
+def frame(shade):
+    image = Image.new('L', (64, 64), shade)
+    image.paste(255 - shade, (0, 0, 32, 64))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def test_frames_share_state_between_workers(tmp_path):
+    path = str(tmp_path / 'sessions.sqlite3')
+    # Two stores on one file stand in for two worker processes
+    first, second = StreamSessionStore(path), StreamSessionStore(path)
+    session_id = first.create({'mode': 'full', 'dedup_distance': 4})
+
+    def recognise(data, options):
+        return {'extracted_text': 'SM-A525F', 'ocr_confidence': 90}
+
+    assert process_session_frame(first, session_id, frame(20), recognise)['status'] == 'changed'
+    assert process_session_frame(second, session_id, frame(20), recognise)['status'] == 'duplicate'
+    assert process_session_frame(second, session_id, frame(200), recognise)['status'] == 'unchanged'
+
+    summary = second.close(session_id)
+    assert summary['received'] == 3 and summary['processed'] == 2 and summary['emitted'] == 1
+    assert process_session_frame(first, session_id, frame(20), recognise) is None
+
+
+def test_frame_during_recognition_is_coalesced(tmp_path):
+    path = str(tmp_path / 'sessions.sqlite3')
+    first, second = StreamSessionStore(path), StreamSessionStore(path)
+    session_id = first.create({'mode': 'full', 'dedup_distance': 4})
+    started, release = threading.Event(), threading.Event()
+
+    def slow(data, options):
+        started.set()
+        release.wait(5)
+        return {'extracted_text': 'SM-A525F'}
+
+    results = []
+    worker = threading.Thread(target=lambda: results.append(
+        process_session_frame(first, session_id, frame(20), slow)))
+    worker.start()
+    started.wait(5)
+    assert process_session_frame(second, session_id, frame(200), slow)['status'] == 'coalesced'
+    release.set()
+    worker.join(5)
+    assert results[0]['status'] == 'changed'
+
+    # The lease is back, so the next frame is read
+    assert process_session_frame(second, session_id, frame(200), lambda data, options: {
+        'extracted_text': 'SM-A525F'})['status'] == 'unchanged'
+    assert second.close(session_id)['coalesced'] == 1
+
+
+def test_session_routes(tmp_path, monkeypatch):
+    monkeypatch.setattr(stream_sessions, '_store', None)
+    app = create_app({'TESTING': True, 'OCR_STREAM_SESSION_PATH': str(tmp_path / 'sessions.sqlite3')})
+    client = app.test_client()
+    created = client.post('/ocr/stream/sessions', json={'dedup_distance': 4})
+    assert created.status_code == 201
+    frames_url = created.get_json()['frames_url']
+
+    assert client.post(frames_url, data=b'').status_code == 400
+    assert client.post(frames_url, data=b'not an image').get_json()['status'] == 'failed'
+    assert client.post('/ocr/stream/sessions/missing/frames', data=frame(20)).status_code == 404
+    assert client.delete(f"/ocr/stream/sessions/{created.get_json()['session_id']}").get_json()['summary']['failed'] == 1
@@ -0,0 +1,103 @@
+"""
+Tests for state shared between Gunicorn workers
+Samsung Electronics India - Job polls and metric scrapes answered by any worker
+"""
+
+import json
+import os
+import threading
+
+import pytest
+
+from app import create_app
+from blueprints.ocr import metrics
+from blueprints.ocr.job_queue import JobQueue
+
+
+@pytest.fixture
+def app():
+    return create_app()
+
+
+def test_job_polled_from_another_worker(app, tmp_path):
+    store_path = str(tmp_path / 'jobs.sqlite3')
+    # Two queues with one store stand in for two worker processes
+    submitting = JobQueue(app, workers=1, store_path=store_path, name='test-job-a')
+    polling = JobQueue(app, workers=1, store_path=store_path, name='test-job-b')
+
+    job_id = submitting.submit(lambda: {'text': 'SM-A525F'})
+    job = polling.get(job_id, wait=5)
+    assert job['status'] == 'completed'
+    assert job['result'] == {'text': 'SM-A525F'}
+    assert polling.get('unknown') is None
+
+
+def test_failed_job_polled_from_another_worker(app, tmp_path):
+    store_path = str(tmp_path / 'jobs.sqlite3')
+    submitting = JobQueue(app, workers=1, store_path=store_path, name='test-job-c')
+    polling = JobQueue(app, workers=1, store_path=store_path, name='test-job-d')
+
+    def fail():
+        raise RuntimeError('tesseract failed')
+    job = polling.get(submitting.submit(fail), wait=5)
+    assert job['status'] == 'failed' and job['error'] == 'tesseract failed'
+
+
+def counter_snapshot(value):
+    return {'ocr_requests_total': [[['ocr_pytesseract.upload_image', '200'], value]]}
+
+
+def scraped_requests(text):
+    for line in text.splitlines():
+        if line.startswith('ocr_requests_total{endpoint="ocr_pytesseract.upload_image",status="200"}'):
+            return float(line.split()[-1])
+    return 0.0
+
+
+@pytest.fixture
+def metrics_directory(tmp_path):
+    directory = str(tmp_path / 'metrics')
+    metrics.enable_multiprocess(directory)
+    yield directory
+    metrics.REGISTRY.directory = None
+
+
+def test_scrape_sums_every_worker(metrics_directory):
+    own = scraped_requests(metrics.REGISTRY.render())
+    with open(os.path.join(metrics_directory, '101.json'), 'w') as output:
+        json.dump(counter_snapshot(3), output)
+    with open(os.path.join(metrics_directory, '102.json'), 'w') as output:
+        json.dump(counter_snapshot(4), output)
+    assert scraped_requests(metrics.REGISTRY.render()) == own + 7
+
+    # An exited worker's counts are kept, so the total does not go back
+    metrics.mark_process_dead(metrics_directory, 101)
+    assert not os.path.exists(os.path.join(metrics_directory, '101.json'))
+    assert scraped_requests(metrics.REGISTRY.render()) == own + 7
+
+
+def test_process_file_holds_live_values(metrics_directory):
+    metrics.REQUESTS.inc('ocr_pytesseract.upload_image', '200')
+    metrics.REGISTRY.write_process_file()
+    with open(os.path.join(metrics_directory, f'{os.getpid()}.json')) as source:
+        written = json.load(source)
+    assert written == json.loads(json.dumps(metrics.REGISTRY.snapshot()))
+    # The scraping process reads its own values live, not twice
+    before = scraped_requests(metrics.REGISTRY.render())
+    metrics.REQUESTS.inc('ocr_pytesseract.upload_image', '200')
+    assert scraped_requests(metrics.REGISTRY.render()) == before + 1
+
+
+def test_exiting_worker_fails_unfinished_jobs(app, tmp_path):
+    store_path = str(tmp_path / 'jobs.sqlite3')
+    exiting = JobQueue(app, workers=1, store_path=store_path, name='test-job-e')
+    polling = JobQueue(app, workers=1, store_path=store_path, name='test-job-f')
+
+    release = threading.Event()
+    running = exiting.submit(release.wait)
+    queued = exiting.submit(lambda: 'never run')
+    exiting.shutdown(0.2)
+    for job_id in (running, queued):
+        job = polling.get(job_id)
+        assert job['status'] == 'failed' and 'exited' in job['error']
+    release.set()